@@ -14,6 +14,7 @@ setup(name='macleod',
         'pyparsing',
         'configparser',
         'ply',
+        'numpy',
         'pywin32 ; platform_system=="Windows"',
         'wmi ; platform_system=="Windows"'
     ],
@@ -35,7 +36,10 @@ setup(name='macleod',
             'clif_to_ladr=macleod.scripts.parser:clif_to_ladr',
             'clif_to_latex=macleod.scripts.parser:clif_to_latex',
             'clif_to_owl=macleod.scripts.parser:clif_to_owl',
-            'parse_clif=macleod.scripts.parser:parse_clif'
+            'parse_clif=macleod.scripts.parser:parse_clif',
+            'benchmark_monitor=macleod.scripts.benchmark_monitor:main',
+            'benchmark_race=macleod.scripts.benchmark_race:main',
+            'fake_reasoner=macleod.scripts.fake_reasoner:main'
         ],
         'gui_scripts': [
             'macleod=macleod.gui.gui_beta.gui_main:main [GUI]'
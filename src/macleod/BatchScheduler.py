@@ -0,0 +1,434 @@
+"""
+Scheduler that checks the consistency of many ontologies in parallel, keeping a fixed
+number of reasoner slots busy across all of them.
+
+Every ontology contributes one job per active reasoner. Jobs are started in the order in which
+the ontologies have been added as slots become free. The jobs of an ontology form a Race: their output
+is streamed and scanned as in Ontology.check_consistency, and as soon as one reasoner announces a decisive
+result (or terminates with one), the remaining jobs of that ontology are cancelled (running ones are
+killed, queued ones are dropped) and their slots go to the next jobs. All reasoners run as child
+processes of a single event loop, which waits for them instead of polling.
+
+The stores (see Stores) are consulted and updated by the same steps as in Ontology.check_consistency.
+With a Portfolio, only the reasoner that is most likely to win is queued at first, with a short
+budget; the remaining reasoners are queued only if it does not decide the ontology.
+
+With ProofHints, Prover9 is given the clauses of a past proof of the same problem as hints.
+
+With a ProofCore, the axioms used in a past proof of the same problem are checked alone first, with
+a short budget; the full import closure is checked only if they do not yield a proof.
+
+With a RunJournal, every ontology is recorded as a pending job when it is added and its verdict as soon as it
+is decided; when resuming a run, the verdicts of completed jobs with unchanged inputs are taken from the journal.
+
+With a first timeout, the ontologies are checked in passes with iteratively deepening budgets:
+in the first pass every reasoner runs with the first timeout only; ontologies that remain undecided
+are queued again (behind all jobs of the current pass) with a budget that is larger by the timeout
+factor, until the reasoners' configured timeouts are reached. Thus the easy ontologies are decided
+quickly and the hard ones do not hold up the rest of the batch.
+"""
+
+import asyncio
+import collections
+import logging
+import os
+
+import macleod
+import macleod.Filemgt
+import macleod.ProblemDelivery
+import macleod.Process
+import macleod.Race
+import macleod.ReasonerSet
+import macleod.Stores
+
+
+# factor by which the budget grows from one pass to the next
+DEFAULT_TIMEOUT_FACTOR = 5
+
+
+class BatchScheduler(object):
+    """
+    Queue of (ontology, reasoner) jobs executed with a bounded number of reasoner processes
+    """
+
+    def __init__(self, slots=None, *, summary_file=None, callback=None, stores=None, first_timeout=None,
+                 timeout_factor=DEFAULT_TIMEOUT_FACTOR, journal=None):
+        """
+        :param int slots, number of reasoners that may run at the same time
+                          (default: option reasoner_slots in the [system] section or the number of CPUs)
+        :param str summary_file, file to which a line is appended as soon as an ontology is decided
+        :param function callback, called with (ontology, return_value, fastest_reasoner) for every finished ontology
+        :param Stores stores, the result cache, portfolio, proof cores, models and proof hints to consult and update (default: none, run all reasoners on all axioms)
+        :param int first_timeout, budget in seconds of each reasoner in the first pass (default: none, a single pass with the configured timeouts)
+        :param float timeout_factor, factor by which the budget grows from one pass to the next
+        :param RunJournal journal, journal of the run, which records every job and, when resuming, provides the verdicts of completed jobs (default: none)
+        """
+
+        if slots is None:
+            slots = macleod.Filemgt.read_config('system', 'reasoner_slots')
+        if slots is None:
+            slots = os.cpu_count() or 1
+        self.slots = max(1, int(slots))
+
+        self.summary_file = summary_file
+        self.callback = callback
+        self.stores = macleod.Stores.Stores() if stores is None else stores
+        self.first_timeout = first_timeout
+        self.timeout_factor = timeout_factor
+        self.journal = journal
+
+        # jobs that have not been started yet
+        self._queue = collections.deque()
+
+        # [job id] : [_Job] jobs whose reasoner has been started but is not done yet
+        self._running = {}
+
+        # [ontology name] : [_Batch] ontologies that still have queued or running jobs
+        self._batches = {}
+
+        # [ontology name] : ([return value], [fastest reasoner]) for all decided ontologies
+        self.results = collections.OrderedDict()
+
+        # [pass number] : number of ontologies that have jobs in this pass and are not decided yet
+        self._pending = collections.Counter()
+        # [pass number] : number of ontologies decided in this pass
+        self._decided = collections.Counter()
+        # number of the oldest pass that has not ended yet
+        self._pass = 0
+        # one line per pass that has ended
+        self.pass_reports = []
+        self._started = False
+
+        self._next_id = 0
+
+    def add(self, ontology, reasoners=None):
+        """
+        Queue the consistency check of an ontology; ontologies added while the scheduler is running
+        (e.g. by the callback, once the ontologies they depend on are decided) enter the oldest pass that has not ended
+
+        :param Ontology ontology, the ontology to check (already parsed and, if desired, resolved)
+        :param ReasonerSet reasoners, the reasoners to use (default: all active reasoners)
+        :return None
+        """
+
+        if reasoners is None:
+            reasoners = macleod.ReasonerSet.ReasonerSet()
+
+        batch = _Batch(ontology, reasoners)
+        batch.pass_number = self._pass
+        self._batches[ontology.name] = batch
+        self._pending[batch.pass_number] += 1
+
+        resumed = None if self.journal is None else self.journal.resume(ontology, reasoners)
+        if resumed is not None:
+            # completed in an earlier run on the same inputs, nothing to run or to write
+            self._report(batch, *resumed)
+            return
+
+        reasoners.constructAllCommands(ontology)
+
+        stored = self.stores.lookup(ontology, reasoners)
+        if stored is not None:
+            batch.cached = stored
+            self._decide(batch)
+            return
+
+        self.stores.prepare(ontology, reasoners)
+
+        found = self.stores.get_core_ontology(ontology)
+        if found is not None:
+            (core_ontology, budget) = found
+            core_reasoners = macleod.ReasonerSet.ReasonerSet()
+            core_reasoners.constructAllCommands(core_ontology)
+            core_batch = _Batch(core_ontology, core_reasoners)
+            core_batch.full = batch
+            self._batches[core_ontology.name] = core_batch
+            self._queue_jobs(core_batch, core_reasoners, timeout=budget)
+            return
+
+        self._start(batch)
+
+    def drop(self, name):
+        """
+        Give up on an ontology that has not been decided yet (e.g. because its result is no longer of interest):
+        its queued jobs are dropped and its running ones are shut down, and it does not appear in the results
+
+        :param str name, name of the ontology
+        :return bool True if the ontology had been added and was not decided yet
+        """
+
+        batch = self._batches.get(name)
+        if batch is None or batch.full is not None:
+            return False
+
+        del self._batches[name]
+        batch.dropped = True
+        self._cancel(batch)
+        # the core of the ontology may be checked in its place
+        for core_batch in [b for b in self._batches.values() if b.full is batch]:
+            del self._batches[core_batch.ontology.name]
+            core_batch.dropped = True
+            self._cancel(core_batch)
+        logging.getLogger(__name__).info("Dropped " + name)
+
+        self._pending[batch.pass_number] -= 1
+        self._end_passes()
+        return True
+
+    def _start(self, batch):
+        """ Queue the first jobs for an ontology: the likely winner only or all reasoners """
+
+        choice = self.stores.select(batch.ontology, batch.reasoners)
+        if choice is None:
+            self._queue_jobs(batch, batch.reasoners)
+        else:
+            batch.likely_winner = choice[0][0]
+            self._queue_jobs(batch, choice[0], timeout=choice[1])
+
+    def _budget(self, batch, reasoner):
+        """ The time a reasoner may use on an ontology in its current pass """
+
+        limit = batch.limits[reasoner.name]
+        if self.first_timeout is None:
+            return limit
+
+        return min(limit, int(self.first_timeout * self.timeout_factor ** batch.pass_number))
+
+    def _queue_jobs(self, batch, reasoners, timeout=None):
+        """ Queue one job per reasoner for an ontology, limited to the budget of the current pass unless another timeout is given """
+
+        # a new race for every round of jobs, so that the reasoners killed in an earlier round can run again
+        batch.race = macleod.Race.Race(list(reasoners))
+        for reasoner in reasoners:
+            job = _Job(self._next_id, batch, reasoner)
+            job.timeout = self._budget(batch, reasoner) if timeout is None else timeout
+            self._next_id += 1
+            batch.jobs.append(job)
+            self._queue.append(job)
+
+        logging.getLogger(__name__).info("Queued " + str(len(reasoners)) + " reasoners for " + batch.ontology.name)
+
+    def run(self):
+        """
+        Execute all queued jobs and wait until every ontology has been decided
+
+        :return OrderedDict results, [ontology name] : ([return value], [fastest reasoner])
+        """
+
+        self._started = True
+        self._end_passes()
+
+        if self._queue:
+            asyncio.run(self._run_jobs())
+
+        return self.results
+
+    async def _run_jobs(self):
+        """ Keep the slots busy until no jobs are left, handling each reasoner as soon as it has terminated """
+
+        memory_limit = macleod.Process.get_memory_limit()
+
+        while self._queue or self._running:
+            self._fill_slots(memory_limit)
+            if not self._running:
+                # the remaining jobs belonged to ontologies decided in the meantime
+                continue
+
+            (done, _) = await asyncio.wait([job.task for job in self._running.values()], return_when=asyncio.FIRST_COMPLETED)
+            for job in [j for j in self._running.values() if j.task in done]:
+                self._finish(job)
+
+    def _fill_slots(self, memory_limit):
+        """ Start queued jobs until all slots are busy """
+
+        while self._queue and len(self._running) < self.slots:
+            job = self._queue.popleft()
+            reasoner = job.reasoner
+            if job.batch.race.winner is not None:
+                # another reasoner has announced a decisive result for the ontology in the meantime
+                job.cancelled = True
+                job.done = True
+                continue
+
+            # the budget of the pass is passed on to the reasoner's command line as well
+            reasoner.setTimeout(job.timeout)
+
+            job.task = asyncio.ensure_future(job.batch.race.start(reasoner, memory_limit))
+            self._running[job.id] = job
+            logging.getLogger(__name__).info("STARTED " + reasoner.name + " on " + job.batch.ontology.name +
+                                             " (" + str(len(self._running)) + "/" + str(self.slots) + " slots busy)")
+
+    def _finish(self, job):
+        """ Process a job whose reasoner has terminated or has been killed """
+
+        del self._running[job.id]
+        job.done = True
+        batch = job.batch
+        reasoner = job.reasoner
+
+        if job.task.exception() is not None:
+            logging.getLogger(__name__).error("COULD NOT RUN " + reasoner.name + " on " + batch.ontology.name + ": " +
+                                              str(job.task.exception()))
+        else:
+            macleod.Process.write_summary(reasoner.getOutputFile(), reasoner.getCommand(), reasoner.status,
+                                          round(reasoner.time, 2), 'total time used (seconds)')
+            if not job.cancelled:
+                # decided by the output of this reasoner unless an announced result has decided the race already
+                batch.race.conclude(reasoner)
+                if batch.race.winner is not None:
+                    self._cancel(batch)
+
+        if all(j.done for j in batch.jobs) and not batch.dropped:
+            self._decide(batch)
+
+    def _cancel(self, batch):
+        """ Drop the queued jobs of an ontology and kill its running ones """
+
+        for job in batch.jobs:
+            if job.done or job.cancelled:
+                continue
+            job.cancelled = True
+            if job.task is None:
+                # never started
+                self._queue.remove(job)
+                job.done = True
+            elif batch.race.winner is None:
+                # given up on (the winner of a race has killed all other reasoners already)
+                batch.race.kill(job.reasoner)
+
+    def _decide(self, batch):
+        """ Consolidate the results of all reasoners for an ontology and report them """
+
+        ontology = batch.ontology
+        started = [job.reasoner for job in batch.jobs if job.task is not None]
+        (return_value, fastest_reasoner) = ontology.consolidate_results(batch.cached + started)
+
+        if batch.full is not None:
+            # only the core of the ontology has been checked
+            del self._batches[ontology.name]
+            macleod.ProblemDelivery.finish(ontology, return_value, batch.reasoners)
+            if self.stores.core_decided(batch.full.ontology, return_value, fastest_reasoner):
+                self._report(batch.full, return_value, fastest_reasoner)
+            else:
+                self._start(batch.full)
+            return
+
+        if batch.likely_winner is not None and return_value == macleod.Ontology.UNKNOWN:
+            # the likely winner failed under its short budget: try again with all reasoners
+            self.stores.escalate(ontology, batch.likely_winner)
+            batch.likely_winner = None
+            batch.jobs = []
+            for reasoner in batch.reasoners:
+                reasoner.resetResult()
+            self._queue_jobs(batch, batch.reasoners)
+            return
+
+        if return_value == macleod.Ontology.UNKNOWN:
+            # reasoners that have not used up their configured timeout yet get another chance with a larger budget
+            deepen = [r for r in batch.reasoners if self._budget(batch, r) < batch.limits[r.name]]
+            if deepen:
+                logging.getLogger(__name__).info("No result for " + ontology.name + " in pass " + str(batch.pass_number + 1) +
+                                                 ", queueing it again with a larger budget")
+                self._pending[batch.pass_number] -= 1
+                batch.pass_number += 1
+                self._pending[batch.pass_number] += 1
+                batch.jobs = []
+                for reasoner in deepen:
+                    reasoner.resetResult()
+                self._queue_jobs(batch, deepen)
+                self._end_passes()
+                return
+
+        self.stores.record(ontology, started, return_value, fastest_reasoner)
+
+        self._report(batch, return_value, fastest_reasoner)
+
+    def _report(self, batch, return_value, fastest_reasoner):
+        """ Record the result of an ontology and report it """
+
+        ontology = batch.ontology
+        del self._batches[ontology.name]
+        self.results[ontology.name] = (return_value, fastest_reasoner)
+        macleod.ProblemDelivery.finish(ontology, return_value, batch.reasoners)
+        if self.journal is not None:
+            self.journal.finish(ontology, return_value, fastest_reasoner)
+        self._pending[batch.pass_number] -= 1
+        self._decided[batch.pass_number] += 1
+
+        if self.summary_file is not None:
+            with open(self.summary_file, 'a') as f:
+                f.write(str(return_value) + " " + ontology.name)
+                if fastest_reasoner is not None:
+                    f.write(" " + fastest_reasoner.name)
+                f.write("\n")
+
+        if self.callback is not None:
+            self.callback(ontology, return_value, fastest_reasoner)
+
+        self._end_passes()
+
+    def _end_passes(self):
+        """ Report all passes that have ended, i.e., whose ontologies have all been decided or moved on to the next pass """
+
+        # while ontologies are being added, the first pass may look done prematurely
+        if not self._started:
+            return
+
+        # passes end in order: an ontology enters a pass only from the previous one
+        while self._pending[self._pass] == 0:
+            if self._decided[self._pass] == 0 and self._pending[self._pass + 1] == 0:
+                # no ontology has made it to this pass
+                break
+            remaining = sum(self._pending.values())
+            report = "pass {}: {} ontologies decided".format(self._pass + 1, self._decided[self._pass])
+            if self.first_timeout is not None:
+                report += " with budgets of up to {} seconds".format(int(self.first_timeout * self.timeout_factor ** self._pass))
+            report += ", {} remaining".format(remaining)
+            logging.getLogger(__name__).info(report)
+            self.pass_reports.append(report)
+            if self.summary_file is not None:
+                with open(self.summary_file, 'a') as f:
+                    f.write("# " + report + "\n")
+            self._pass += 1
+
+
+class _Batch(object):
+    """
+    All jobs for a single ontology
+    """
+
+    def __init__(self, ontology, reasoners):
+        self.ontology = ontology
+        self.reasoners = reasoners
+        self.jobs = []
+        # reasoners whose result has been taken from the result cache
+        self.cached = []
+        # the reasoner that is run alone first (possibly as several instances), until the full portfolio is run
+        self.likely_winner = None
+        # [reasoner name] : configured timeout of the reasoner
+        self.limits = {r.name: int(r.timeout) for r in reasoners}
+        # number of the pass (starting at 0) in which the ontology is checked
+        self.pass_number = 0
+        # the batch of the full ontology if only its core is checked by this batch
+        self.full = None
+        # whether the ontology has been given up on before it was decided
+        self.dropped = False
+        # the Race of the current round of jobs
+        self.race = None
+
+
+class _Job(object):
+    """
+    A single reasoner run on a single ontology
+    """
+
+    def __init__(self, id, batch, reasoner):
+        self.id = id
+        self.batch = batch
+        self.reasoner = reasoner
+        # the asyncio task that runs the reasoner, None until it is started
+        self.task = None
+        # seconds the reasoner may run
+        self.timeout = None
+        self.cancelled = False
+        self.done = False
@@ -6,65 +6,159 @@ Created on 2010-11-26
 import macleod.Ontology as Ontology
 import macleod.Filemgt as filemgt
 import macleod.Ladr as ladr
+import macleod.ProblemDelivery
 import os, logging
 
 
 options_files = []
 
+# name of the strategy of a prover that uses no options file
+DEFAULT_STRATEGY = 'default'
 
-def get_system_command(system_name, ontology):
-    """chooses the correct constructor that sets the command up depending on the selected system"""
-    handlers = {
-        "prover9": get_p9_cmd, 
-        "mace4":  get_m4_cmd,
-        "paradox": get_paradox_cmd,
-        "vampire": get_vampire_cmd
-    }
+
+def get_system_command(system_name, ontology, timeout=None, domain_sizes=None, strategy=None, hints=None):
+    """chooses the correct constructor that sets the command up depending on the selected system (see ReasonerRegistry)
+
+    :param int timeout, time limit in seconds passed to the system (default: the timeout configured for the system)
+    :param tuple domain_sizes, (start size, end size, increment) of the domain sizes a model finder searches (default: the configured range)
+    :param str strategy, options file with the search strategy of a prover, or DEFAULT_STRATEGY (default: the configured options file, if any)
+    :param str hints, LADR file with hints from a past proof for Prover9 (see ProofHints; default: none)"""
+    import macleod.ReasonerRegistry
 
     logging.getLogger(__name__).debug("CONSTRUCTING COMMAND FOR: " + system_name + " FROM " + ontology.name)
 
-    return handlers.get(system_name, get_empty_cmd)(ontology)
+    options = {}
+    if domain_sizes is not None:
+        options['domain_sizes'] = domain_sizes
+    if strategy is not None:
+        options['strategy'] = strategy
+    if hints is not None:
+        options['hints'] = hints
+
+    plugin = macleod.ReasonerRegistry.get_plugin(system_name)
+    if plugin is None:
+        return get_empty_cmd(ontology, timeout, **options)
 
+    return plugin.command(system_name, ontology, timeout, **options)
 
-def get_empty_cmd():
+
+def get_empty_cmd(ontology, timeout=None, **options):
     return ""
 
-def get_p9_cmd (ontology):
-    """get a formatted command to run Prover9 with options (timeout, etc.) set in the class instance."""
+def get_timeout(system_name, timeout=None):
+    """the time limit to pass to a system: the given one or the configured one"""
+    if timeout is None:
+        return filemgt.read_config(system_name, 'timeout')
+    return str(timeout)
+
+def get_p9_cmd (ontology, timeout=None, strategy=None, hints=None):
+    """get a formatted command to run Prover9 with options (timeout, etc.) set in the class instance.
+
+    :param str strategy, options file to use instead of the configured one, or DEFAULT_STRATEGY for none
+    :param str hints, LADR file with a list of hints (formulas(hints)) that guide the search"""
 
     args = []
     args.append(filemgt.read_config('prover9','command'))
-    args.append('-t' + filemgt.read_config('prover9','timeout'))
+    args.append('-t' + get_timeout('prover9', timeout))
     args.append('-f')
-    args.append(ontology.write_ladr_file())
+    # Prover9 concatenates all input files, the shared axioms (if any) first and the options file (if any) last
+    args.extend(macleod.ProblemDelivery.get_input_files('prover9', ontology))
 
     # check for possible options file (to change predicate order or other parameters)
-    options_file = filemgt.read_config('prover9', 'options')
+    if strategy is None:
+        options_file = filemgt.read_config('prover9', 'options')
+    elif strategy == DEFAULT_STRATEGY:
+        options_file = None
+    else:
+        options_file = strategy
 
     if options_file is not None:
         options_file = os.path.abspath(options_file)
         args.append(options_file)
 
+    if hints is not None:
+        args.append(hints)
+
     return args
 
 
-def get_m4_cmd (ontology):
-    """get a formatted command to run Mace4 with options (timeout, etc.) set in the class instance."""
+def get_m4_cmd (ontology, timeout=None, domain_sizes=None):
+    """get a formatted command to run Mace4 with options (timeout, etc.) set in the class instance.
+
+    :param tuple domain_sizes, (start size, end size, increment) for a shard of the configured range of domain sizes"""
 
     args = []
     args.append(filemgt.read_config('mace4','command'))
     args.append('-v0')
-    args.append('-t' + filemgt.read_config('mace4','timeout'))
-    args.append('-s' + filemgt.read_config('mace4','timeout_per'))
-    args.append('-n' + filemgt.read_config('mace4','start_size'))
-    args.append('-N' + filemgt.read_config('mace4','end_size'))
+    args.append('-t' + get_timeout('mace4', timeout))
+    # the time per domain size cannot exceed the total time
+    args.append('-s' + str(min(int(filemgt.read_config('mace4','timeout_per')), int(get_timeout('mace4', timeout)))))
+    if domain_sizes is None:
+        args.append('-n' + filemgt.read_config('mace4','start_size'))
+        args.append('-N' + filemgt.read_config('mace4','end_size'))
+    else:
+        args.append('-n' + str(domain_sizes[0]))
+        args.append('-N' + str(domain_sizes[1]))
+        args.append('-i' + str(domain_sizes[2]))
     args.append('-f')
-    args.append(ontology.write_ladr_file())
+    args.extend(macleod.ProblemDelivery.get_input_files('mace4', ontology))
 
     return args
 
 
-def get_paradox_cmd (ontology):
+def get_p9_strategies ():
+    """the strategies with which Prover9 is to be run in parallel (option strategies in the [prover9] section):
+    options files (e.g., with predicate orderings or clause selection settings) or DEFAULT_STRATEGY for Prover9's defaults.
+
+    :return list of str strategies, empty if none are configured"""
+
+    strategies = filemgt.read_config('prover9', 'strategies')
+    if strategies is None:
+        return []
+
+    strategies = [s.strip() for s in strategies.split(',')]
+    return [s if s == DEFAULT_STRATEGY else os.path.abspath(s) for s in strategies if s]
+
+
+def get_strategy_name (strategy):
+    """a short name for a strategy: the name of its options file without ending"""
+
+    return os.path.splitext(os.path.basename(strategy))[0]
+
+
+def get_m4_shards (shards, mode='interleaved'):
+    """split the configured range of domain sizes of Mace4 into disjoint shards, each of which can be searched by a separate Mace4 process.
+
+    :param int shards, number of shards
+    :param str mode, 'interleaved' (shard k searches start+k, start+k+shards, ...) or 'blocked' (each shard searches a contiguous range)
+    :return list of tuples (start size, end size, increment), at most one per domain size"""
+
+    start = int(filemgt.read_config('mace4','start_size'))
+    end = int(filemgt.read_config('mace4','end_size'))
+
+    return split_domain_sizes(start, end, shards, mode)
+
+
+def split_domain_sizes (start, end, shards, mode='interleaved'):
+    """split the domain sizes start..end (inclusive) into disjoint shards; see get_m4_shards"""
+
+    shards = max(1, min(shards, end - start + 1))
+
+    if mode == 'interleaved':
+        return [(start + k, end, shards) for k in range(shards)]
+    elif mode == 'blocked':
+        (size, extra) = divmod(end - start + 1, shards)
+        ranges = []
+        for k in range(shards):
+            block_end = start + size - 1 + (1 if k < extra else 0)
+            ranges.append((start, block_end, 1))
+            start = block_end + 1
+        return ranges
+
+    raise ValueError("Unknown shard mode for Mace4: " + str(mode))
+
+
+def get_paradox_cmd (ontology, timeout=None):
     """ we only care about the first element in the list of imports, which will we use as base name to obtain a single tptp file of the imports,
     which is the input for paradox."""
     args = []
@@ -74,7 +168,7 @@ def get_paradox_cmd (ontology):
     if option is not None:
         args.append(option)
     args.append('--time')
-    args.append(filemgt.read_config('paradox','timeout'))
+    args.append(get_timeout('paradox', timeout))
     args.append('--verbose')
     args.append('2')
     args.append('--model')
@@ -84,7 +178,7 @@ def get_paradox_cmd (ontology):
     return args
 
 
-def get_vampire_cmd (ontology):
+def get_vampire_cmd (ontology, timeout=None):
     args = []
     args.append(filemgt.read_config('vampire','command'))
     args.append('--mode')
@@ -92,10 +186,10 @@ def get_vampire_cmd (ontology):
     args.append('--proof')
     args.append('tptp')
     args.append('-t')
-    args.append(filemgt.read_config('vampire','timeout'))
+    args.append(get_timeout('vampire', timeout))
     # needed for Windows
     args.append('--input_file')
-    args.append(ontology.write_tptp_file())
+    args.extend(macleod.ProblemDelivery.get_input_files('vampire', ontology))
     #logging.getLogger(__name__).debug("COMMAND FOR vampire IS " + str(args))
     # works for linux, not for Windows
     #return (args, [list(imports)[0].get_module_set(imports).get_single_tptp_file(imports)])
@@ -103,6 +197,24 @@ def get_vampire_cmd (ontology):
     return args
 
 
+def get_fake_cmd (section, ontology, timeout=None, **options):
+    """get a command to run the fake reasoner (scripts/fake_reasoner.py) or any other reasoner that is called as
+    [command] [options] -t [timeout] [input files], with the command and options from the given section.
+
+    :param str section, the section of the reasoner in the configuration file"""
+
+    args = []
+    args.append(filemgt.read_config(section,'command'))
+    option = filemgt.read_config(section,'options')
+    if option is not None:
+        args.extend(option.split())
+    args.append('-t')
+    args.append(get_timeout(section, timeout))
+    args.extend(macleod.ProblemDelivery.get_input_files(section, ontology))
+
+    return args
+
+
 
 #-------------------------------
 #---Clean up below--------------
@@ -0,0 +1,212 @@
+"""
+Diagnosis of an inconsistent ontology: a minimal set of its modules that is inconsistent, and then
+a minimal set of axioms of these modules that is inconsistent.
+
+Both are found with QuickXplain (Junker 2004), a divide-and-conquer search that splits the candidates
+in halves. Every step checks both halves (and, where needed, the background they are added to) at
+the same time in a single round of the BatchScheduler, within its reasoner slots: if one half is
+inconsistent together with the background, the other half is not needed at all; otherwise both halves
+contribute to the minimal set, which is searched for in each of them in turn.
+
+When a reasoner reports the axioms used in its proof of an inconsistency (see ReasonerPlugin.used_axioms),
+the candidates are narrowed down to the modules or axioms that the proof uses, which often skips most
+of the search. Checks whose result is unknown count as consistent, so the set found is minimal with
+respect to the inconsistencies the reasoners can find within their timeouts.
+"""
+
+import collections
+import hashlib
+import logging
+import os
+
+import macleod
+import macleod.ProofCore
+import macleod.ReasonerRegistry
+import macleod.SubsetSearch
+
+
+class Diagnosis(object):
+    """
+    Search for a minimal inconsistent set of modules and axioms of an ontology, checking the candidates with a BatchScheduler
+    """
+
+    def __init__(self, ontology, scheduler):
+        """
+        :param Ontology ontology, the inconsistent ontology (with resolved imports)
+        :param BatchScheduler scheduler, the scheduler that checks the candidate sets; its results are collected after each round
+        """
+
+        self.ontology = ontology
+        self.scheduler = scheduler
+
+        # number of rounds of checks run in parallel, and number of checks (reasoner races) in total
+        self.rounds = 0
+        self.checks = 0
+        # number of candidates discarded because a proof did not use them
+        self.pruned = 0
+
+        # the result: names of the modules and tuples (axiom, module name) of the axioms in a minimal inconsistent set
+        self.modules = None
+        self.axioms = None
+
+        # [key] : [list of tuples (axiom, module name)] the candidates of the current level (modules or axioms)
+        self._elements = collections.OrderedDict()
+        # [frozenset of keys] : [bool] whether a set of candidates has been found inconsistent
+        self._verdicts = {}
+        # [frozenset of keys] : [set of axiom names] the axioms used in the proof of an inconsistent set of candidates
+        self._cores = {}
+
+    def run(self, reasoner=None):
+        """
+        Find a minimal inconsistent set of modules, then a minimal inconsistent set of their axioms
+
+        :param Reasoner reasoner, the reasoner that has found the ontology inconsistent, whose proof may narrow down the search (default: none)
+        :return list of tuples (axiom, module name), the axioms of a minimal inconsistent set
+        """
+
+        modules = macleod.SubsetSearch.get_import_closure(self.ontology)
+        self._start_level(collections.OrderedDict((name, [(a, name) for a in module.axioms]) for (name, module) in modules.items()),
+                          self._used_axioms(reasoner))
+        found = self._explain(frozenset(), frozenset(self._elements), False)
+        self.modules = [name for name in self._elements if name in found]
+        logging.getLogger(__name__).info("MINIMAL INCONSISTENT SET OF MODULES: " + ", ".join(self.modules))
+
+        # the proof of the inconsistency of these modules may narrow down their axioms as well
+        core = self._cores.get(found)
+        self._start_level(collections.OrderedDict((axiom.get_name(), [(axiom, name)])
+                                                  for name in self.modules for (axiom, _) in self._elements[name]), core)
+        found = self._explain(frozenset(), frozenset(self._elements), False)
+        self.axioms = [self._elements[key][0] for key in self._elements if key in found]
+        logging.getLogger(__name__).info("MINIMAL INCONSISTENT SET OF " + str(len(self.axioms)) + " AXIOMS FOUND WITH " +
+                                         str(self.checks) + " CHECKS IN " + str(self.rounds) + " ROUNDS")
+
+        return self.axioms
+
+    def _start_level(self, elements, core=None):
+        """ Make a new kind of candidates current, all of which together are inconsistent """
+
+        self._elements = elements
+        self._verdicts = {frozenset(elements): True}
+        self._cores = {}
+        if core:
+            self._cores[frozenset(elements)] = core
+
+    def _explain(self, background, candidates, check_background):
+        """
+        QuickXplain: a minimal subset of the candidates that is inconsistent together with the background,
+        provided that the background and all candidates together are inconsistent
+
+        :param frozenset background, keys of the candidates that are part of every set checked
+        :param frozenset candidates, keys of the candidates to choose from
+        :param bool check_background, whether the background may be inconsistent by itself (otherwise it is known not to be)
+        :return frozenset keys
+        """
+
+        candidates = self._prune(background | candidates, candidates)
+        if len(candidates) == 1 and not check_background:
+            return candidates
+
+        queries = [background] if check_background else []
+        if len(candidates) > 1:
+            ordered = [key for key in self._elements if key in candidates]
+            first = frozenset(ordered[:len(ordered) // 2])
+            second = candidates - first
+            queries += [background | first, background | second]
+        self._check(queries)
+
+        if check_background and self._verdicts[background]:
+            return frozenset()
+        if len(candidates) == 1:
+            return candidates
+
+        if self._verdicts[background | first]:
+            return self._explain(background, first, False)
+        if self._verdicts[background | second]:
+            return self._explain(background, second, False)
+
+        # both halves are needed: the part of the second half that is needed given all of the first half,
+        # then the part of the first half that is needed given that part of the second half
+        needed = self._explain(background | first, second, False)
+        return self._explain(background | needed, first, True) | needed
+
+    def _prune(self, query, candidates):
+        """ The candidates that the proof of the inconsistency of a set (if known) uses """
+
+        core = self._cores.get(query)
+        if core is None:
+            return candidates
+
+        used = frozenset(key for key in candidates if any(axiom.get_name() in core for (axiom, _) in self._elements[key]))
+        if not used or used == candidates:
+            # the proof only uses the background, which cannot be inconsistent by itself
+            return candidates
+
+        logging.getLogger(__name__).info("THE PROOF USES " + str(len(used)) + " OF " + str(len(candidates)) + " CANDIDATES")
+        self.pruned += len(candidates) - len(used)
+        return used
+
+    def _check(self, queries):
+        """ Check all sets of candidates that have not been checked before in a single round """
+
+        new = []
+        for query in queries:
+            if query in self._verdicts or query in new:
+                continue
+            if not query:
+                # no axioms at all
+                self._verdicts[query] = False
+                continue
+            new.append(query)
+        if not new:
+            return
+
+        ontologies = {}
+        for query in new:
+            ontology = self._make_ontology(query)
+            ontologies[query] = ontology
+            self.scheduler.add(ontology)
+        results = self.scheduler.run()
+        self.rounds += 1
+        self.checks += len(new)
+
+        for query in new:
+            (return_value, fastest_reasoner) = results.get(ontologies[query].name, (macleod.Ontology.UNKNOWN, None))
+            self._verdicts[query] = return_value == macleod.Ontology.INCONSISTENT
+            if self._verdicts[query]:
+                self._cores[query] = self._used_axioms(fastest_reasoner)
+
+    def _make_ontology(self, query):
+        """ Construct an ontology from a set of candidates, named after its axioms so that its results can be reused in later runs """
+
+        axioms = [(axiom, name) for key in self._elements if key in query for (axiom, name) in self._elements[key]]
+        digests = sorted(macleod.ProofCore.get_digest(self.ontology, axiom) for (axiom, _) in axioms)
+        (root, ending) = os.path.splitext(self.ontology.name)
+        name = root + '_diagnosis_' + hashlib.sha1("".join(digests).encode('utf-8')).hexdigest()[:12] + ending
+
+        ontology = macleod.Ontology(name, basepath=self.ontology.basepath, preserve_conditionals=self.ontology.preserve_conditionals,
+                                    registry=self.ontology.registry)
+        ontology.axioms = [axiom for (axiom, _) in axioms]
+
+        return ontology
+
+    def _used_axioms(self, reasoner):
+        """ The names of the axioms used in the proof a reasoner has found, or None if it does not tell """
+
+        if reasoner is None or reasoner.status == 'CACHED':
+            # the output of a cached result refers to the axiom names of an earlier run
+            return None
+
+        plugin = macleod.ReasonerRegistry.get_plugin(reasoner.name)
+        if plugin is None or plugin.used_axioms is None:
+            return None
+
+        return plugin.used_axioms(reasoner.getOutputFile())
+
+    def report(self):
+        """
+        :return str summary of the diagnosis
+        """
+
+        return "Minimal inconsistent set of {} modules and {} axioms found with {} reasoner races in {} rounds " \
+               "({} candidates discarded because proofs did not use them)".format(
+                   len(self.modules or []), len(self.axioms or []), self.checks, self.rounds, self.pruned)
@@ -13,6 +13,9 @@ import sys, os, platform, logging, logging.config
 
 #macleod_dir = os.path.realpath(__file__).rsplit(os.sep, 1)[0] + os.sep + '..'
 
+# folder holding the configuration files (and the summaries of batch runs)
+config_dir = str(Path.home().joinpath('macleod'))
+
 WIN_config_file = 'macleod_win.conf'
 LINUX_config_file = 'macleod_linux.conf'
 MAC_config_file = 'macleod_mac.conf'
@@ -21,7 +24,7 @@ class MacleodConfigParser(object):
 
     __instance = None
 
-    __config_dir = str(Path.home().joinpath('macleod'))
+    __config_dir = config_dir
     __config_file = ''
 
     def __new__(cls):
@@ -0,0 +1,231 @@
+"""
+Lemma chaining: lemmas are proved in dependency order, and every lemma that has been proved is
+added as an axiom to the lemmas that depend on it.
+
+By default, the lemmas of a file form a chain in file order: each lemma depends on all lemmas
+before it in the same file, so that it can use every earlier lemma that has been proved. Alternatively,
+the dependencies are given as a DAG ({lemma: [lemmas it depends on]}); lemmas that do not depend on
+each other, as well as lemmas of different files, are then proved in parallel by the BatchScheduler.
+
+A lemma is submitted to the scheduler as soon as all lemmas it depends on are decided (whether proved
+or not). For every proof, the earlier lemmas that occur among the axioms used in the proof (as reported
+by the reasoner, see ReasonerPlugin.used_axioms) are recorded and written to the summary file.
+"""
+
+import collections
+import logging
+import os
+
+import macleod
+import macleod.ReasonerRegistry
+
+
+class LemmaChain(object):
+    """
+    Dependencies between lemma ontologies, which are released to a BatchScheduler in dependency order
+    """
+
+    def __init__(self, scheduler):
+        """
+        :param BatchScheduler scheduler, the scheduler that proves the lemmas; its callback is still called for every lemma
+        """
+
+        self.scheduler = scheduler
+        self._callback = scheduler.callback
+        scheduler.callback = self._decided
+
+        # [lemma name] : [_Lemma] all lemmas added to the chain
+        self._lemmas = collections.OrderedDict()
+        # [ontology name] : [_Lemma], to find the lemma of a decided ontology
+        self._by_ontology = {}
+
+        # [lemma name] : [list of names of the earlier lemmas used in its proof], None if the proof does not tell
+        self.used = collections.OrderedDict()
+        # number of proved lemmas that have been added as axioms to later lemmas
+        self.added = 0
+
+    def get_name(self, lemma_ontology):
+        """
+        :param Ontology lemma_ontology
+        :return str name of the lemma, e.g. lem_theorems_lemma2 for lem_theorems_lemma2.clif
+        """
+
+        return os.path.basename(lemma_ontology.name).rsplit('.', 1)[0]
+
+    def add(self, lemma_ontologies, dependencies=None):
+        """
+        Add the lemmas of a file and submit those that do not depend on any other lemma
+
+        :param list lemma_ontologies, the lemma ontologies in file order (see prove_lemma.get_lemma_ontologies)
+        :param dict dependencies, [lemma name] : [list of names of lemmas it depends on] (default: file order);
+                                  lemmas not named in it depend on no other lemma
+        :return None
+        :raises ValueError if the dependencies contain a cycle
+        """
+
+        group = collections.OrderedDict((self.get_name(l), _Lemma(self.get_name(l), l)) for l in lemma_ontologies)
+        names = list(group)
+
+        for (i, name) in enumerate(names):
+            if dependencies is None:
+                group[name].dependencies = [group[n] for n in names[:i]]
+                continue
+            for dependency in dependencies.get(name, []):
+                if dependency in group:
+                    group[name].dependencies.append(group[dependency])
+                else:
+                    logging.getLogger(__name__).warning("Unknown lemma " + dependency + " in the dependencies of " + name)
+
+        self._check_cycles(group)
+
+        for lemma in group.values():
+            for dependency in lemma.dependencies:
+                dependency.dependents.append(lemma)
+            self._lemmas[lemma.name] = lemma
+            self._by_ontology[lemma.ontology.name] = lemma
+
+        for lemma in group.values():
+            if not lemma.dependencies:
+                self._submit(lemma)
+
+    def _check_cycles(self, group):
+        """ Raise a ValueError if the lemmas of a group cannot be ordered by their dependencies """
+
+        remaining = {name: len(lemma.dependencies) for (name, lemma) in group.items()}
+        dependents = collections.defaultdict(list)
+        for lemma in group.values():
+            for dependency in lemma.dependencies:
+                dependents[dependency.name].append(lemma.name)
+
+        ready = [name for (name, count) in remaining.items() if count == 0]
+        while ready:
+            name = ready.pop()
+            del remaining[name]
+            for dependent in dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+
+        if remaining:
+            raise ValueError("Cyclic dependencies between the lemmas " + ", ".join(sorted(remaining)))
+
+    def _ancestors(self, lemma):
+        """ All lemmas a lemma depends on, directly or indirectly, in the order in which they have been added """
+
+        ancestors = set()
+        processing = list(lemma.dependencies)
+        while processing:
+            dependency = processing.pop()
+            if dependency.name not in ancestors:
+                ancestors.add(dependency.name)
+                processing.extend(dependency.dependencies)
+
+        return [l for l in self._lemmas.values() if l.name in ancestors]
+
+    def _submit(self, lemma):
+        """ Add the proved lemmas the lemma depends on as axioms and queue the lemma """
+
+        for ancestor in self._ancestors(lemma):
+            if ancestor.return_value != macleod.Ontology.PROOF:
+                continue
+            for conjecture in ancestor.ontology.conjectures:
+                lemma.ontology.add_axiom(conjecture.sentence)
+                lemma.axioms[lemma.ontology.axioms[-1].get_name()] = ancestor.name
+                self.added += 1
+
+        if lemma.axioms:
+            logging.getLogger(__name__).info("Proving " + lemma.name + " with the proved lemmas " +
+                                             ", ".join(sorted(set(lemma.axioms.values()))))
+        lemma.submitted = True
+        self.scheduler.add(lemma.ontology)
+
+    def _decided(self, ontology, return_value, fastest_reasoner):
+        """ Callback of the scheduler: record the result of a lemma and submit the lemmas that only waited for it """
+
+        lemma = self._by_ontology.get(ontology.name)
+        if lemma is not None:
+            lemma.return_value = return_value
+            if return_value == macleod.Ontology.PROOF:
+                self._record(lemma, fastest_reasoner)
+
+        if self._callback is not None:
+            self._callback(ontology, return_value, fastest_reasoner)
+
+        if lemma is None:
+            return
+        for dependent in lemma.dependents:
+            if not dependent.submitted and all(d.return_value is not None for d in dependent.dependencies):
+                self._submit(dependent)
+
+    def _record(self, lemma, fastest_reasoner):
+        """ Record which of the earlier lemmas a proof has used """
+
+        used = None
+        if not lemma.axioms:
+            used = []
+        elif fastest_reasoner is not None and fastest_reasoner.status != 'CACHED':
+            # the output of a cached result refers to the axiom names of an earlier run
+            plugin = macleod.ReasonerRegistry.get_plugin(fastest_reasoner.name)
+            names = None if plugin is None or plugin.used_axioms is None else plugin.used_axioms(fastest_reasoner.getOutputFile())
+            if names is not None:
+                used = sorted(set(name for (axiom, name) in lemma.axioms.items() if axiom in names))
+        self.used[lemma.name] = used
+
+        if not used:
+            return
+        logging.getLogger(__name__).info("+++ LEMMA " + lemma.name + " PROVED USING THE LEMMAS " + ", ".join(used))
+        if self.scheduler.summary_file is not None:
+            with open(self.scheduler.summary_file, 'a') as f:
+                f.write("# " + lemma.name + " used lemmas: " + ", ".join(used) + "\n")
+
+    def report(self):
+        """
+        :return str summary of the use of proved lemmas during this run
+        """
+
+        proved = len(self.used)
+        using = sum(1 for used in self.used.values() if used)
+        unknown = sum(1 for used in self.used.values() if used is None)
+
+        return "Proved {} lemmas, {} of them using earlier lemmas ({} without a record of the axioms used); " \
+               "added proved lemmas {} times as axioms".format(proved, using, unknown, self.added)
+
+
+class _Lemma(object):
+    """
+    A lemma ontology and its place in the dependencies
+    """
+
+    def __init__(self, name, ontology):
+        self.name = name
+        self.ontology = ontology
+        # the _Lemma objects this lemma depends on, and those that depend on it
+        self.dependencies = []
+        self.dependents = []
+        # [axiom name] : [name of the proved lemma] the lemmas added as axioms to this lemma
+        self.axioms = {}
+        self.submitted = False
+        # the return value once the lemma is decided
+        self.return_value = None
+
+
+def read_dependencies(filename):
+    """
+    Read the dependencies between lemmas from a file with one line per lemma, e.g.
+    lem_theorems_lemma3: lem_theorems_lemma1 lem_theorems_lemma2
+    Empty lines and lines starting with # are ignored.
+
+    :param str filename
+    :return dict [lemma name] : [list of names of lemmas it depends on]
+    """
+
+    dependencies = {}
+    with open(filename, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            (name, _, depends_on) = line.partition(':')
+            dependencies.setdefault(name.strip(), []).extend(depends_on.replace(',', ' ').split())
+
+    return dependencies
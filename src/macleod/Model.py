@@ -0,0 +1,396 @@
+"""
+Finite models found by model finders, as NumPy tables, and the evaluation of sentences in them.
+
+A model of domain size n interprets every k-ary relation as a boolean array of shape (n,)*k and
+every k-ary function (constants being 0-ary functions) as an integer array of the same shape whose
+entries are elements of the domain 0..n-1. Sentences (Logical objects) are evaluated in a model
+without looping over the assignments of the variables: every subformula evaluates to a boolean
+array with one axis per variable in scope, and quantifiers reduce over the axes of their variables.
+
+Models are read from the output of Mace4 (the standard interpretation(...) format) and Paradox
+(either the TPTP finite interpretation format, fi_domain/fi_functors/fi_predicates, or its classic
+format, f(!1) = !2 and p(!1) : TRUE).
+"""
+
+import functools
+import hashlib
+import itertools
+import logging
+import re
+
+import numpy
+
+from macleod.logical.connective import Biconditional, Conjunction, Disjunction, Implication
+from macleod.logical.negation import Negation
+from macleod.logical.quantifier import Existential, Universal
+from macleod.logical.symbol import Function, Predicate
+
+
+# number of bijections an isomorphism check tries before giving up
+MAX_CANDIDATES = 10000
+
+
+class ModelError(Exception):
+    """ A sentence cannot be evaluated in a model, e.g. because it uses a symbol the model does not interpret """
+
+
+class Model(object):
+    """
+    A finite interpretation of relations, functions and constants
+    """
+
+    def __init__(self, size, relations=None, functions=None):
+        """
+        :param int size, the size of the domain
+        :param dict relations, [name] : [boolean numpy array of shape (size,)*arity]
+        :param dict functions, [name] : [integer numpy array of shape (size,)*arity] (constants have arity 0)
+        """
+
+        self.size = size
+        self.relations = relations if relations is not None else {}
+        self.functions = functions if functions is not None else {}
+
+        # colours of the elements and their digest (see colors), computed on first use
+        self._colors = None
+
+    def satisfies(self, sentence):
+        """
+        Determine whether the model satisfies a sentence; free variables are read universally
+
+        :param Logical sentence
+        :return bool True if the sentence is true in the model
+        :raises ModelError if the sentence uses symbols the model does not interpret
+        """
+
+        free = []
+        value = self._evaluate(sentence, free)
+        return bool(numpy.all(value))
+
+    def satisfies_all(self, sentences):
+        """
+        Determine whether the model satisfies all sentences
+
+        :param list sentences, Logical objects
+        :return bool True if all sentences are true in the model, None if some cannot be evaluated
+        """
+
+        try:
+            return all(self.satisfies(sentence) for sentence in sentences)
+        except ModelError as e:
+            logging.getLogger(__name__).debug("CANNOT EVALUATE IN MODEL: " + str(e))
+            return None
+
+    def _lookup(self, table, name):
+        """ The table of a symbol, ignoring quotes and, for models found from TPTP input, the case """
+
+        name = name.strip("'\"")
+        if name in table:
+            return table[name]
+        if name.lower() in table:
+            return table[name.lower()]
+        raise ModelError("symbol " + name + " not interpreted in the model")
+
+    def _axis(self, axes, variable):
+        """ The values of a variable: the domain along the variable's axis (the innermost one if shadowed) """
+
+        position = len(axes) - 1 - axes[::-1].index(variable)
+        shape = [1] * len(axes)
+        shape[position] = self.size
+        return numpy.arange(self.size).reshape(shape)
+
+    def _term(self, term, axes):
+        """ Evaluate a term to an integer array broadcastable to (size,)*len(axes) """
+
+        if isinstance(term, str):
+            if term in axes:
+                return self._axis(axes, term)
+            # a constant
+            return self._expand(self._lookup(self.functions, term), axes)
+
+        if isinstance(term, Function):
+            table = self._lookup(self.functions, term.name)
+            return self._apply(table, [self._term(t, axes) for t in term.variables], axes)
+
+        raise ModelError("not a term: " + repr(term))
+
+    def _apply(self, table, arguments, axes):
+        if table.ndim != len(arguments):
+            raise ModelError("wrong number of arguments")
+        if not arguments:
+            return self._expand(table, axes)
+        arguments = numpy.broadcast_arrays(*arguments)
+        return table[tuple(arguments)]
+
+    @staticmethod
+    def _expand(value, axes):
+        """ Reshape a single value so that it broadcasts against arrays with one axis per variable """
+
+        return numpy.asarray(value).reshape([1] * len(axes))
+
+    def _evaluate(self, logical, axes):
+        """ Evaluate a formula to a boolean array broadcastable to (size,)*len(axes) """
+
+        if isinstance(logical, Predicate):
+            if logical.is_equality():
+                return self._term(logical.variables[0], axes) == self._term(logical.variables[1], axes)
+            table = self._lookup(self.relations, logical.name)
+            return self._apply(table, [self._term(t, axes) for t in logical.variables], axes)
+
+        elif isinstance(logical, Negation):
+            return numpy.logical_not(self._evaluate(logical.terms[0], axes))
+
+        elif isinstance(logical, Conjunction):
+            return functools.reduce(numpy.logical_and, [self._evaluate(t, axes) for t in logical.terms])
+
+        elif isinstance(logical, Disjunction):
+            return functools.reduce(numpy.logical_or, [self._evaluate(t, axes) for t in logical.terms])
+
+        elif isinstance(logical, Implication):
+            return numpy.logical_or(numpy.logical_not(self._evaluate(logical.terms[0], axes)),
+                                    self._evaluate(logical.terms[1], axes))
+
+        elif isinstance(logical, Biconditional):
+            return self._evaluate(logical.terms[0], axes) == self._evaluate(logical.terms[1], axes)
+
+        elif isinstance(logical, (Universal, Existential)):
+            inner = axes + list(logical.variables)
+            value = numpy.broadcast_to(self._evaluate(logical.terms[0], inner), (self.size,) * len(inner))
+            reduce = numpy.all if isinstance(logical, Universal) else numpy.any
+            return reduce(value, axis=tuple(range(len(axes), len(inner))))
+
+        raise ModelError("cannot evaluate " + repr(logical))
+
+    def _graphs(self):
+        """ All symbols as relations: a k-ary function is the (k+1)-ary relation of its graph """
+
+        graphs = {('relation', name): table for (name, table) in self.relations.items()}
+        for (name, table) in self.functions.items():
+            graph = numpy.zeros(table.shape + (self.size,), dtype=bool)
+            indices = numpy.indices(table.shape)
+            graph[tuple(indices) + (table,)] = True
+            graphs[('function', name)] = graph
+        return graphs
+
+    def colors(self):
+        """
+        Colour the domain elements by how they take part in the relations and functions, refining the colours by those
+        of the elements they occur with until they are stable; isomorphisms only map elements to elements of the same colour
+
+        :return tuple ([list of the colour of each element], [str digest of the colouring, equal for isomorphic models])
+        """
+
+        if self._colors is not None:
+            return self._colors
+
+        graphs = self._graphs()
+        # the tuples in each relation
+        tuples = [(symbol, [tuple(int(e) for e in t) for t in numpy.argwhere(graphs[symbol])]) for symbol in sorted(graphs)]
+
+        colors = [0] * self.size
+        classes = 1
+        while True:
+            signatures = [[colors[e]] for e in range(self.size)]
+            for (symbol, members) in tuples:
+                for t in members:
+                    neighbours = tuple(colors[e] for e in t)
+                    for (position, e) in enumerate(t):
+                        signatures[e].append((symbol, position, neighbours))
+            signatures = [repr([s[0]] + sorted(s[1:])) for s in signatures]
+            palette = {signature: color for (color, signature) in enumerate(sorted(set(signatures)))}
+            colors = [palette[signature] for signature in signatures]
+            if len(palette) == classes:
+                break
+            classes = len(palette)
+
+        shapes = sorted((kind, name, table.shape) for ((kind, name), table) in graphs.items())
+        digest = hashlib.sha256(repr((self.size, shapes, sorted(signatures))).encode('utf-8')).hexdigest()
+        self._colors = (colors, digest)
+        return self._colors
+
+    def isomorphic(self, other, max_candidates=MAX_CANDIDATES):
+        """
+        Determine whether two models are isomorphic, trying all bijections that respect the colours of the elements
+
+        :param Model other
+        :param int max_candidates, number of bijections after which the search gives up
+        :return bool True if the models are isomorphic, False if they are not or the search gave up
+        """
+
+        (colors, digest) = self.colors()
+        (other_colors, other_digest) = other.colors()
+        if digest != other_digest:
+            return False
+
+        classes = sorted(set(colors))
+        elements = [[e for e in range(self.size) if colors[e] == c] for c in classes]
+        other_elements = [[e for e in range(other.size) if other_colors[e] == c] for c in classes]
+        graphs = self._graphs()
+        other_graphs = other._graphs()
+
+        for (tried, images) in enumerate(itertools.product(*[itertools.permutations(e) for e in other_elements])):
+            if tried >= max_candidates:
+                logging.getLogger(__name__).debug("GAVE UP ISOMORPHISM CHECK AFTER " + str(tried) + " BIJECTIONS")
+                return False
+            mapping = numpy.zeros(self.size, dtype=int)
+            for (domain, image) in zip(elements, images):
+                mapping[list(domain)] = image
+            if all(numpy.array_equal(other_graphs[symbol][numpy.ix_(*[mapping] * table.ndim)], table)
+                   for (symbol, table) in graphs.items()):
+                return True
+
+        return False
+
+    def to_dict(self):
+        """
+        :return dict representation of the model that can be stored as JSON
+        """
+
+        return {'size': self.size,
+                'relations': {name: table.astype(int).tolist() for (name, table) in self.relations.items()},
+                'functions': {name: table.tolist() for (name, table) in self.functions.items()}}
+
+    def to_mace4(self):
+        """
+        :return str the model in the format in which Mace4 writes interpretations (see read_mace4_model)
+        """
+
+        entries = []
+        for (kind, tables) in (('function', self.functions), ('relation', self.relations)):
+            for (name, table) in sorted(tables.items()):
+                arguments = "(" + ",".join("_" * table.ndim) + ")" if table.ndim else ""
+                entries.append("    {}({}{}, [{}])".format(kind, name, arguments, ", ".join(str(int(v)) for v in table.flat)))
+
+        return "interpretation( {}, [number=1, seconds=0], [\n{} ]).\n".format(self.size, ",\n".join(entries))
+
+    @staticmethod
+    def from_dict(data):
+        """
+        :param dict data, as returned by to_dict
+        :return Model model
+        """
+
+        return Model(data['size'],
+                     {name: numpy.array(table, dtype=bool) for (name, table) in data['relations'].items()},
+                     {name: numpy.array(table, dtype=int) for (name, table) in data['functions'].items()})
+
+    def __repr__(self):
+        return "Model(" + str(self.size) + ", " + str(sorted(self.relations)) + ", " + str(sorted(self.functions)) + ")"
+
+
+def read_mace4_model(filename):
+    """
+    Read the first model from the output of Mace4
+
+    :param str filename, the output file
+    :return Model model, or None if the output contains no model
+    """
+
+    try:
+        with open(filename, 'r', errors='replace') as f:
+            text = f.read()
+    except OSError:
+        return None
+
+    start = text.find('interpretation(')
+    if start < 0:
+        return None
+    end = text.find(']).', start)
+    text = text[start:end if end >= 0 else len(text)]
+
+    size = int(re.match(r'interpretation\(\s*(\d+)', text).group(1))
+    model = Model(size)
+    for (kind, name, arguments, values) in MACE4_ENTRY.findall(text):
+        arity = arguments.count('_')
+        table = numpy.array([int(v) for v in values.replace(',', ' ').split()]).reshape((size,) * arity)
+        if kind == 'relation':
+            model.relations[name.strip("'")] = table.astype(bool)
+        else:
+            model.functions[name.strip("'")] = table
+
+    return model
+
+
+def read_paradox_model(filename):
+    """
+    Read the model from the output of Paradox (or any other model finder writing TPTP finite interpretations)
+
+    :param str filename, the output file
+    :return Model model, or None if the output contains no model
+    """
+
+    try:
+        with open(filename, 'r', errors='replace') as f:
+            text = f.read()
+    except OSError:
+        return None
+
+    formulas = dict()
+    for (role, formula) in TPTP_FI_FORMULA.findall(text):
+        formulas.setdefault(role, []).append(formula)
+
+    # the domain elements, in the order in which they are listed (or numbered: !1, !2, ...)
+    elements = {}
+
+    def element(token):
+        return elements.setdefault(token.strip(), len(elements))
+
+    def arguments(text):
+        return tuple(element(a) for a in text.split(',')) if text else ()
+
+    entries = {}
+    if 'fi_domain' in formulas:
+        for formula in formulas['fi_domain']:
+            for token in TPTP_DOMAIN_ELEMENT.findall(formula):
+                element(token)
+        for formula in formulas.get('fi_functors', []):
+            for (name, args, value) in TPTP_FUNCTOR_ENTRY.findall(formula):
+                entries.setdefault(('function', name.strip("'")), {})[arguments(args)] = element(value)
+        for formula in formulas.get('fi_predicates', []):
+            for (negated, name, args, truth) in TPTP_PREDICATE_ENTRY.findall(formula):
+                value = not negated and truth != '$false'
+                entries.setdefault(('relation', name.strip("'")), {})[arguments(args)] = value
+    else:
+        lines = PARADOX_ENTRY.findall(text)
+        if not lines:
+            return None
+        size = max(int(n) for n in re.findall(r'!(\d+)', text))
+        for n in range(1, size + 1):
+            element('!' + str(n))
+        for (name, args, value) in lines:
+            if value in ('TRUE', 'FALSE'):
+                entries.setdefault(('relation', name.strip("'")), {})[arguments(args)] = (value == 'TRUE')
+            else:
+                entries.setdefault(('function', name.strip("'")), {})[arguments(args)] = element(value)
+
+    size = len(elements)
+    model = Model(size)
+    for ((kind, name), values) in entries.items():
+        arity = len(next(iter(values)))
+        table = numpy.zeros((size,) * arity, dtype=bool if kind == 'relation' else int)
+        for (args, value) in values.items():
+            table[args] = value
+        if kind == 'relation':
+            model.relations[name] = table
+        else:
+            model.functions[name] = table
+
+    return model
+
+
+# an entry of a Mace4 interpretation: function(f(_,_), [0, 1, 1, 0]) or relation(p, [1])
+MACE4_ENTRY = re.compile(r'(function|relation)\(\s*([^\s(,\[]+)(\([_,\s]*\))?\s*,\s*\[([^\]]*)\]\s*\)')
+
+# a formula of a TPTP finite interpretation: fof(name, fi_domain, ...).
+TPTP_FI_FORMULA = re.compile(r'fof\(\s*[^,]+,\s*(fi_domain|fi_functors|fi_predicates)\s*,(.*?)\)\s*\.\s*$', re.S | re.M)
+
+# the elements of the domain: X = '1' | X = '2' ...
+TPTP_DOMAIN_ELEMENT = re.compile(r'[A-Z]\w*\s*=\s*([^\s|)]+)')
+
+# the value of a function or constant: f('1','2') = '2'
+TPTP_FUNCTOR_ENTRY = re.compile(r"('[^']*'|[a-z]\w*)(?:\(([^()]*)\))?\s*=\s*([^\s&|)]+)")
+
+# the value of a relation: p('1'), ~p('2'), ~ p('2') or p('1') <=> $false
+TPTP_PREDICATE_ENTRY = re.compile(r"(~)?\s*('[^']*'|[a-z]\w*)(?:\(([^()]*)\))?(?:\s*<=>\s*(\$true|\$false))?")
+
+# an entry of a model in the classic output of Paradox: f(!1,!2) = !2, a = !1, p(!1) : TRUE or p(!1) <=> FALSE
+PARADOX_ENTRY = re.compile(r"^\s*('[^']*'|[a-z]\w*)(?:\(([!\d,\s]*)\))?\s*(?:=|:|<=>)\s*(!\d+|TRUE|FALSE)\s*$", re.M)
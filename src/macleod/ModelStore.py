@@ -0,0 +1,310 @@
+"""
+Models found by Mace4 and Paradox, kept in an sqlite database in the output folder.
+
+When a model finder shows an ontology to be consistent, the model it found is read from its output
+(see Model) and stored under the ontology. When the ontology is checked again, e.g. after one of
+its modules has been edited, the stored model is evaluated against every axiom of the current
+import closure first. If it still satisfies all of them (and falsifies the conjectures, if any),
+the ontology is consistent and no reasoner needs to be run at all; otherwise the reasoners are
+raced as usual and the new model replaces the old one.
+
+Every model found is also added to the pool of the modules it is a model of (the ontology itself, or
+the imports of a lemma), unless the pool already contains an isomorphic model. Since a model of the
+axioms that falsifies a lemma is a counterexample to that lemma, every lemma is screened against
+the whole pool of its modules before any reasoner is started, and only the lemmas that no model in
+the pool refutes are sent to the reasoners.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+import macleod
+import macleod.Filemgt
+import macleod.Model
+import macleod.ProofCore
+import macleod.Reasoner
+import macleod.ReasonerRegistry
+
+
+# file name of the database within the output folder
+MODEL_FILE = 'models'
+
+# number of models kept in the pool of a module (the oldest ones are dropped first)
+MAX_POOL_SIZE = 100
+
+
+class ModelStore(object):
+    """
+    The most recent model found for each ontology, and a pool of pairwise non-isomorphic models for each module
+    """
+
+    def __init__(self, filename=None):
+        """
+        :param str filename, path of the database (default: models.sqlite in the output folder)
+        """
+
+        if filename is None:
+            filename = macleod.Filemgt.get_full_path(MODEL_FILE, folder=macleod.Filemgt.read_config('output', 'folder'),
+                                                     ending='.sqlite')
+        self.filename = filename
+
+        # number of checks decided by a stored model, and number of stored models that no longer fit their ontology
+        self.hits = 0
+        self.misses = 0
+        # number of lemmas refuted by a model from the pool, and number of models found that were already in the pool
+        self.refuted = 0
+        self.duplicates = 0
+
+        # [(pool row id, digests of the axioms)] : [bool whether the model satisfies all the axioms], for screening many lemmas of the same modules;
+        # keyed by the contents of the axioms, since the ids of Axiom objects are reused once their modules are gone
+        self._satisfies = {}
+        # [module] : [pool as returned by get_pool], so that the pool is read only once for many lemmas
+        self._pools = {}
+
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS models ("
+                                 "key TEXT PRIMARY KEY, reasoner TEXT, size INTEGER, model TEXT, "
+                                 "output_file TEXT, created REAL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS pool ("
+                                 "id INTEGER PRIMARY KEY, module TEXT, digest TEXT, reasoner TEXT, size INTEGER, "
+                                 "model TEXT, created REAL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS pool_module ON pool (module, digest)")
+        self._connection.commit()
+
+    def make_key(self, ontology):
+        """
+        Compute the key of an ontology: its name, and whether it includes the axioms for nontrivial consistency
+
+        :param Ontology ontology
+        :return str key
+        """
+
+        sha = hashlib.sha256(ontology.name.encode('utf-8'))
+        if ontology.nontrivial:
+            sha.update(b'nontrivial')
+
+        return sha.hexdigest()
+
+    def get_module(self, ontology):
+        """
+        Name the modules whose models the models found for an ontology are: the imports of a lemma, the ontology itself otherwise
+
+        :param Ontology ontology
+        :return str name of the pool
+        """
+
+        if ontology.conjectures and ontology.imports:
+            return " ".join(sorted(os.path.abspath(module.name) if module is not None else path
+                                   for (path, module) in ontology.imports.items()))
+
+        return os.path.abspath(ontology.name)
+
+    def record(self, ontology, reasoner):
+        """
+        Store the model a model finder has found for an ontology
+
+        :param Ontology ontology
+        :param Reasoner reasoner, a model finder that has found a model
+        :return Model model, or None if no model can be read from the reasoner's output
+        """
+
+        plugin = macleod.ReasonerRegistry.get_plugin(reasoner.name)
+        if plugin is None or plugin.model is None or reasoner.status == 'CACHED':
+            return None
+
+        model = plugin.model(reasoner.getOutputFile())
+        if model is None:
+            logging.getLogger(__name__).debug("NO MODEL FOUND IN " + reasoner.getOutputFile())
+            return None
+
+        self._connection.execute("INSERT OR REPLACE INTO models VALUES (?, ?, ?, ?, ?, ?)",
+                                 (self.make_key(ontology), reasoner.name, model.size, json.dumps(model.to_dict()),
+                                  reasoner.getOutputFile(), time.time()))
+        self._connection.commit()
+        logging.getLogger(__name__).info("STORED MODEL OF SIZE " + str(model.size) + " OF " + ontology.name +
+                                         " FOUND BY " + reasoner.name)
+        self.add_to_pool(self.get_module(ontology), model, reasoner.name)
+
+        return model
+
+    def add_to_pool(self, module, model, reasoner_name=None):
+        """
+        Add a model to the pool of a module unless the pool contains an isomorphic model already
+
+        :param str module, name of the pool (see get_module)
+        :param Model model
+        :param str reasoner_name, name of the model finder that found the model
+        :return bool True if the model has been added
+        """
+
+        (_, digest) = model.colors()
+        rows = self._connection.execute("SELECT model FROM pool WHERE module = ? AND digest = ?", (module, digest)).fetchall()
+        if any(model.isomorphic(macleod.Model.Model.from_dict(json.loads(row[0]))) for row in rows):
+            logging.getLogger(__name__).debug("MODEL OF SIZE " + str(model.size) + " ALREADY IN THE POOL OF " + module)
+            self.duplicates += 1
+            return False
+
+        self._connection.execute("INSERT INTO pool (module, digest, reasoner, size, model, created) VALUES (?, ?, ?, ?, ?, ?)",
+                                 (module, digest, reasoner_name, model.size, json.dumps(model.to_dict()), time.time()))
+        self._connection.execute("DELETE FROM pool WHERE module = ? AND id NOT IN "
+                                 "(SELECT id FROM pool WHERE module = ? ORDER BY id DESC LIMIT ?)",
+                                 (module, module, MAX_POOL_SIZE))
+        self._connection.commit()
+        self._pools.pop(module, None)
+
+        return True
+
+    def get_pool(self, module):
+        """
+        :param str module, name of the pool (see get_module)
+        :return list of tuples ([row id], [name of the model finder], [Model model]), the newest first
+        """
+
+        if module not in self._pools:
+            rows = self._connection.execute("SELECT id, reasoner, model FROM pool WHERE module = ? ORDER BY id DESC",
+                                            (module,)).fetchall()
+            self._pools[module] = [(row[0], row[1], macleod.Model.Model.from_dict(json.loads(row[2]))) for row in rows]
+
+        return self._pools[module]
+
+    def lookup(self, ontology):
+        """
+        Find the stored model of an ontology
+
+        :param Ontology ontology
+        :return tuple ([name of the reasoner that found it], [Model model], [output file it was read from]), or None
+        """
+
+        row = self._connection.execute("SELECT reasoner, model, output_file FROM models WHERE key = ?",
+                                       (self.make_key(ontology),)).fetchone()
+        if row is None:
+            return None
+
+        return (row[0], macleod.Model.Model.from_dict(json.loads(row[1])), row[2])
+
+    def fits(self, ontology, model, pool_id=None):
+        """
+        Determine whether a model shows an ontology to be consistent: it satisfies every axiom of the import closure
+        and falsifies every conjecture (so that it is a counterexample no matter how the conjectures are combined)
+
+        :param Ontology ontology
+        :param Model model
+        :param int pool_id, row of the model in the pool, under which the evaluation of the axioms is remembered
+        :return bool True if the model fits the ontology
+        """
+
+        # the conjectures are few and most models satisfy them, so they are evaluated first
+        if not all(model.satisfies_all([conjecture.sentence]) is False for conjecture in ontology.conjectures):
+            return False
+
+        start = time.perf_counter()
+        axioms = [axiom for (axiom, _) in ontology.get_all_axioms()]
+        key = None if pool_id is None else (pool_id, frozenset(macleod.ProofCore.get_digest(ontology, axiom) for axiom in axioms))
+        if key in self._satisfies:
+            return self._satisfies[key]
+
+        fits = model.satisfies_all([axiom.sentence for axiom in axioms]) is True
+        logging.getLogger(__name__).debug("EVALUATED " + str(len(axioms)) + " AXIOMS IN A MODEL OF SIZE " +
+                                          str(model.size) + " IN " + "{:.3f}".format(time.perf_counter() - start) + "s")
+        if key is not None:
+            self._satisfies[key] = fits
+
+        return fits
+
+    def reuse(self, ontology, reasoners):
+        """
+        Decide an ontology by a stored model that still fits: the most recent model of the ontology or, for a lemma,
+        any model in the pool of its modules that refutes it. The model finder that found the model then counts as
+        having found it again.
+
+        :param Ontology ontology
+        :param ReasonerSet reasoners, the reasoners (with constructed commands) that would be run on the ontology
+        :return Reasoner the model finder whose result is the stored model, or None if the reasoners need to be run
+        """
+
+        finders = [r for r in reasoners if getattr(macleod.ReasonerRegistry.get_plugin(r.name), 'model', None) is not None]
+        if not finders:
+            return None
+
+        found = self.lookup(ontology)
+        if found is not None:
+            (name, model, output_file) = found
+            if self.fits(ontology, model):
+                self.hits += 1
+                logging.getLogger(__name__).info("STORED MODEL OF SIZE " + str(model.size) + " FOUND BY " + name +
+                                                 " STILL FITS " + ontology.name)
+                return self._use(ontology, finders, name, output_file)
+            logging.getLogger(__name__).info("STORED MODEL NO LONGER FITS " + ontology.name)
+            self.misses += 1
+
+        if ontology.conjectures:
+            module = self.get_module(ontology)
+            pool = self.get_pool(module)
+            for (pool_id, name, model) in pool:
+                if self.fits(ontology, model, pool_id):
+                    self.refuted += 1
+                    logging.getLogger(__name__).info("MODEL OF SIZE " + str(model.size) + " FROM THE POOL OF " + module +
+                                                     " REFUTES " + ontology.name)
+                    return self._use(ontology, finders, name, None, model)
+            if pool:
+                logging.getLogger(__name__).debug("NONE OF " + str(len(pool)) + " MODELS IN THE POOL OF " + module +
+                                                  " REFUTES " + ontology.name)
+
+        return None
+
+    def _use(self, ontology, finders, name, output_file, model=None):
+        """
+        Make the result of a model finder (preferably the one that found the model) that of a stored model,
+        pointing to the output of the run the model stems from or else writing the model to the model finder's output file
+        """
+
+        reasoner = ([r for r in finders if r.name == name] or finders)[0]
+        szs = 'CounterSatisfiable' if ontology.conjectures else 'Satisfiable'
+        if output_file is not None and os.path.isfile(output_file):
+            reasoner.output_file = output_file
+        elif model is not None:
+            with open(reasoner.output_file, 'w') as f:
+                f.write("% Model from the pool of " + self.get_module(ontology) + " that refutes " + ontology.name + "\n")
+                f.write(model.to_mace4())
+        reasoner.result = macleod.Reasoner.ReasonerResult(macleod.Ontology.CONSISTENT, szs, 0, reasoner.output_file)
+        reasoner.output = macleod.Ontology.CONSISTENT
+        reasoner.time = 0
+        reasoner.status = 'CACHED'
+
+        return reasoner
+
+    def report(self):
+        """
+        :return str summary of the use of stored models during this run
+        """
+
+        return "Decided {} checks by stored models, {} stored models no longer fitted; refuted {} lemmas by models from the pool, " \
+               "{} models found were already in the pool".format(self.hits, self.misses, self.refuted, self.duplicates)
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM models").fetchone()[0]
+
+
+__models = None
+
+
+def get_models():
+    """
+    Return the process-wide store of models, opening it on first use
+
+    :return ModelStore models
+    """
+
+    global __models
+
+    if __models is None:
+        __models = ModelStore()
+
+    return __models
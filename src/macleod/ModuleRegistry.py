@@ -0,0 +1,330 @@
+"""
+Process-wide registry of parsed modules (Ontology objects) that are shared between
+all top-level ontologies that import them.
+
+Entries are keyed by the absolute path of the module and by whether conditionals are
+preserved, so that the two parse variants of the same file never get mixed up.
+An entry is only reused as long as the file on disk (and every module in its import
+closure) is unchanged; changes are detected via the modification time and size of the
+file and, if those differ, via a hash of the file contents.
+
+Only the most recently used modules are kept alive by the registry itself (a bounded LRU);
+all other modules are tracked through weak references so that they are released as soon
+as no ontology refers to them anymore.
+"""
+
+import collections
+import hashlib
+import logging
+import os
+import weakref
+
+import macleod.TranslationCache
+
+
+# default number of modules that are kept alive by the registry
+DEFAULT_SIZE = 256
+
+
+class ModuleRegistry(object):
+    """
+    Bounded LRU of parsed modules with explicit invalidation
+    """
+
+    def __init__(self, max_size=DEFAULT_SIZE):
+
+        self.max_size = max_size
+
+        # [key] : [_Entry] for every module that is (weakly) known to the registry
+        self._entries = {}
+
+        # [key] : [Ontology] strong references to the most recently used modules
+        self._lru = collections.OrderedDict()
+
+        # [key] : [Ontology] modules whose imports are currently being resolved;
+        # used to detect cyclic imports
+        self._loading = {}
+
+        # translations of the axioms of the modules, shared the same way as the modules themselves
+        self.translations = macleod.TranslationCache.TranslationCache()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # accumulated parse time of the modules that did not have to be reparsed
+        self.parse_time_saved = 0.0
+
+    @staticmethod
+    def make_key(path, preserve_conditionals=True):
+        """
+        Construct the key under which a module is stored
+
+        :param str path, path to the CLIF file of the module
+        :param bool preserve_conditionals, which parse variant of the module is meant
+        :return tuple key
+        """
+
+        return (os.path.normcase(os.path.abspath(path)), bool(preserve_conditionals))
+
+    def lookup(self, path, preserve_conditionals=True):
+        """
+        Return the parsed module for the given path if the registry holds an up-to-date copy of it
+
+        :param str path, path to the CLIF file of the module
+        :param bool preserve_conditionals, which parse variant of the module is requested
+        :return Ontology module or None
+        """
+
+        key = self.make_key(path, preserve_conditionals)
+
+        ontology = self._get_live(key)
+        if ontology is None:
+            self.misses += 1
+            return None
+
+        closure = set()
+        if not self._is_fresh(key, ontology, closure):
+            logging.getLogger(__name__).info("Module changed on disk, reparsing " + key[0])
+            self.invalidate(path)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        # the module comes with its complete import closure, none of which needs to be parsed again
+        self.parse_time_saved += sum(self._entries[k].parse_time for k in closure if k in self._entries)
+        self._touch(key, ontology)
+        logging.getLogger(__name__).debug("Reusing parsed module " + key[0])
+
+        return ontology
+
+    def store(self, path, ontology, preserve_conditionals=True):
+        """
+        Add a freshly parsed module to the registry
+
+        :param str path, path to the CLIF file the module has been parsed from
+        :param Ontology ontology, the parsed module
+        :param bool preserve_conditionals, the parse variant of the module
+        :return None
+        """
+
+        key = self.make_key(path, preserve_conditionals)
+
+        try:
+            stat = os.stat(key[0])
+        except OSError:
+            # nothing to validate against later, so do not cache it
+            return
+
+        self._entries[key] = _Entry(weakref.ref(ontology), stat.st_mtime_ns, stat.st_size, file_digest(key[0]),
+                                    getattr(ontology, 'parse_time', 0.0))
+        self._touch(key, ontology)
+
+    def invalidate(self, path=None):
+        """
+        Drop a module (both parse variants) or, if no path is given, all modules from the registry
+
+        :param str path, path to the CLIF file of the module to drop
+        :return None
+        """
+
+        if path is None:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._lru.clear()
+            return
+
+        for preserve_conditionals in (True, False):
+            key = self.make_key(path, preserve_conditionals)
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+            self._lru.pop(key, None)
+
+    def clear(self):
+        """
+        Drop all modules and reset the statistics
+        """
+
+        self.invalidate()
+        self._loading.clear()
+        self.translations.clear()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.parse_time_saved = 0.0
+
+    def time_saved(self):
+        """
+        Total time saved by reusing parsed modules and their translations
+
+        :return float seconds
+        """
+
+        return self.parse_time_saved + self.translations.time_saved
+
+    def report(self):
+        """
+        Summarize how much work the registry has saved
+
+        :return str summary
+        """
+
+        return ("Reused parsed modules {} times ({} parsed), saving {:.2f}s of parsing; "
+                "reused {} axiom translations, saving {:.2f}s of translation; {:.2f}s saved in total").format(
+            self.hits, self.misses, self.parse_time_saved,
+            self.translations.hits, self.translations.time_saved, self.time_saved())
+
+    def start_loading(self, ontology):
+        """
+        Mark a module as being in the process of resolving its imports
+
+        :param Ontology ontology, the module whose imports are resolved
+        :return None
+        """
+
+        self._loading[self.make_key(ontology.name, ontology.preserve_conditionals)] = ontology
+
+    def finish_loading(self, ontology):
+        """
+        Remove the mark set by start_loading
+
+        :param Ontology ontology, the module whose imports have been resolved
+        :return None
+        """
+
+        self._loading.pop(self.make_key(ontology.name, ontology.preserve_conditionals), None)
+
+    def get_loading(self, path, preserve_conditionals=True):
+        """
+        Return the module for the given path if its imports are currently being resolved,
+        i.e. if importing it again would constitute a cyclic import
+
+        :return Ontology module or None
+        """
+
+        return self._loading.get(self.make_key(path, preserve_conditionals))
+
+    def __len__(self):
+        return len([key for key in list(self._entries) if self._get_live(key) is not None])
+
+    def __contains__(self, path):
+        return any(self._get_live(self.make_key(path, c)) is not None for c in (True, False))
+
+    def _get_live(self, key):
+        """ Return the module stored under key if it is still alive """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        ontology = entry.ref()
+        if ontology is None:
+            # released by all its users in the meantime
+            del self._entries[key]
+
+        return ontology
+
+    def _touch(self, key, ontology):
+        """ Mark a module as most recently used and evict the least recently used ones """
+
+        self._lru[key] = ontology
+        self._lru.move_to_end(key)
+
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+    def _is_fresh(self, key, ontology, visited):
+        """ Check whether the module and all modules in its import closure are unchanged on disk """
+
+        if key in visited:
+            return True
+        visited.add(key)
+
+        entry = self._entries.get(key)
+        if entry is None or entry.ref() is not ontology:
+            return False
+
+        try:
+            stat = os.stat(key[0])
+        except OSError:
+            return False
+
+        if (stat.st_mtime_ns, stat.st_size) != (entry.mtime, entry.size):
+            # only touched or really modified?
+            if file_digest(key[0]) != entry.digest:
+                return False
+            entry.mtime = stat.st_mtime_ns
+            entry.size = stat.st_size
+
+        for module in ontology.imports.values():
+            if module is None:
+                continue
+            # an import that has been dropped from the registry (or never made it in) is outdated as well
+            if not self._is_fresh(self.make_key(module.name, key[1]), module, visited):
+                return False
+
+        return True
+
+
+class _Entry(object):
+    """
+    Bookkeeping for a single module; holds only a weak reference to the module itself
+    """
+
+    __slots__ = ('ref', 'mtime', 'size', 'digest', 'parse_time')
+
+    def __init__(self, ref, mtime, size, digest, parse_time=0.0):
+        self.ref = ref
+        self.mtime = mtime
+        self.size = size
+        self.digest = digest
+        self.parse_time = parse_time
+
+
+def file_digest(path):
+    """
+    Compute a hash of the contents of a file
+
+    :param str path, path to the file
+    :return str hexdigest
+    """
+
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+
+    return sha.hexdigest()
+
+
+__registry = None
+
+
+def get_registry():
+    """
+    Return the process-wide registry, creating it on first use with the size
+    configured in the [system] section (option module_cache_size)
+
+    :return ModuleRegistry registry
+    """
+
+    global __registry
+
+    if __registry is None:
+        import macleod.Filemgt
+
+        size = macleod.Filemgt.read_config('system', 'module_cache_size')
+        __registry = ModuleRegistry(int(size) if size is not None else DEFAULT_SIZE)
+
+    return __registry
+
+
+def set_registry(registry):
+    """
+    Replace the process-wide registry, e.g. to give a batch run its own registry
+
+    :param ModuleRegistry registry, the new registry (None to recreate the default one on next use)
+    :return None
+    """
+
+    global __registry
+    __registry = registry
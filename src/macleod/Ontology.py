@@ -11,7 +11,12 @@ import macleod.dl.owl
 import macleod.logical.axiom
 
 import macleod.Filemgt
+import macleod.ModuleRegistry
+import macleod.ProblemDelivery
 import macleod.Process
+import macleod.Race
+import macleod.Stores
+import macleod.SymbolTable
 import macleod.dl.filters
 import macleod.dl.translation
 
@@ -29,9 +34,7 @@ class Ontology(object):
     CONTRADICTION = -100
     ERROR = -50
 
-    imported = {}
-
-    def __init__(self, name, basepath=None, resolve=False, preserve_conditionals = True):
+    def __init__(self, name, basepath=None, resolve=False, preserve_conditionals = True, registry=None):
 
         # The full path to the file
         self.name = os.path.abspath(name)
@@ -57,6 +60,17 @@ class Ontology(object):
 
         self.resolve = resolve
 
+        # registry from which imported modules are reused (the process-wide one if None)
+        self.registry = registry
+
+        # signature of the axioms in this ontology itself, updated whenever an axiom is added
+        self.signature = macleod.SymbolTable.SymbolTable()
+        # signature of the ontology including its import closure; built on demand
+        self.closure_signature = None
+
+        # seconds it took to parse the file of this ontology itself (without its imports)
+        self.parse_time = 0.0
+
         # for keeping track of the terminology
         self.unary_predicates = set()
         self.binary_predicates = set()
@@ -82,6 +96,10 @@ class Ontology(object):
         self.latex_file = None
         self.owl = None
 
+        # ontology whose import closure has been translated and written once for many ontologies (e.g. lemmas)
+        # that import the same modules; the files of this ontology then only add its own axioms and conjectures
+        self.shared_axioms = None
+
         # store whether existential axioms for nontrivial consistency are added;
         # need to write output to different files then
         self.nontrivial = False
@@ -90,6 +108,7 @@ class Ontology(object):
         # (applies to all subsequent instantiations of Ontology as well, when imports are processed)
         global conditionals
         conditionals = preserve_conditionals
+        self.preserve_conditionals = preserve_conditionals
 
         # enumerator for creating unique constants
         global var_enum
@@ -116,7 +135,7 @@ class Ontology(object):
     def resolve_imports(self):
         """
         Look over our list of imports and tokenize and parse any that haven't
-        already been parsed;
+        already been parsed; modules that have been parsed before are taken from the module registry.
         Calling this method also sets self.resolve to True (which is False by default)
         """
 
@@ -127,32 +146,61 @@ class Ontology(object):
         # Cyclic imports are kind of painful in Python
         import macleod.parsing.parser as Parser
 
-        for path in self.imports:
+        registry = self.get_registry()
+        registry.start_loading(self)
+
+        try:
+            for path in self.imports:
 
-            logging.getLogger(__name__).debug("Working on import " + path)
+                logging.getLogger(__name__).debug("Working on import " + path)
 
-            if self.imports[path] is None:
+                if self.imports[path] is None:
 
-                if path in Ontology.imported:
-                    print("Cyclic import found: {} imports {}".format(self.name, path))
-                    self.imports[path] = Ontology.imported[path]
-                else:
                     sub, base = self.basepath
-                    subbed_path = path.replace(self.basepath[0], self.basepath[1])
+                    subbed_path = os.path.normpath(os.path.join(base, path.replace(sub, base)))
                     logging.getLogger(__name__).debug("Subbed path for import " + path)
-                    # Need to immediately keep track of the ontology path in processing to not visit it again
-                    # we later update the value with the actual created ontology object
-                    Ontology.imported[path] = None
-                    try:
-                        logging.getLogger(__name__).info("Starting to parse " + subbed_path)
-                        new_ontology = Parser.parse_file(subbed_path, sub, base, self.resolve, preserve_conditionals=conditionals)
-                    except TypeError as e:
-                        logging.getLogger(__name__).error("Error parsing " + subbed_path + ": " + str(e))
+
+                    new_ontology = registry.get_loading(subbed_path, self.preserve_conditionals)
+                    if new_ontology is not None:
+                        print("Cyclic import found: {} imports {}".format(self.name, path))
+                        self.imports[path] = new_ontology
+                        continue
+
+                    new_ontology = registry.lookup(subbed_path, self.preserve_conditionals)
+                    if new_ontology is None:
+                        try:
+                            logging.getLogger(__name__).info("Starting to parse " + subbed_path)
+                            new_ontology = Parser.parse_file(subbed_path, sub, base, self.resolve,
+                                                             preserve_conditionals=self.preserve_conditionals,
+                                                             registry=registry)
+                        except TypeError as e:
+                            logging.getLogger(__name__).error("Error parsing " + subbed_path + ": " + str(e))
+                            continue
+
+                        if new_ontology is None:
+                            continue
+
+                        registry.store(subbed_path, new_ontology, self.preserve_conditionals)
 
                     new_ontology.basepath = self.basepath
                     self.imports[path] = new_ontology
-                    # update the import information with the created ontology object
-                    Ontology.imported[path] = new_ontology
+        finally:
+            registry.finish_loading(self)
+
+        # the import closure has changed
+        self.closure_signature = None
+
+    def get_registry(self):
+        """
+        Get the module registry used to share imported modules with other ontologies
+
+        :return ModuleRegistry registry
+        """
+
+        if self.registry is None:
+            self.registry = macleod.ModuleRegistry.get_registry()
+
+        return self.registry
 
     def get_all_modules(self):
         """Get a flattened list of all Ontologies that are imported either directly or indirectly """
@@ -171,6 +219,9 @@ class Ontology(object):
             if new is not None:
 
                 for onto in new.imports.values():
+                    if onto is None:
+                        # import that could not be parsed
+                        continue
                     print ("Found import " + onto.name)
                     if onto.name not in all_modules_names:
                         print("New import " + onto.name)
@@ -192,7 +243,12 @@ class Ontology(object):
         :return None
         """
 
-        self.axioms.append(macleod.logical.axiom.Axiom(logical))
+        axiom = macleod.logical.axiom.Axiom(logical)
+        self.axioms.append(axiom)
+
+        self.signature.add_axiom(axiom, self.name)
+        if self.closure_signature is not None:
+            self.closure_signature.add_axiom(axiom, self.name)
 
     def add_conjecture(self, logical):
         """
@@ -203,7 +259,7 @@ class Ontology(object):
         :return None
         """
 
-        self.conjecture.append(macleod.logical.axiom.Axiom(logical))
+        self.conjectures.append(macleod.logical.axiom.Axiom(logical))
 
     def add_import(self, path):
         """
@@ -216,115 +272,70 @@ class Ontology(object):
 
         self.imports[path] = None
 
-    def analyze_ontology(self):
+    def get_signature(self):
         """
-        Analyzes all axioms of the ontology and stores lists of predicates, etc.
+        Get the table of all nonlogical symbols used in the ontology and,
+        if resolve is set (i.e. by calling resolve_imports()), also in its import closure.
+        The table is assembled from the signatures of the individual modules, which are
+        maintained as axioms are added, so no axioms need to be revisited.
 
-        :return:
+        :return SymbolTable signature
         """
 
-        class WrappedSymbol(object):
-            """
-            Wrapping predicates and function symbols in a new class to make comparing, merging, etc. easier
-            """
-            def __init__(self, symbol):
-                self.symbol = symbol
-
-            def __eq__(self, other):
-                # special treatment if either one is a string -- applies to constants only
-                if isinstance(self.symbol, str) and isinstance(other.symbol, str):
-                    return self.symbol==other.symbol
-                elif isinstance(self.symbol, str) and not isinstance(other.symbol, str):
-                    return self.symbol==other.symbol.name
-                elif not isinstance(self.symbol, str) and isinstance(other.symbol, str):
-                    return self.symbol.name == other.symbol
-                else:
-                    return self.symbol.same_symbol(other.symbol)
-
-            def __hash__(self):
-                if isinstance(self.symbol, str):
-                    return hash(self.symbol)
-                else:
-                    return hash(self.symbol.name)
-
-            def __repr__(self):
-                if isinstance(self.symbol, str):
-                    return self.symbol + "(0)"
-                else:
-                    return self.symbol.name + "(" + str(len(self.symbol.variables)) + ")"
+        if not self.resolve:
+            return self.signature
 
-        axioms = self.get_all_axioms()
+        if self.closure_signature is None:
+            closure_signature = macleod.SymbolTable.SymbolTable()
 
-        from macleod.logical.symbol import Function
-        self.binary_predicates.add(WrappedSymbol(Function("=",["x","y"])))
+            seen = set()
+            processing = [self]
+            while processing:
+                module = processing.pop()
+                if module is None or id(module) in seen:
+                    continue
+                seen.add(id(module))
+                closure_signature.merge(module.signature)
+                processing.extend(module.imports.values())
 
-        for (axiom, _) in axioms:
-            # Aready done during axiom creation
-            #axiom.analyze_logical()
+            self.closure_signature = closure_signature
 
-            self.unary_predicates.update(set(WrappedSymbol(p) for p in axiom.unary_predicates))
-            self.binary_predicates.update(set(WrappedSymbol(p) for p in axiom.binary_predicates))
+        return self.closure_signature
 
-            self.nary_predicates.update(set(WrappedSymbol(p) for p in axiom.nary_predicates))
-            self.consts.update(set(WrappedSymbol(p) for p in axiom.consts))
-            self.functs.update(set(WrappedSymbol(p) for p in axiom.functs))
+    def analyze_ontology(self):
+        """
+        Collects the predicates, functions and constants of the ontology (including the import closure if resolved)
+        and reports symbols that are used inconsistently.
+
+        :return: SymbolTable signature
+        """
+
+        from macleod.SymbolTable import Symbol
+
+        signature = self.get_signature()
 
-        logging.getLogger(__name__).info("Unary predicates: {}".format(", ".join([repr(p) for p in self.unary_predicates])))
-        logging.getLogger(__name__).info("Binary predicates: {}".format(", ".join([repr(p) for p in self.binary_predicates])))
-        logging.getLogger(__name__).info("N-ary predicates: {}".format(", ".join([repr(p) for p in self.nary_predicates])))
-        logging.getLogger(__name__).info("Functions: {}".format(", ".join([repr(p) for p in self.functs])))
-        logging.getLogger(__name__).info("Constants: {}".format(", ".join([repr(p) for p in self.consts])))
+        self.unary_predicates = set(signature.predicates(1))
+        self.binary_predicates = set(signature.predicates(2))
+        self.binary_predicates.add(Symbol("=", Symbol.PREDICATE, 2))
+        self.nary_predicates = set(signature.nary_predicates())
+        self.functs = set(signature.functions())
+        self.consts = set(signature.constants())
+
+        logger = logging.getLogger(__name__)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Unary predicates: {}".format(", ".join([repr(p) for p in self.unary_predicates])))
+            logger.debug("Binary predicates: {}".format(", ".join([repr(p) for p in self.binary_predicates])))
+            logger.debug("N-ary predicates: {}".format(", ".join([repr(p) for p in self.nary_predicates])))
+            logger.debug("Functions: {}".format(", ".join([repr(p) for p in self.functs])))
+            logger.debug("Constants: {}".format(", ".join([repr(p) for p in self.consts])))
 
         self.all_predicates = self.unary_predicates.union(self.binary_predicates).union(self.nary_predicates)
 
-        # do some sanity checks
-        # need to compare names; identity alone doesn't work
-        intersection = self.unary_predicates & self.binary_predicates
-        if bool(intersection):
-            full_intersection = self.unary_predicates.intersection(self.binary_predicates)
-            for i in full_intersection:
-                logging.getLogger(__name__).warning("Predicate " + repr(i.symbol.name) + " used as unary predicate (class) and binary predicate (relation)")
-
-        intersection = self.unary_predicates & self.nary_predicates
-        if bool(intersection):
-            full_intersection = self.unary_predicates.intersection(self.nary_predicates)
-            for i in full_intersection:
-                logging.getLogger(__name__).warning("Predicate " + repr(i.symbol.name) + " used as unary predicate (class) and n-ary predicate (relation)")
-
-        intersection = self.binary_predicates & self.nary_predicates
-        if bool(intersection):
-            full_intersection = self.binary_predicates.intersection(self.nary_predicates)
-            for i in full_intersection:
-                logging.getLogger(__name__).warning("Predicate " + repr(i.symbol.name) + " used as binary and n-ary predicate (relation)")
-
-        intersection = self.all_predicates & self.functs
-        if bool(intersection):
-            full_intersection = self.all_predicates.intersection(self.functs)
-            for i in full_intersection:
-                logging.getLogger(__name__).warning(repr(i.symbol.name) + " used as predicate and function symbol")
-
-        #predicate_names = set([p.symbol.name for p in self.all_predicates])
-        #function_names = set([p.symbol.name for p in self.functs])
-
-        intersection = self.all_predicates & self.consts
-        if bool(intersection):
-            full_intersection = self.all_predicates.intersection(self.consts)
-            for i in full_intersection:
-                logging.getLogger(__name__).warning(i.symbol + " used as predicate and constant")
-
-        intersection = self.functs & self.consts
-        if bool(intersection):
-            full_intersection = self.functs.intersection(self.consts)
-            for i in full_intersection:
-                logging.getLogger(__name__).warning(i.symbol + " used as function symbol and constant")
-
-        # TODO comparing against constants needs to be done differently because they are just strings
-        #intersection = self.consts & all_predicates
-        #if bool(intersection):
-        #    logging.getLogger(__name__).warning(intersection + " used as predicate and a constant")
-        #intersection = self.consts & self.functs
-        #if bool(intersection):
-        #    logging.getLogger(__name__).warning(intersection + " used as a function symbol and a constant")
+        # sanity checks: the conflicts have already been detected while building the signature
+        for warning in signature.conflicts():
+            logger.warning(warning)
+
+        return signature
 
     def get_explicit_definitions(self):
         """
@@ -349,19 +360,17 @@ class Ontology(object):
         :return:
         """
 
-        axioms = self.get_all_axioms()
-
         self.analyze_ontology()
 
         logging.getLogger(__name__).info("Creating existential axioms to enforce nontrivial consistency")
 
         for pred in self.all_predicates:
-            if pred.symbol.name=="=":
+            if pred.name=="=":
                 # skip the equality predicate
                 continue
             else:
-                self.add_predicate_satisfiability_axiom(pred.symbol,True)
-                self.add_predicate_satisfiability_axiom(pred.symbol,False)
+                self.add_predicate_satisfiability_axiom(pred,True)
+                self.add_predicate_satisfiability_axiom(pred,False)
 
         # Remember that nontrivial axioms have been created
         self.nontrivial = True
@@ -371,7 +380,7 @@ class Ontology(object):
         """
         Creates and adds an axiom that ascertains the existence of a predicate
         (i.e. class, binary relation or n-ary predicate)
-        :param symbol:
+        :param symbol: Symbol from the signature of the ontology
         :return:
         """
 
@@ -379,14 +388,12 @@ class Ontology(object):
         from macleod.logical.connective import Conjunction
         from macleod.logical.quantifier import Existential
         from macleod.logical.negation import Negation
-        from macleod.logical.axiom import Axiom
 
         global var_enum
 
-        arity = len(symbol.variables)
         # Create new constants for each variable
         vars = []
-        for v in symbol.variables:
+        for _ in range(symbol.arity):
             var_enum += 1
             vars.append("var" + str(var_enum))
 
@@ -403,40 +410,53 @@ class Ontology(object):
                 terms.append(disjointness_term)
 
         conjunction = Conjunction(terms)
-        axiom = Axiom(Existential(vars,conjunction))
-        self.axioms.append(axiom)
+        # through add_axiom, so that the signatures know the new axiom
+        self.add_axiom(Existential(vars,conjunction))
 
     def to_tptp(self):
         """
-        Translates all axioms in the module and, if present, in any imported modules to the TPTP format
+        Translates all axioms in the module and, if present, in any imported modules (unless shared, see share_axioms) to the TPTP format
         :return: TPTP conversions as a list of strings
         """
         if self.tptp_output is None:
             tptp_output = []
 
-            for (axiom, path) in self.get_all_axioms():
-                tptp_output.append(axiom.to_tptp())
+            # translations of shared (imported) axioms are reused across ontologies
+            translations = self.get_registry().translations
+
+            for (axiom, path) in self._get_written_axioms():
+                tptp_output.append(translations.translate(axiom, 'tptp'))
+
+            for conjecture in self.conjectures:
+                tptp_output.append(translations.translate(conjecture, 'tptp_conjecture'))
 
             self.tptp_output = tptp_output
 
         return self.tptp_output
 
-    def to_ladr(self):
+    def to_ladr(self, labels=False):
         """
-        Translates all axioms in the module and, if present, in any imported modules to the LADR format supported by Prover9 and Mace4
+        Translates all axioms in the module and, if present, in any imported modules (unless shared, see share_axioms) to the LADR format supported by Prover9 and Mace4
+        :param bool labels, label every axiom with its name, as in the problems given to the reasoners (see get_ladr_text)
         :return: LADR conversions as a list of strings
         """
 
         if self.ladr_output is None:
+            self.ladr_output = {}
+
+        if labels not in self.ladr_output:
             ladr_output = []
 
-            all_axioms = self.get_all_axioms()
+            translations = self.get_registry().translations
+            output_type = 'ladr_labelled' if labels else 'ladr'
+
+            all_axioms = self._get_written_axioms()
             for (axiom, path) in all_axioms:
-                ladr_output.append(axiom.to_ladr())
+                ladr_output.append(translations.translate(axiom, output_type))
 
-            self.ladr_output = ladr_output
+            self.ladr_output[labels] = ladr_output
 
-        return self.ladr_output
+        return self.ladr_output[labels]
 
     def to_latex(self):
         """
@@ -446,15 +466,24 @@ class Ontology(object):
         if self.latex_output is None:
             latex_output = []
 
+            translations = self.get_registry().translations
+
             all_axioms = self.get_all_axioms()
             for (axiom, path) in all_axioms:
-                latex_output.append("$" + axiom.to_latex() +"$")
+                latex_output.append("$" + translations.translate(axiom, 'latex') +"$")
 
             self.latex_output = latex_output
 
         return self.latex_output
 
-    def get_output_filename(self, output_type, out=False):
+    def get_output_filename(self, output_type, out=False, persistent=False):
+        """
+        :param str output_type, name of the configuration section of the output format (tptp/ladr/owl/...)
+        :param bool out, the output file of the reasoner of that name rather than a translation
+        :param bool persistent, a problem file in the conversions folder even if problems are kept in memory (see ProblemDelivery)
+        :return str path
+        """
+
         # the following assumes that the names of the configuration sections
         # are the same as the names of the output (tptp/ladr/owl)
         ending = ""
@@ -473,6 +502,9 @@ class Ontology(object):
         if out:
             ending += macleod.Filemgt.read_config("output", 'ending')
             folder_name = macleod.Filemgt.read_config("output", 'folder')
+        elif (not persistent and output_type in ('tptp', 'ladr') and
+              macleod.ProblemDelivery.get_mode() == macleod.ProblemDelivery.TMPFS):
+            folder_name = macleod.ProblemDelivery.get_tmpfs_folder(os.path.dirname(macleod.Filemgt.get_full_path(module_name)))
         else:
             folder_name = macleod.Filemgt.read_config(output_type, 'folder')
 
@@ -499,20 +531,102 @@ class Ontology(object):
         return output_filename
 
 
+    def share_axioms(self, axioms_ontology):
+        """
+        Use the translation of the import closure of another ontology instead of translating the own import closure,
+        which must be part of the other one; the files of this ontology then contain only its own axioms and conjectures
+        and include (TPTP) or are given to the reasoners together with (LADR) the files of the other ontology
+
+        :param Ontology axioms_ontology, an ontology whose import closure contains all imports of this ontology
+        """
+
+        self.shared_axioms = axioms_ontology
+        self.tptp_output = None
+        self.tptp_file = None
+        self.ladr_output = None
+        self.ladr_file = None
+
+    def get_shared_files(self, output_type):
+        """
+        The files of the shared axioms (see share_axioms) to give to a reasoner before the file of this ontology
+
+        :param str output_type, 'tptp' or 'ladr'
+        :return list of paths, empty if this ontology does not share the axioms of another one
+        """
+
+        if self.shared_axioms is None:
+            return []
+        if output_type == 'tptp':
+            return [self.shared_axioms.write_tptp_file()]
+        return [self.shared_axioms.write_ladr_file()]
+
+    def get_ladr_files(self):
+        """
+        All LADR files that make up the problem of this ontology, to be concatenated by Prover9 or Mace4
+
+        :return list of paths
+        """
+
+        return self.get_shared_files('ladr') + [self.write_ladr_file()]
+
+    def _get_written_axioms(self):
+        """ The axioms to write to the files of this ontology: without those in the files of the shared axioms """
+
+        if self.shared_axioms is None:
+            return self.get_all_axioms()
+        return [(x, self.name) for x in self.axioms]
+
+    def get_tptp_text(self, inline_shared=False):
+        """
+        The TPTP problem of this ontology as written to its file
+
+        :param bool inline_shared, contain the shared axioms (see share_axioms) themselves rather than include their file
+        :return str problem
+        """
+
+        lines = []
+        if self.shared_axioms is not None:
+            if inline_shared:
+                lines.extend(self.shared_axioms.to_tptp())
+            else:
+                lines.extend("include('" + shared_file + "')." for shared_file in self.get_shared_files('tptp'))
+        lines.extend(self.to_tptp())
+
+        return "".join(line + "\n" for line in lines)
+
+    def get_ladr_text(self, inline_shared=False):
+        """
+        The LADR problem of this ontology as written to its file, with the axioms and goals labelled by their names so that
+        the proofs of Prover9 name the axioms they use (see ProofCore)
+
+        :param bool inline_shared, start with the shared axioms (see share_axioms), which are otherwise given to the reasoners in their own file
+        :return str problem
+        """
+
+        text = ""
+        if inline_shared and self.shared_axioms is not None:
+            text += self.shared_axioms.get_ladr_text()
+
+        results = self.to_ladr(labels=True)
+        if len(results) > 0:
+            text += "formulas(sos).\n" + "".join(sentence + "\n" for sentence in results) + "end_of_list.\n"
+        if len(self.conjectures) > 0:
+            translations = self.get_registry().translations
+            text += "formulas(goals).\n"
+            text += "".join(translations.translate(conjecture, 'ladr_labelled') + "\n" for conjecture in self.conjectures)
+            text += "end_of_list.\n"
+
+        return text
+
     def write_tptp_file(self):
 
         if self.tptp_file is None:
             logging.getLogger(__name__).info("Converting " + self.name + " to TPTP format")
 
-            results = self.to_tptp()
-
             output_filename = self.get_output_filename('tptp')
 
             with open(output_filename, "w") as f:
-                for sentence in results:
-                    #print(sentence)
-                    f.write(sentence + "\n")
-                f.close()
+                f.write(self.get_tptp_text())
 
             # save results to prevent redo the TPTP conversion
             self.tptp_file = output_filename
@@ -524,18 +638,10 @@ class Ontology(object):
         if self.ladr_file is None:
             logging.getLogger(__name__).info("Converting " + self.name + " to LADR format")
 
-            results = self.to_ladr()
-
             output_filename = self.get_output_filename('ladr')
 
             with open(output_filename, "w") as f:
-                if len(results) > 0:
-                    f.write("formulas(sos).\n")
-                    for sentence in results:
-                        #print(sentence)
-                        f.write(sentence + "\n")
-                    f.write("end_of_list.\n")
-                f.close()
+                f.write(self.get_ladr_text())
 
             # save results to prevent redo the LADR conversion
             self.ladr_file = output_filename
@@ -578,21 +684,77 @@ class Ontology(object):
 
         return self.latex_file
 
-    def check_consistency (self, options_files = None):
-        """ test the input for consistency by trying to find a model or an inconsistency."""
+    def check_consistency (self, options_files = None, on_started = None, on_finished = None, on_killed = None, stores = None, timeout = None):
+        """ test the input for consistency by trying to find a model or an inconsistency.
+
+        :param function on_started, called with a Reasoner whenever its process has been started
+        :param function on_finished, called with a Reasoner whenever its process has terminated by itself
+        :param function on_killed, called with a Reasoner whenever its process has been killed
+        :param Stores stores, the result cache, portfolio, proof cores, models and proof hints to consult and update (default: none, run all reasoners on all axioms)
+        :param int timeout, time limit in seconds for every reasoner (default: the configured timeouts)
+        :return tuple (return_value, fastest_reasoner)
+        """
         # want to create a subfolder for the output files
 
+        if stores is None:
+            stores = macleod.Stores.Stores()
+
         reasoners = macleod.ReasonerSet.ReasonerSet()
-        reasoners.constructAllCommands(self)
-        logging.getLogger(__name__).info("USING " + str(len(reasoners)) + " REASONERS: " + str([r.name for r in reasoners]))
 
-        # run provers and modelfinders simultaneously and wait until one returns
-        reasoners = macleod.Process.raceProcesses(reasoners)
+        def finish(result):
+            # the problem files are only persisted if requested or if the check failed (see ProblemDelivery)
+            macleod.ProblemDelivery.finish(self, result[0], reasoners)
+            return result
 
-        # this captures our return code (consistent/inconsistent/unknown), not the reasoning processes return code
-        (return_value, fastest_reasoner) = self.consolidate_results(reasoners)
+        if timeout is not None:
+            for r in reasoners:
+                r.timeout = str(timeout)
+        reasoners.constructAllCommands(self)
+        logging.getLogger(__name__).info("USING " + str(len(reasoners)) + " REASONERS: " + str([r.name for r in reasoners]))
 
-        return (return_value, fastest_reasoner)
+        stored = stores.lookup(self, reasoners)
+        if stored is not None:
+            return finish(self.consolidate_results(stored))
+
+        stores.prepare(self, reasoners)
+
+        found = stores.get_core_ontology(self)
+        if found is not None:
+            (core_ontology, budget) = found
+            # only the stored results of the core are of use, its proof is recorded for the full ontology
+            result = core_ontology.check_consistency(on_started=on_started, on_finished=on_finished, on_killed=on_killed,
+                                                     stores=macleod.Stores.Stores(cache=stores.cache), timeout=budget)
+            if stores.core_decided(self, *result):
+                return finish(result)
+
+        def run(selected, record_unknown=True):
+            # run provers and modelfinders simultaneously and wait until one returns
+            macleod.Race.race(selected, on_started, on_finished, on_killed)
+
+            # this captures our return code (consistent/inconsistent/unknown), not the reasoning processes return code
+            (return_value, fastest_reasoner) = self.consolidate_results(selected)
+
+            # a likely winner that failed under its short budget is run again as part of the full portfolio
+            stores.record(self, selected, return_value, fastest_reasoner, record_unknown)
+
+            return (return_value, fastest_reasoner)
+
+        choice = stores.select(self, reasoners)
+        if choice is not None:
+            (likely_winners, budget) = choice
+            timeout = likely_winners[0].timeout
+            for r in likely_winners:
+                r.setTimeout(budget)
+            try:
+                (return_value, fastest_reasoner) = run(likely_winners, record_unknown=False)
+            finally:
+                for r in likely_winners:
+                    r.setTimeout(timeout)
+            if return_value != Ontology.UNKNOWN:
+                return finish((return_value, fastest_reasoner))
+            stores.escalate(self, likely_winners[0])
+
+        return finish(run(reasoners))
 
     # def prove_conjectures (self, resolve = True, options_files = None):
     #     """ try to prove each of the conjectures from the axioms with or without imported axioms."""
@@ -662,7 +824,8 @@ class Ontology(object):
         unprocessed = [x for x in self.imports.items()]
         while unprocessed:
             path, ontology = unprocessed.pop()
-            if path not in seen_paths and ontology is not None:
+            # a cyclic import may lead back to this very ontology
+            if path not in seen_paths and ontology is not None and ontology is not self:
                 logging.getLogger(__name__).debug("Adding imported axioms from " + path)
                 imported_axioms += [(a, path) for a in ontology.axioms]
                 seen_paths.append(path)
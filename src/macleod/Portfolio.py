@@ -0,0 +1,260 @@
+"""
+Adaptive selection of reasoners based on the outcome of past consistency checks.
+
+For every run of a reasoner, it is recorded whether the reasoner won (i.e., was the fastest one to
+decide the problem) and how long it took, both for the module family of the ontology (the folder it
+resides in) and for a few coarse features of the ontology (number of axioms, presence of functions,
+n-ary predicates or conjectures). If several strategies of a prover are raced, the same is recorded
+for each strategy. Statistics are kept in an sqlite database in the output folder.
+
+If one reasoner has won the overwhelming majority of past runs for an ontology's module family
+(or, lacking sufficient data about the family, for ontologies with the same features), it is run
+alone first with a budget derived from its past winning times (and only with its likely winning
+strategy, if one strategy has clearly won most past runs). Only if that run does not decide the
+problem, the full portfolio of active reasoners is run.
+"""
+
+import logging
+import os
+import sqlite3
+
+import macleod
+import macleod.Filemgt
+
+
+# file name of the database within the output folder
+STATS_FILE = 'reasoner_stats'
+
+# number of runs that need to be recorded for a module family or a feature before its statistics are used
+MIN_RUNS = 3
+
+# estimated probability of winning that the likely winner needs to be run alone first
+CONFIDENCE = 0.75
+
+# the budget of the likely winner is this multiple of its average winning time ...
+BUDGET_FACTOR = 3
+
+# ... but at least this many seconds
+MIN_BUDGET = 10
+
+# subfolders of a module family, which do not constitute families of their own
+SUBFOLDERS = ('definitions', 'theorems', 'interpretations', 'consistency', 'mappings', 'generated', 'output')
+
+
+class Portfolio(object):
+    """
+    Win statistics of the reasoners per module family and per feature
+    """
+
+    def __init__(self, filename=None):
+        """
+        :param str filename, path of the database (default: reasoner_stats.sqlite in the output folder)
+        """
+
+        if filename is None:
+            filename = macleod.Filemgt.get_full_path(STATS_FILE, folder=macleod.Filemgt.read_config('output', 'folder'),
+                                                     ending='.sqlite')
+        self.filename = filename
+
+        # number of checks in which a single reasoner was run first, and how many of those it did not decide
+        self.selections = 0
+        self.escalations = 0
+
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS stats ("
+                                 "kind TEXT, key TEXT, reasoner TEXT, runs INTEGER, wins INTEGER, win_time REAL, "
+                                 "PRIMARY KEY (kind, key, reasoner))")
+        self._connection.commit()
+
+    def record(self, ontology, reasoners, winner):
+        """
+        Record the outcome of a run of several reasoners on an ontology
+
+        :param Ontology ontology, the ontology that has been checked
+        :param list reasoners, the reasoners that have been run (reasoners whose result has been taken from the result cache are skipped)
+        :param Reasoner winner, the fastest reasoner that decided the problem or None
+        """
+
+        keys = get_keys(ontology)
+        reasoners = [r for r in reasoners if r.status != 'CACHED']
+
+        # several instances of the same reasoner (shards or strategies) count as one ...
+        names = []
+        for r in reasoners:
+            if r.name not in names:
+                names.append(r.name)
+        for name in names:
+            won = winner is not None and name == winner.name
+            self._add(keys, name, won, winner.time if won else 0.0)
+
+        # ... but which strategy won is recorded separately
+        for r in reasoners:
+            if r.strategy is not None:
+                won = winner is not None and r.getId() == winner.getId()
+                self._add([('strategy-' + kind, key) for (kind, key) in keys], r.getId(), won, r.time if won else 0.0)
+
+        self._connection.commit()
+
+    def _add(self, keys, reasoner, won, time_used):
+        """ Add a single run of a reasoner (or strategy) to the statistics of the given keys """
+
+        for (kind, key) in keys:
+            self._connection.execute("INSERT OR IGNORE INTO stats VALUES (?, ?, ?, 0, 0, 0.0)", (kind, key, reasoner))
+            self._connection.execute("UPDATE stats SET runs = runs + 1, wins = wins + ?, win_time = win_time + ? "
+                                     "WHERE kind = ? AND key = ? AND reasoner = ?",
+                                     (int(won), time_used, kind, key, reasoner))
+
+    def rank(self, ontology, reasoners, strategies=False):
+        """
+        Estimate for each reasoner its probability of winning on an ontology and its average winning time
+
+        :param Ontology ontology, the ontology to check
+        :param list reasoners, the candidate reasoners
+        :param bool strategies, compare the strategies of the reasoners (i.e., instances of the same reasoner) instead of the reasoners
+        :return list of tuples (probability, average winning time, reasoner), most likely winner first;
+                 empty if too few runs have been recorded for a meaningful estimate
+        """
+
+        keys = get_keys(ontology)
+        if strategies:
+            keys = [('strategy-' + kind, key) for (kind, key) in keys]
+            reasoner_key = lambda r: r.getId()
+        else:
+            reasoner_key = lambda r: r.name
+
+        estimates = self._estimate(keys[:1], reasoners, reasoner_key)
+        if not estimates:
+            estimates = self._estimate(keys[1:], reasoners, reasoner_key)
+
+        return sorted(estimates, key=lambda e: (-e[0], e[1]))
+
+    def select(self, ontology, reasoners):
+        """
+        Choose the reasoner to run alone first, if any
+
+        :param Ontology ontology, the ontology to check
+        :param list reasoners, the active reasoners
+        :return tuple (list of reasoners, budget in seconds) or None if the full portfolio is to be run right away;
+                 the list contains all instances (e.g., shards) of the likely winner, or only its likely winning strategy
+        """
+
+        ranking = self.rank(ontology, reasoners)
+        if not ranking or ranking[0][0] < CONFIDENCE:
+            return None
+
+        (probability, win_time, reasoner) = ranking[0]
+        instances = [r for r in reasoners if r.name == reasoner.name]
+
+        if len(instances) > 1 and all(r.strategy is not None for r in instances):
+            strategy_ranking = self.rank(ontology, instances, strategies=True)
+            if strategy_ranking and strategy_ranking[0][0] >= CONFIDENCE:
+                (probability, win_time, reasoner) = strategy_ranking[0]
+                instances = [reasoner]
+
+        if len(instances) == len(reasoners):
+            return None
+
+        budget = min(int(reasoner.timeout), max(MIN_BUDGET, int(BUDGET_FACTOR * win_time) + 1))
+        self.selections += 1
+        logging.getLogger(__name__).info("LIKELY WINNER on " + ontology.name + ": " + reasoner.getId() +
+                                         " (won {:.0%} of past runs), running it alone for {} seconds".format(probability, budget))
+
+        return (instances, budget)
+
+    def _estimate(self, keys, reasoners, reasoner_key):
+        """ Pool the statistics for the given keys into an estimate per reasoner """
+
+        estimates = []
+        for r in reasoners:
+            (runs, wins, win_time) = (0, 0, 0.0)
+            for (kind, key) in keys:
+                row = self._connection.execute("SELECT runs, wins, win_time FROM stats "
+                                               "WHERE kind = ? AND key = ? AND reasoner = ?", (kind, key, reasoner_key(r))).fetchone()
+                if row is not None and row[0] >= MIN_RUNS:
+                    runs += row[0]
+                    wins += row[1]
+                    win_time += row[2]
+            if runs == 0:
+                # a reasoner without history may well be the best one
+                return []
+            # with a weak prior towards 50% so that few lucky runs do not decide
+            estimates.append(((wins + 1) / (runs + 2), win_time / wins if wins else float('inf'), r))
+
+        return estimates
+
+    def report(self):
+        """
+        :return str summary of the selections made during this run
+        """
+
+        return "Ran the likely winner alone first for {} ontologies, {} of which needed the full portfolio".format(
+            self.selections, self.escalations)
+
+    def close(self):
+        self._connection.close()
+
+
+def get_family(ontology):
+    """
+    The module family of an ontology: the folder it resides in (ignoring subfolders such as theorems)
+
+    :param Ontology ontology
+    :return str family
+    """
+
+    folder = os.path.dirname(ontology.name)
+    while os.path.basename(folder) in SUBFOLDERS:
+        folder = os.path.dirname(folder)
+
+    return os.path.basename(folder)
+
+
+def get_keys(ontology):
+    """
+    The keys under which the statistics of runs on an ontology are kept: its module family first, then its features
+
+    :param Ontology ontology, an analyzed ontology
+    :return list of tuples (kind, key)
+    """
+
+    return [('module', get_family(ontology))] + [('feature', f) for f in get_features(ontology)]
+
+
+def get_features(ontology):
+    """
+    Coarse features of an ontology that influence which reasoner is likely to succeed
+
+    :param Ontology ontology, an analyzed ontology
+    :return list of str features
+    """
+
+    # order of magnitude of the number of axioms: 10 (fewer than 10), 100 (fewer than 100), ...
+    features = ['axioms:' + str(10 ** len(str(len(ontology.get_all_axioms()))))]
+    if ontology.conjectures:
+        features.append('conjectures')
+    if ontology.nontrivial:
+        features.append('nontrivial')
+    if ontology.functs:
+        features.append('functions')
+    if ontology.nary_predicates:
+        features.append('nary')
+
+    return features
+
+
+__portfolio = None
+
+
+def get_portfolio():
+    """
+    Return the process-wide portfolio, opening its statistics on first use
+
+    :return Portfolio portfolio
+    """
+
+    global __portfolio
+
+    if __portfolio is None:
+        __portfolio = Portfolio()
+
+    return __portfolio
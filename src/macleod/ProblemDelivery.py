@@ -0,0 +1,224 @@
+"""
+Delivery of problems (the TPTP or LADR translations of an ontology) to the reasoners, chosen by the option
+problem_delivery in the [system] section of the configuration file:
+
+    files   (default) the problems are written to the conversions folder, from which the reasoners read them
+    stdin   the problems are streamed from memory to the standard input of the reasoners whose plugin supports it
+            (ReasonerPlugin.stdin; their command names STDIN_PATH as the input file, so that options files can
+            still be given after it); the other reasoners get files in the conversions folder
+    tmpfs   the problems are written to a folder in memory (below TMPFS_ROOT if it exists, in the temporary folder
+            otherwise) instead of the conversions folder; the folder is removed when macleod exits
+
+With stdin and tmpfs, a problem is persisted in the conversions folder only if the option keep_problems
+in the [system] section is set or if its check ends with an error, so that the failed run can be reproduced.
+"""
+
+import atexit
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+
+import macleod
+import macleod.Filemgt
+
+
+FILES = 'files'
+STDIN = 'stdin'
+TMPFS = 'tmpfs'
+
+MODES = (FILES, STDIN, TMPFS)
+
+# name under which a reasoner reading its standard input is given the problem as an input file
+STDIN_PATH = '/dev/stdin'
+
+# file system in memory under which the problems are written with tmpfs
+TMPFS_ROOT = '/dev/shm'
+
+
+__mode = None
+__folder = None
+
+
+def get_mode():
+    """
+    Return how problems are delivered to the reasoners, reading the configuration on first use
+
+    :return str one of FILES, STDIN or TMPFS
+    """
+
+    global __mode
+
+    if __mode is None:
+        mode = macleod.Filemgt.read_config('system', 'problem_delivery')
+        if mode is None:
+            mode = FILES
+        set_mode(mode)
+
+    return __mode
+
+
+def set_mode(mode):
+    """
+    Change how problems are delivered to the reasoners (e.g. from a command line option)
+
+    :param str mode, one of FILES, STDIN or TMPFS (unknown modes fall back to FILES), or None to read the configuration again
+    """
+
+    global __mode
+
+    if mode is None:
+        __mode = None
+        return
+
+    mode = mode.strip().lower()
+    if mode not in MODES:
+        logging.getLogger(__name__).warning("Unknown problem delivery " + mode + ", writing problems to files")
+        mode = FILES
+    if mode == STDIN and not os.path.exists(STDIN_PATH):
+        logging.getLogger(__name__).warning("No " + STDIN_PATH + " on this system, writing problems to files")
+        mode = FILES
+    __mode = mode
+
+
+def keep_problems():
+    """
+    :return bool True if all problems are to be persisted in the conversions folder (option keep_problems in the [system] section)
+    """
+
+    keep = macleod.Filemgt.read_config('system', 'keep_problems')
+    return keep is not None and keep.strip().lower() in ('yes', 'true', 'on', '1')
+
+
+def use_stdin(section):
+    """
+    Determine whether a reasoner gets its problem through its standard input
+
+    :param str section, name of the reasoner (i.e., of its section in the configuration file)
+    :return bool
+    """
+
+    import macleod.ReasonerRegistry
+
+    plugin = macleod.ReasonerRegistry.get_plugin(section)
+    return plugin is not None and plugin.stdin and get_mode() == STDIN
+
+
+def get_input_files(section, ontology):
+    """
+    The input files for the command of a reasoner: STDIN_PATH if the reasoner gets its problem through its standard input,
+    otherwise the written problem files
+
+    :param str section, name of the reasoner
+    :param Ontology ontology
+    :return list of paths
+    """
+
+    import macleod.ReasonerRegistry
+
+    if use_stdin(section):
+        return [STDIN_PATH]
+
+    return macleod.ReasonerRegistry.get_plugin(section).write_input(ontology)
+
+
+def get_input_text(reasoner, ontology):
+    """
+    The problem to stream to the standard input of a reasoner whose command has been constructed
+
+    :param Reasoner reasoner
+    :param Ontology ontology
+    :return str problem, or None if the reasoner reads its input files
+    """
+
+    import macleod.ReasonerRegistry
+
+    if STDIN_PATH not in reasoner.getCommand():
+        return None
+
+    return get_problem_text(ontology, macleod.ReasonerRegistry.get_plugin(reasoner.name).input_format)
+
+
+def get_problem_text(ontology, input_format):
+    """
+    The complete problem of an ontology, including any shared axioms (see Ontology.share_axioms)
+
+    :param Ontology ontology
+    :param str input_format, 'ladr' or 'tptp'
+    :return str problem
+    """
+
+    if input_format == 'ladr':
+        return ontology.get_ladr_text(inline_shared=True)
+
+    return ontology.get_tptp_text(inline_shared=True)
+
+
+def get_tmpfs_root():
+    """
+    The folder in memory to which the problems are written with tmpfs, created on first use
+
+    :return str absolute path
+    """
+
+    global __folder
+
+    if __folder is None:
+        __folder = tempfile.mkdtemp(prefix='macleod-', dir=TMPFS_ROOT if os.path.isdir(TMPFS_ROOT) else None)
+        atexit.register(shutil.rmtree, __folder, True)
+        logging.getLogger(__name__).info("Writing problems to " + __folder)
+
+    return __folder
+
+
+def get_tmpfs_folder(directory):
+    """
+    The folder in memory for the problems of the ontologies in a directory, so that modules of the same name
+    in different directories do not overwrite each other
+
+    :param str directory, the folder of an ontology
+    :return str absolute path
+    """
+
+    return os.path.join(get_tmpfs_root(), hashlib.sha1(os.path.abspath(directory).encode('utf-8')).hexdigest()[:12])
+
+
+def finish(ontology, return_value, reasoners=()):
+    """
+    Persist the problem of an ontology whose check has ended, if requested or if the check ended with an error,
+    and remove its problem files from the folder in memory
+
+    :param Ontology ontology
+    :param int return_value, the consolidated result of the check
+    :param list reasoners, the reasoners that have been run, whose input formats are persisted (default: both formats)
+    :return list of paths of the persisted problems
+    """
+
+    mode = get_mode()
+    if mode == FILES:
+        return []
+
+    import macleod.ReasonerRegistry
+
+    persisted = []
+    if keep_problems() or return_value in (macleod.Ontology.ERROR, macleod.Ontology.CONTRADICTION):
+        formats = set(getattr(macleod.ReasonerRegistry.get_plugin(r.name), 'input_format', None) for r in reasoners)
+        formats = sorted(f for f in formats if f is not None) or ['ladr', 'tptp']
+        for input_format in formats:
+            filename = ontology.get_output_filename(input_format, persistent=True)
+            with open(filename, 'w') as f:
+                f.write(get_problem_text(ontology, input_format))
+            persisted.append(filename)
+        if return_value in (macleod.Ontology.ERROR, macleod.Ontology.CONTRADICTION):
+            logging.getLogger(__name__).warning("Check of " + ontology.name + " failed, problem written to " + ", ".join(persisted))
+
+    if mode == TMPFS:
+        for filename in (ontology.tptp_file, ontology.ladr_file):
+            if filename is not None and filename.startswith(get_tmpfs_root()) and os.path.isfile(filename):
+                os.remove(filename)
+        # written again if the ontology is checked once more
+        ontology.tptp_file = None
+        ontology.ladr_file = None
+
+    return persisted
@@ -1,13 +1,14 @@
 import multiprocessing
 from multiprocessing import Queue
 import os, sys, logging
-import time, re, signal, subprocess
+import time, re, signal, subprocess, threading
 
 import macleod
 
 class ReasonerProcess(multiprocessing.Process):
 
-    def __init__(self, args, output_filename, timeout, result_queue, id):
+    def __init__(self, args, output_filename, timeout, result_queue, id, input_text=None):
+        """input_text -- problem to stream to the standard input of the reasoner (see ProblemDelivery), None if it reads its input files"""
         multiprocessing.Process.__init__(self)
         self.id = id
         self.args = args
@@ -15,6 +16,7 @@ class ReasonerProcess(multiprocessing.Process):
         self.exit = multiprocessing.Event()
         self.done = multiprocessing.Event()
         self.output_filename = output_filename
+        self.input_text = input_text
         self.timeout = timeout
         self.cputime = 0
         self.current_cputime = 0
@@ -45,8 +47,7 @@ class ReasonerProcess(multiprocessing.Process):
         time.sleep(0.2)
         multiprocessing.Process.terminate (self)
 
-    def update_cputime (self, pid):
-        new_cputime = get_cputime(pid)
+    def update_cputime (self, new_cputime):
         if new_cputime==0:
             return False
         #print "CPU time of " + self.args[0] + " = " + str(new_cputime)
@@ -59,17 +60,11 @@ class ReasonerProcess(multiprocessing.Process):
         self.cputime = self.previous_cputime + self.current_cputime
         #print "total CPU time of " + self.args[0] + " = " + str(self.cputime)
 
-    def enforce_limits (self, pid):
-        limit = int(macleod.Filemgt.read_config('system', 'memory_limit')) # read custom memory limit from configuration file
-        if limit is None:
-            logging.getLogger(__name__).debug("USING DEFAULT MEMORY LIMIT OF 2GB FOR EACH REASONER")
-            limit = 2048 # default memory limit for each reasoner is 2GB
-
-        memory = get_memory(pid)
+    def enforce_limits (self, memory, limit):
         #enforce memory limit
         if memory>limit:
             logging.getLogger(__name__).info("MEMORY EXCEEDED: " + self.name + ", command = " + self.args[0])
-            self.status = 'ALLOTED MEMORY EXCEEDED: ' + str(limit) + 'GB'
+            self.status = 'ALLOTED MEMORY EXCEEDED: ' + str(limit) + 'MB'
             self.shutdown()
         # enforce time limit
         if self.cputime>self.timeout:
@@ -81,13 +76,17 @@ class ReasonerProcess(multiprocessing.Process):
     def run (self):
         logging.getLogger(__name__).info("STARTING: " + self.name + ", command = " + self.args[0])
         out_file = open (self.output_filename, 'w')
-        sp = startSubprocessWithOutput(self.args, out_file, [])
+        memory_limit = get_memory_limit()
+        # the operating system enforces the limits of each single process, the loop below those of the whole process group
+        sp = startSubprocessWithOutput(self.args, out_file, [], cpu_limit=self.timeout, memory_limit=memory_limit,
+                                       input_text=self.input_text)
         self.previous_cputime = 0
         self.current_cputime = 0
         while sp.poll() is None and not self.exit.is_set():
             time.sleep(1)
-            self.update_cputime(sp.pid)
-            self.enforce_limits(sp.pid)		
+            (cputime, memory) = get_usage(sp.pid)
+            self.update_cputime(cputime)
+            self.enforce_limits(memory, memory_limit)
         if self.exit.is_set():
             # interrupted
             logging.getLogger(__name__).debug("ABORTING: "  + self.name + ", command = " + self.args[0])
@@ -98,14 +97,12 @@ class ReasonerProcess(multiprocessing.Process):
                 logging.getLogger(__name__).debug("STDOUT from "  + self.name + ": " + str(stdoutdata))
             self.result_queue.put((self.args[0], -1, stdoutdata))
             logging.getLogger(__name__).info("ABORTED: "  + self.name + ", command = " + self.args[0])
-            self.update_cputime(sp.pid)
             out_file.flush()
             out_file.close()
             #self.writeHeader()
             self.done.set()
             return True
         # finished normally, i.e., sp.poll() determined the subprocess has terminated by itself
-        self.update_cputime(sp.pid)
         self.result_queue.put((self.args[0], sp.returncode, None))
         logging.getLogger(__name__).info("REASONER COMPLETED: "  + self.name + ", exit code " + str(sp.returncode) + ", command = " + self.args[0])
         out_file.flush()
@@ -115,30 +112,101 @@ class ReasonerProcess(multiprocessing.Process):
         return True
 
     def writeHeader (self):
-        import datetime
         """ Create a standardized footer for all output files that contains name of the program,
         the specific command, and a timestamp."""
-        # list of input files
         time.sleep(0.2)
-        cmd = self.args[0]
-        for i in range(1,len(self.args)):
-            cmd += " " + self.args[i]
-
-        #logging.getLogger(__name__).debug("WRITING STATISTICS to " + reasoner.getOutfile())
-        in_file =  open(self.output_filename, 'a')
-        in_file.write('\n')
-
-        in_file.write('========================== MACLEOD SUMMARY ===========================\n')
-        #file.write(vampire.get_version()+'\n')
-        now = datetime.datetime.now()
-        in_file.write('reasoner: ' + self.args[0] + '\n')
-        in_file.write('status: ' + str(self.getStatus()) + '\n')
-        in_file.write('execution finished: ' + now.strftime("%a %b %d %H:%M:%S %Y") +'\n')
-        in_file.write('total CPU time used: ' + str(self.cputime) + '\n')
-        in_file.write('The command was \"' + cmd + '\"\n')
-        in_file.write('============================ end of footer ===========================\n')
-        in_file.flush()
-        in_file.close()
+        write_summary(self.output_filename, self.args, self.getStatus(), self.cputime)
+
+
+def write_summary(output_filename, args, status, time_used, time_label='total CPU time used'):
+    """ Append a standardized footer to the output file of a reasoner that contains the name of the program,
+    the status of the reasoner, the specific command, and a timestamp."""
+    import datetime
+
+    cmd = args[0]
+    for i in range(1,len(args)):
+        cmd += " " + args[i]
+
+    #logging.getLogger(__name__).debug("WRITING STATISTICS to " + reasoner.getOutfile())
+    in_file =  open(output_filename, 'a')
+    in_file.write('\n')
+
+    in_file.write('========================== MACLEOD SUMMARY ===========================\n')
+    #file.write(vampire.get_version()+'\n')
+    now = datetime.datetime.now()
+    in_file.write('reasoner: ' + args[0] + '\n')
+    in_file.write('status: ' + str(status) + '\n')
+    in_file.write('execution finished: ' + now.strftime("%a %b %d %H:%M:%S %Y") +'\n')
+    in_file.write(time_label + ': ' + str(time_used) + '\n')
+    in_file.write('The command was \"' + cmd + '\"\n')
+    in_file.write('============================ end of footer ===========================\n')
+    in_file.flush()
+    in_file.close()
+
+
+def get_success_status(reasoner):
+    """ Status of a reasoner that terminated successfully, as written to its output file """
+
+    if reasoner.output == macleod.Ontology.INCONSISTENT:
+        return 'PROOF' if reasoner.isProver() else 'INCONSISTENT'
+    else:
+        return 'COUNTEREXAMPLE' if reasoner.isProver() else 'MODEL'
+
+
+def get_memory_limit():
+    """Returns the memory limit in MB for each reasoner as set in the configuration file (default: 2GB)."""
+
+    limit = macleod.Filemgt.read_config('system', 'memory_limit') # read custom memory limit from configuration file
+    if limit is None:
+        logging.getLogger(__name__).debug("USING DEFAULT MEMORY LIMIT OF 2GB FOR EACH REASONER")
+        return 2048 # default memory limit for each reasoner is 2GB
+
+    return int(limit)
+
+
+def get_usage(pid):
+    """Returns the CPU time in seconds and the memory in MB used by a process group, i.e., by a process started
+    through startSubprocessWithOutput and all its child processes."""
+
+    if get_platform() == 'linux':
+        return read_process_group(pid)
+
+    return (get_cputime(pid), get_memory(pid))
+
+
+# clock ticks per second, the unit of the CPU times in /proc/<pid>/stat
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def read_process_group(pgid):
+    """Returns the CPU time in seconds (including that of terminated children) and the resident memory in MB
+    used by all processes of a process group. Reads /proc directly instead of spawning ps (Linux only)."""
+
+    cputime = 0
+    memory = 0
+
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/' + entry + '/stat', 'rb') as f:
+                stat = f.read()
+            # the process name (field 2) may contain spaces and parentheses
+            fields = stat[stat.rindex(b')') + 2:].split()
+            if int(fields[2]) != pgid:
+                continue
+            # utime, stime, cutime and cstime in clock ticks
+            cputime += sum(int(field) for field in fields[11:15])
+            with open('/proc/' + entry + '/status', 'rb') as f:
+                for line in f:
+                    if line.startswith(b'VmRSS:'):
+                        memory += int(line.split()[1])
+                        break
+        except (OSError, ValueError, IndexError):
+            # the process terminated in the meantime
+            continue
+
+    return (round(cputime / CLOCK_TICKS, 1), memory // 1024) # convert from kB to MB
 
 
 def get_cputime(pid):
@@ -156,6 +224,8 @@ def get_cputime(pid):
         else:
             return round((float(result[0].UserModeTime)) / 10000000, 1) # convert to seconds
 
+    def cputime_linux(pid):
+        return read_process_group(pid)[0]
 
     def cputime_nix(pid):
         try:
@@ -167,26 +237,34 @@ def get_cputime(pid):
             #print "CPU TIMES: " + str(stdout_list)
             seconds = 0
             for entry in stdout_list:
-                time_chunks = entry.split(':')
-                print(time_chunks)
-                minute = time_chunks[0]
-                second = time_chunks[1][0:1]
-                print("Used time is %{0}m: %{1}".format(minute, second))
-                seconds +=  int(minute)*60 + int(second) 
+                seconds += parse_ps_time(entry)
             return seconds
-        except OSError as e:
-            print(e)
+        except (OSError, ValueError, IndexError) as e:
+            logging.getLogger(__name__).debug("Could not determine CPU time of " + str(pid) + ": " + str(e))
             return 0
 
 
     cputime_default = cputime_nix
 
     handlers = {
-            "nt": cputime_win, 
-            "linux": cputime_nix
+            "nt": cputime_win,
+            "linux": cputime_linux
     }
 
-    return handlers.get(os.name, cputime_default)(pid)
+    return handlers.get(get_platform(), cputime_default)(pid)
+
+
+def parse_ps_time(entry):
+    """Converts a time as printed by ps ([[dd-]hh:]mm:ss[.ss]) into seconds."""
+
+    entry = entry.strip()
+    days = 0
+    if '-' in entry:
+        (days, entry) = entry.split('-', 1)
+    seconds = 0
+    for chunk in entry.split(':'):
+        seconds = seconds*60 + float(chunk)
+    return int(days)*86400 + seconds
 
 
 
@@ -203,6 +281,9 @@ def get_memory(pid):
         else:
             return int(result[0].WorkingSet) // (1024*1024) # convert from Bytes to MB
 
+    def memory_linux(pid):
+        return read_process_group(pid)[1]
+
     def memory_nix(pid):
         ps_process = subprocess.Popen("ps -g " + str(pid) + " -o rss", shell=True, stdout=subprocess.PIPE)
         stdout_list = ps_process.communicate()[0].decode('utf-8').split('\n')
@@ -211,24 +292,56 @@ def get_memory(pid):
             stdout_list.remove('')
         stdout_list.pop(0)
         for entry in stdout_list:
-            memory += int(entry)	
+            memory += int(entry)
         return memory // 1024 # convert to MB
 
     memory_default = memory_nix
 
     handlers = {
-            "nt": memory_win, 
-            "linux": memory_nix
+            "nt": memory_win,
+            "linux": memory_linux
     }
 
-    return handlers.get(os.name, memory_default)(pid)
+    return handlers.get(get_platform(), memory_default)(pid)
+
 
+def get_platform():
+    """Returns 'nt' on Windows, 'linux' on Linux and the name of the operating system (os.name) otherwise."""
 
+    if sys.platform.startswith('linux'):
+        return 'linux'
+    return os.name
 
-def startSubprocessWithOutput(args, output_file, input_files=[]):
+
+def limit_resources(cpu_limit=None, memory_limit=None):
+    """Returns a function to be run in a child process right before it executes the reasoner: it starts a new
+    session (so that the reasoner and its children form a process group) and sets the CPU time limit (in seconds)
+    and the address space limit (in MB) of the process, which are inherited by its children."""
+
+    def preexec():
+        os.setsid()
+        import resource
+        if cpu_limit is not None:
+            # SIGXCPU at the soft limit, SIGKILL one second later
+            resource.setrlimit(resource.RLIMIT_CPU, (int(cpu_limit), int(cpu_limit) + 1))
+        if memory_limit is not None:
+            limit = int(memory_limit) * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    return preexec
+
+
+def startSubprocessWithOutput(args, output_file, input_files=[], cpu_limit=None, memory_limit=None, input_text=None):
     """Start a new subprocess, but does not wait for the subprocess to complete. 
-    This method uses the os.setsid in Linux, which is not available in Windows"""
-    if os.name == 'nt':
+    This method uses the os.setsid in Linux, which is not available in Windows.
+    On other systems than Windows, the CPU time (in seconds) and the memory (in MB) of the subprocess can be limited.
+    A given input_text is streamed to the standard input of the subprocess (by a separate thread, so that a subprocess
+    that writes a lot of output before it has read all its input does not block)."""
+    if input_text is not None:
+        p = subprocess.Popen(args, preexec_fn=None if os.name == 'nt' else limit_resources(cpu_limit, memory_limit),
+                             close_fds=True, stdout=output_file, stderr=subprocess.STDOUT, stdin=subprocess.PIPE)
+        threading.Thread(target=feed_input, args=(p.stdin, input_text.encode('utf-8')), daemon=True).start()
+    elif os.name == 'nt':
         # Windows
         if len(input_files)==1:
             in_file = open(input_files[0],'r')
@@ -240,14 +353,28 @@ def startSubprocessWithOutput(args, output_file, input_files=[]):
         # Linux (and others)
         if len(input_files)==1:
             in_file = open(input_files[0],'r')
-            p = subprocess.Popen(args, preexec_fn=os.setsid, close_fds=True, stdout=output_file, stderr=subprocess.STDOUT, stdin=in_file)
+            p = subprocess.Popen(args, preexec_fn=limit_resources(cpu_limit, memory_limit), close_fds=True, stdout=output_file, stderr=subprocess.STDOUT, stdin=in_file)
             in_file.close()
         else:
-            p = subprocess.Popen(args, preexec_fn=os.setsid, close_fds=True, stdout=output_file, stderr=subprocess.STDOUT)
+            p = subprocess.Popen(args, preexec_fn=limit_resources(cpu_limit, memory_limit), close_fds=True, stdout=output_file, stderr=subprocess.STDOUT)
     #print p.__class__
     return p
 
 
+def feed_input(stdin, data):
+    """Write the input of a subprocess to its standard input and close it; a subprocess that terminates
+    (or is killed) before it has read all its input does not matter."""
+    try:
+        stdin.write(data)
+    except (BrokenPipeError, OSError):
+        pass
+    finally:
+        try:
+            stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+
 def startSubprocess(command):
     """Start a new subprocess, but does not wait for the subprocess to complete. 
     This method uses the os.setsid in Linux, which is not available in Windows"""
@@ -350,7 +477,7 @@ def raceProcesses (reasoners):
         reasonerProcesses = []
         for r in reasoners:
             # TODO Figure out why r.timeout is a str in python3
-            p = ReasonerProcess(r.getCommand(), r.getOutputFile(), int(r.timeout), results, r.getId())
+            p = ReasonerProcess(r.getCommand(), r.getOutputFile(), int(r.timeout), results, r.getId(), r.getInput())
             logging.getLogger(__name__).debug('Created ' + str(p))
             reasonerProcesses.append(p)
             p.start()
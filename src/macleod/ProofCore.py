@@ -0,0 +1,218 @@
+"""
+Axiom cores extracted from proofs, kept in an sqlite database in the output folder.
+
+When Prover9 or Vampire proves a lemma or finds an inconsistency, its proof names the input
+formulas it used (the labels and names of the LADR and TPTP translations, see Axiom.get_name).
+These names are mapped back to the axioms of the ontology and its imported modules, and the
+core is stored under the problem: the conjectures and imports of a lemma, or the ontology itself
+for a consistency check. The axioms of a core are identified by their translation (ignoring the
+generated names), so that a core survives edits of unrelated axioms and changes of the order in
+which modules are parsed.
+
+When the same problem is checked again, only the axioms of the stored core that still exist are
+given to the reasoners first, with a budget derived from the time the proof took. A proof from
+the core is a proof from the full set of axioms; if the core does not suffice (e.g. because one
+of its axioms has been changed), the full import closure is checked as usual.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+import macleod
+import macleod.Filemgt
+import macleod.Portfolio
+import macleod.ReasonerRegistry
+import macleod.ResultCache
+
+
+# file name of the database within the output folder
+CORE_FILE = 'proof_cores'
+
+
+class ProofCore(object):
+    """
+    Axioms used in the proofs of problems
+    """
+
+    def __init__(self, filename=None):
+        """
+        :param str filename, path of the database (default: proof_cores.sqlite in the output folder)
+        """
+
+        if filename is None:
+            filename = macleod.Filemgt.get_full_path(CORE_FILE, folder=macleod.Filemgt.read_config('output', 'folder'),
+                                                     ending='.sqlite')
+        self.filename = filename
+
+        # number of problems decided from their core alone, and number of those whose core did not suffice
+        self.hits = 0
+        self.fallbacks = 0
+
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS cores ("
+                                 "key TEXT PRIMARY KEY, axioms TEXT, size INTEGER, total INTEGER, "
+                                 "proof_time REAL, created REAL)")
+        self._connection.commit()
+
+    def make_key(self, ontology):
+        """
+        Compute the key of the problem of an ontology (see get_problem_key)
+
+        :param Ontology ontology
+        :return str key
+        """
+
+        return get_problem_key(ontology)
+
+    def record(self, ontology, reasoner):
+        """
+        Store the axioms used in the proof a reasoner has found for an ontology
+
+        :param Ontology ontology, the ontology whose axioms the proof uses (the reasoner may have been run on its core)
+        :param Reasoner reasoner, a reasoner that has found a proof (or inconsistency)
+        :return list core, tuples (axiom, module name) of the axioms used, or None if the proof cannot be read
+        """
+
+        plugin = macleod.ReasonerRegistry.get_plugin(reasoner.name)
+        if plugin is None or plugin.used_axioms is None:
+            return None
+
+        names = plugin.used_axioms(reasoner.getOutputFile())
+        if names is None:
+            logging.getLogger(__name__).debug("NO PROOF FOUND IN " + reasoner.getOutputFile())
+            return None
+
+        all_axioms = ontology.get_all_axioms()
+        core = [(axiom, path) for (axiom, path) in all_axioms if axiom.get_name() in names]
+
+        stored = [(path, get_digest(ontology, axiom)) for (axiom, path) in core]
+        self._connection.execute("INSERT OR REPLACE INTO cores VALUES (?, ?, ?, ?, ?, ?)",
+                                 (self.make_key(ontology), json.dumps(stored), len(core), len(all_axioms),
+                                  reasoner.time, time.time()))
+        self._connection.commit()
+        logging.getLogger(__name__).info("PROOF OF " + ontology.name + " BY " + reasoner.name + " USES " +
+                                         str(len(core)) + " OF " + str(len(all_axioms)) + " AXIOMS")
+
+        return core
+
+    def lookup(self, ontology):
+        """
+        Find the stored core of the problem of an ontology
+
+        :param Ontology ontology
+        :return tuple ([list of tuples (axiom, module name) of the axioms of the core that still exist], [seconds the proof took]),
+                or None if no core is stored or it comprises all axioms anyway
+        """
+
+        row = self._connection.execute("SELECT axioms, proof_time FROM cores WHERE key = ?",
+                                       (self.make_key(ontology),)).fetchone()
+        if row is None:
+            return None
+
+        digests = set(digest for (_, digest) in json.loads(row[0]))
+        all_axioms = ontology.get_all_axioms()
+        core = [(axiom, path) for (axiom, path) in all_axioms if get_digest(ontology, axiom) in digests]
+
+        if len(core) == len(all_axioms) or (digests and not core):
+            return None
+
+        return (core, row[1])
+
+    def get_core_ontology(self, ontology):
+        """
+        Construct an ontology that consists of the stored core of an ontology only
+
+        :param Ontology ontology
+        :return tuple ([Ontology core ontology], [budget in seconds for the reasoners]), or None if no core is stored
+        """
+
+        found = self.lookup(ontology)
+        if found is None:
+            return None
+
+        (core, proof_time) = found
+        (root, ending) = os.path.splitext(ontology.name)
+        core_ontology = macleod.Ontology(root + '_core' + ending, basepath=ontology.basepath,
+                                         preserve_conditionals=ontology.preserve_conditionals, registry=ontology.registry)
+        core_ontology.axioms = [axiom for (axiom, _) in core]
+        core_ontology.conjectures = ontology.conjectures
+        core_ontology.nontrivial = ontology.nontrivial
+
+        budget = max(macleod.Portfolio.MIN_BUDGET, int(macleod.Portfolio.BUDGET_FACTOR * (proof_time or 0)))
+        logging.getLogger(__name__).info("TRYING " + str(len(core)) + " AXIOMS OF THE CORE OF " + ontology.name + " FIRST")
+
+        return (core_ontology, budget)
+
+    def report(self):
+        """
+        :return str summary of the use of cores during this run
+        """
+
+        return "Tried stored proof cores first for {} problems, {} of which needed all axioms".format(
+            self.hits + self.fallbacks, self.fallbacks)
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM cores").fetchone()[0]
+
+
+def get_problem_key(ontology):
+    """
+    Compute the key of the problem of an ontology: its conjectures and imports if it has conjectures
+    (lemmas are proved from the imported axioms), its name otherwise
+
+    :param Ontology ontology
+    :return str key
+    """
+
+    sha = hashlib.sha256()
+    if ontology.conjectures:
+        for conjecture in ontology.conjectures:
+            sha.update(get_digest(ontology, conjecture).encode('utf-8'))
+            sha.update(b'\0')
+        for path in sorted(ontology.imports):
+            sha.update(path.encode('utf-8'))
+            sha.update(b'\0')
+    else:
+        sha.update(ontology.name.encode('utf-8'))
+    if ontology.nontrivial:
+        sha.update(b'nontrivial')
+
+    return sha.hexdigest()
+
+
+def get_digest(ontology, axiom):
+    """
+    Hash of the LADR translation of an axiom, ignoring its generated name
+
+    :param Ontology ontology, the ontology whose translations are reused
+    :param Axiom axiom
+    :return str hexdigest
+    """
+
+    translation = ontology.get_registry().translations.translate(axiom, 'ladr')
+    return hashlib.sha256(macleod.ResultCache.AXIOM_NAME.sub('axiom', translation).encode('utf-8')).hexdigest()
+
+
+__cores = None
+
+
+def get_cores():
+    """
+    Return the process-wide store of proof cores, opening it on first use
+
+    :return ProofCore cores
+    """
+
+    global __cores
+
+    if __cores is None:
+        __cores = ProofCore()
+
+    return __cores
@@ -0,0 +1,213 @@
+"""
+Hints from past Prover9 proofs, kept in an sqlite database in the output folder.
+
+When Prover9 proves a lemma or finds an inconsistency, the clauses it derived in its proof are
+stored under the problem (see ProofCore.get_problem_key). The next time Prover9 is run on the same
+problem, e.g. after some axioms have been edited, these clauses are given to it as a list of hints
+(formulas(hints)): Prover9 then prefers to select clauses that subsume one of the hints, which
+usually leads it along the old proof much faster than the full search. Hints never restrict the
+search, so a proof that needs different clauses is still found.
+
+The time of the last proof found without hints is kept as well, so that the speedup of each proof
+found with hints over the unhinted historical time is reported.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+
+import macleod
+import macleod.Filemgt
+import macleod.ProofCore
+
+
+# file name of the database within the output folder
+HINTS_FILE = 'proof_hints'
+
+# a clause of a Prover9 proof: number, clause (with attributes such as labels) and justification
+LADR_PROOF_CLAUSE = re.compile(r'^\d+ (.*)\.\s+\[(\w*).*\]\.$')
+
+# justifications of the clauses of a proof that are input formulas rather than derived clauses
+INPUT_JUSTIFICATIONS = ('assumption', 'goal')
+
+
+class ProofHints(object):
+    """
+    Clauses derived in past Prover9 proofs of problems, and the time the proofs took without hints
+    """
+
+    def __init__(self, filename=None):
+        """
+        :param str filename, path of the database (default: proof_hints.sqlite in the output folder)
+        """
+
+        if filename is None:
+            filename = macleod.Filemgt.get_full_path(HINTS_FILE, folder=macleod.Filemgt.read_config('output', 'folder'),
+                                                     ending='.sqlite')
+        self.filename = filename
+
+        # number of problems Prover9 has been given hints for
+        self.hinted = 0
+        # (seconds without hints, seconds with hints) for every proof found with hints
+        self.speedups = []
+
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS hints ("
+                                 "key TEXT PRIMARY KEY, hints TEXT, size INTEGER, unhinted_time REAL, "
+                                 "hinted_time REAL, created REAL)")
+        self._connection.commit()
+
+    def record(self, ontology, reasoner):
+        """
+        Store the clauses derived in the proof Prover9 has found for an ontology
+
+        :param Ontology ontology, the ontology of the problem (the reasoner may have been run on its core)
+        :param Reasoner reasoner, a reasoner that has found a proof (or inconsistency)
+        :return list of str hints, or None if the reasoner is not Prover9 or no proof can be read
+        """
+
+        if reasoner.name != 'prover9' or reasoner.status == 'CACHED':
+            return None
+
+        hints = read_hints(reasoner.getOutputFile())
+        if not hints:
+            logging.getLogger(__name__).debug("NO HINTS FOUND IN " + reasoner.getOutputFile())
+            return None
+
+        key = macleod.ProofCore.get_problem_key(ontology)
+        row = self._connection.execute("SELECT unhinted_time FROM hints WHERE key = ?", (key,)).fetchone()
+        unhinted_time = row[0] if row is not None else None
+        hinted_time = None
+
+        if reasoner.hints is None:
+            unhinted_time = reasoner.time
+        else:
+            hinted_time = reasoner.time
+            if unhinted_time is not None:
+                self.speedups.append((unhinted_time, hinted_time))
+                logging.getLogger(__name__).info("PROOF OF " + ontology.name + " WITH HINTS TOOK " + "{:.2f}".format(hinted_time) +
+                                                 "s INSTEAD OF " + "{:.2f}".format(unhinted_time) + "s (SPEEDUP " +
+                                                 "{:.1f}".format(unhinted_time / max(hinted_time, 0.01)) + "x)")
+
+        self._connection.execute("INSERT OR REPLACE INTO hints VALUES (?, ?, ?, ?, ?, ?)",
+                                 (key, json.dumps(hints), len(hints), unhinted_time, hinted_time, time.time()))
+        self._connection.commit()
+        logging.getLogger(__name__).info("STORED " + str(len(hints)) + " HINTS FROM THE PROOF OF " + ontology.name)
+
+        return hints
+
+    def lookup(self, ontology):
+        """
+        Find the stored hints for the problem of an ontology
+
+        :param Ontology ontology
+        :return list of str hints, or None
+        """
+
+        row = self._connection.execute("SELECT hints FROM hints WHERE key = ?",
+                                       (macleod.ProofCore.get_problem_key(ontology),)).fetchone()
+        if row is None:
+            return None
+
+        return json.loads(row[0])
+
+    def apply(self, ontology, reasoners, problem=None):
+        """
+        Give the Prover9 reasoners for an ontology the stored hints of its problem
+
+        :param Ontology ontology, the ontology the reasoners are run on
+        :param ReasonerSet reasoners, the reasoners (with constructed commands)
+        :param Ontology problem, the ontology under whose problem the hints are stored (default: the ontology itself, else e.g. the full ontology of a core)
+        :return str the file with the hints, or None if there are no hints or no Prover9 reasoners
+        """
+
+        provers = [r for r in reasoners if r.name == 'prover9']
+        hints = None if not provers else self.lookup(problem or ontology)
+        if not hints:
+            return None
+
+        (root, ending) = os.path.splitext(ontology.get_output_filename('ladr'))
+        hints_file = root + '_hints' + ending
+        with open(hints_file, 'w') as f:
+            f.write("formulas(hints).\n")
+            for hint in hints:
+                f.write(hint + ".\n")
+            f.write("end_of_list.\n")
+
+        for r in provers:
+            r.setHints(hints_file)
+        self.hinted += 1
+        logging.getLogger(__name__).info("GIVING " + str(len(hints)) + " HINTS FROM A PAST PROOF TO PROVER9 FOR " + ontology.name)
+
+        return hints_file
+
+    def report(self):
+        """
+        :return str summary of the use of hints during this run
+        """
+
+        report = "Gave Prover9 hints from past proofs for {} problems".format(self.hinted)
+        if self.speedups:
+            unhinted = sum(u for (u, _) in self.speedups)
+            hinted = sum(h for (_, h) in self.speedups)
+            report += ", {} proofs with hints took {:.2f}s instead of {:.2f}s without (speedup {:.1f}x)".format(
+                len(self.speedups), hinted, unhinted, unhinted / max(hinted, 0.01))
+
+        return report
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM hints").fetchone()[0]
+
+
+def read_hints(filename):
+    """
+    Read the clauses derived in the first proof in the output of Prover9, without their attributes (e.g. labels)
+
+    :param str filename, the output file
+    :return list of str clauses in LADR syntax (without the final period), or None if the output contains no complete proof
+    """
+
+    hints = []
+    in_proof = False
+    try:
+        with open(filename, 'r', errors='replace') as f:
+            for line in f:
+                if not in_proof:
+                    in_proof = line.startswith('============================== PROOF')
+                    continue
+                if line.startswith('============================== end of proof'):
+                    return hints
+                match = LADR_PROOF_CLAUSE.match(line.strip())
+                if match is None or match.group(2) in INPUT_JUSTIFICATIONS:
+                    continue
+                clause = match.group(1).split(' # ')[0].strip()
+                if clause != '$F' and clause not in hints:
+                    hints.append(clause)
+    except OSError:
+        pass
+
+    return None
+
+
+__hints = None
+
+
+def get_hints():
+    """
+    Return the process-wide store of proof hints, opening it on first use
+
+    :return ProofHints hints
+    """
+
+    global __hints
+
+    if __hints is None:
+        __hints = ProofHints()
+
+    return __hints
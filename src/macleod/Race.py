@@ -0,0 +1,340 @@
+"""
+Event-driven race of theorem provers and model finders based on asyncio.
+
+The reasoners are started directly as child processes (no intermediate Python processes) and
+the race waits for their output and termination instead of polling. The output of each reasoner is
+streamed through a pipe (as is its problem if it reads it from its standard input, see ProblemDelivery) into its output file and scanned for the line that announces its result;
+as soon as one reasoner announces a decisive result (or terminates with one), all others are killed,
+while the winner gets a short grace period to finish writing its output (statistics, etc.).
+
+Every reasoner runs in its own process group. The operating system limits the CPU time and the address space of
+each of its processes (see Process.limit_resources); the race additionally checks the resident memory of the whole
+process group every MEMORY_INTERVAL seconds and kills the reasoner if it exceeds the memory limit, since a
+reasoner may spread over several processes (not on Windows, where only the wall clock time is limited).
+
+Progress is reported through callbacks that are called with the Reasoner concerned:
+
+    on_started(reasoner)   the reasoner process has been started
+    on_finished(reasoner)  the reasoner process has terminated by itself
+    on_killed(reasoner)    the reasoner process has been killed (because another reasoner won the race
+                           or because it exceeded its time or memory limit)
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import time
+
+import macleod
+import macleod.Process
+
+
+# seconds the winner of a race may keep running after announcing its result
+WINNER_GRACE = 1
+
+# seconds between two checks of the memory used by the process group of a reasoner
+MEMORY_INTERVAL = 1
+
+# number of bytes read from the output of a reasoner at once
+CHUNK_SIZE = 65536
+
+
+class Race(object):
+    """
+    A single race of a set of reasoners on the same problem
+    """
+
+    def __init__(self, reasoners, on_started=None, on_finished=None, on_killed=None, grace=WINNER_GRACE):
+        """
+        :param ReasonerSet reasoners, reasoners whose commands have been constructed already
+        :param function on_started, called with the reasoner when its process has been started
+        :param function on_finished, called with the reasoner when its process has terminated by itself
+        :param function on_killed, called with the reasoner when its process has been killed
+        :param float grace, seconds the winner may keep running after announcing its result
+        """
+
+        self.reasoners = reasoners
+        self.grace = grace
+        self.on_started = on_started
+        self.on_finished = on_finished
+        self.on_killed = on_killed
+
+        # the reasoner that won the race
+        self.winner = None
+
+        # [reasoner id] : [asyncio.subprocess.Process] for the reasoners that are still running
+        self._processes = {}
+
+        # ids of the reasoners that have been started
+        self._started = set()
+
+        # ids of the reasoners that have been killed
+        self._killed = set()
+
+        # tasks that write the problems to the reasoners reading them from their standard input
+        self._feeds = []
+
+    def run(self):
+        """
+        Run the race to completion
+
+        :return ReasonerSet reasoners
+        """
+
+        return asyncio.run(self.race())
+
+    async def race(self):
+        """
+        Start all reasoners and wait until one of them terminates successfully or all have terminated
+
+        :return ReasonerSet reasoners
+        """
+
+        memory_limit = macleod.Process.get_memory_limit()
+
+        tasks = {}
+        for r in self.reasoners:
+            tasks[asyncio.ensure_future(self.start(r, memory_limit))] = r
+
+        pending = set(tasks)
+        while pending:
+            (done, pending) = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                r = tasks[task]
+                if task.exception() is not None:
+                    logging.getLogger(__name__).error("COULD NOT RUN " + r.name + ": " + str(task.exception()))
+                    continue
+                self.conclude(r)
+
+        for r in self.reasoners:
+            if r.getId() in self._started:
+                macleod.Process.write_summary(r.getOutputFile(), r.getCommand(), r.status,
+                                              round(r.time, 2), 'total time used (seconds)')
+
+        return self.reasoners
+
+    def conclude(self, reasoner):
+        """
+        Decide the race by the output of a reasoner that has terminated by itself, unless it has been decided already
+
+        :param Reasoner reasoner
+        :return None
+        """
+
+        if self.winner is not None or reasoner.getId() in self._killed:
+            return
+        if reasoner.terminatedWithError():
+            logging.getLogger(__name__).error("TERMINATED WITH ERROR (LIKELY DURING PARSING): " + reasoner.name)
+            # the results of all other reasoners are meaningless as well
+            self.winner = reasoner
+            self._kill_all(except_for=reasoner)
+            for other in self.reasoners:
+                other.status = 'ERROR'
+        elif reasoner.terminatedSuccessfully():
+            logging.getLogger(__name__).info("TERMINATED SUCCESSFULLY: " + reasoner.name)
+            self.winner = reasoner
+            reasoner.status = macleod.Process.get_success_status(reasoner)
+            self._kill_all(except_for=reasoner)
+
+    def kill(self, reasoner):
+        """
+        Give up on a reasoner that has been started but has not terminated yet, even if its process is still being started
+
+        :param Reasoner reasoner
+        :return None
+        """
+
+        if reasoner.getId() in self._processes:
+            self._kill(reasoner, 'KILLED')
+        elif reasoner.getId() not in self._started:
+            # killed as soon as its process exists
+            reasoner.status = 'KILLED'
+            self._killed.add(reasoner.getId())
+
+    async def start(self, reasoner, memory_limit):
+        """
+        Run a single reasoner of the race until it terminates or is killed; races that start their reasoners one by one
+        (e.g. within the slots of a BatchScheduler) decide them with conclude() once this coroutine has returned
+
+        :param Reasoner reasoner, one of the reasoners of the race, whose command has been constructed already
+        :param int memory_limit, memory limit in MB of the reasoner (of each of its processes and of all of them together)
+        :return None
+        """
+
+        timeout = int(reasoner.timeout)
+        start = time.perf_counter()
+        reasoner.resetResult()
+
+        input_text = reasoner.getInput()
+        process = await asyncio.create_subprocess_exec(*reasoner.getCommand(), stdout=asyncio.subprocess.PIPE,
+                                                       stderr=asyncio.subprocess.STDOUT,
+                                                       stdin=None if input_text is None else asyncio.subprocess.PIPE,
+                                                       **_process_options(timeout, memory_limit))
+        if input_text is not None:
+            # the problem is streamed while the output is followed, so that neither pipe can fill up and block the reasoner
+            self._feeds.append(asyncio.ensure_future(self._feed(process, input_text.encode('utf-8'))))
+        self._processes[reasoner.getId()] = process
+        self._started.add(reasoner.getId())
+        if self.winner is not None and reasoner.getId() not in self._killed:
+            # the race has been decided while the process was being started
+            reasoner.status = 'KILLED'
+            self._killed.add(reasoner.getId())
+        if reasoner.getId() in self._killed:
+            self._stop(reasoner)
+        else:
+            reasoner.status = 'RUNNING'
+        logging.getLogger(__name__).info("STARTED: " + reasoner.name + ", command = " + reasoner.getCommand()[0])
+        self._notify(self.on_started, reasoner)
+
+        watch = None if os.name == 'nt' else asyncio.ensure_future(self._watch(reasoner, process, memory_limit))
+        with open(reasoner.getOutputFile(), 'wb') as out_file:
+            try:
+                # the CPU time is limited by the operating system already; this limits the wall clock time
+                await asyncio.wait_for(self._follow(reasoner, process, out_file), timeout + 1)
+            except asyncio.TimeoutError:
+                logging.getLogger(__name__).info("TIME EXCEEDED: " + reasoner.name)
+                self._kill(reasoner, 'ALLOTED TIME EXCEEDED: ' + str(timeout) + ' seconds')
+                await process.wait()
+            finally:
+                if watch is not None:
+                    watch.cancel()
+
+        reasoner.time = time.perf_counter() - start
+        del self._processes[reasoner.getId()]
+
+        # determined from the streamed output already or parsed from the output file now, but only once
+        result = reasoner.getResult()
+        if result.cputime is None:
+            result.cputime = round(reasoner.time, 2)
+
+        if reasoner.getId() in self._killed:
+            self._notify(self.on_killed, reasoner)
+        else:
+            if reasoner.status == 'RUNNING':
+                reasoner.status = 'TERMINATED'
+            logging.getLogger(__name__).info("REASONER COMPLETED: " + reasoner.name + ", exit code " + str(process.returncode))
+            self._notify(self.on_finished, reasoner)
+
+    @staticmethod
+    async def _feed(process, data):
+        """ Write the problem to the standard input of a reasoner and close it """
+
+        try:
+            process.stdin.write(data)
+            await process.stdin.drain()
+            process.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            # the reasoner terminated (or was killed) before it read the whole problem
+            pass
+
+    async def _follow(self, reasoner, process, out_file):
+        """ Copy the output of a reasoner into its output file, scanning it for a decisive result, until the reasoner terminates """
+
+        # incomplete last line of the output read so far
+        partial = b''
+
+        while True:
+            chunk = await process.stdout.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            out_file.write(chunk)
+            out_file.flush()
+
+            lines = (partial + chunk).split(b'\n')
+            # results are announced at the beginning of a (short) line, so the beginning of a long line is enough
+            partial = lines.pop()[:CHUNK_SIZE]
+
+            if self.winner is None:
+                for line in lines:
+                    if reasoner.scanLine(line.decode('utf-8', errors='replace')):
+                        self._decide(reasoner)
+                        break
+
+        if partial and self.winner is None and reasoner.scanLine(partial.decode('utf-8', errors='replace')):
+            self._decide(reasoner)
+
+        await process.wait()
+
+    async def _watch(self, reasoner, process, memory_limit):
+        """ Kill a reasoner as soon as its process group uses more memory than allowed """
+
+        # the winner is stopped after its grace period anyway
+        while process.returncode is None and self.winner is not reasoner:
+            await asyncio.sleep(MEMORY_INTERVAL)
+            (_, memory) = macleod.Process.get_usage(process.pid)
+            if memory > memory_limit:
+                logging.getLogger(__name__).info("MEMORY EXCEEDED: " + reasoner.name)
+                self._kill(reasoner, 'ALLOTED MEMORY EXCEEDED: ' + str(memory_limit) + 'MB')
+                return
+
+    def _decide(self, reasoner):
+        """ Declare a reasoner that announced a decisive result the winner and kill all others """
+
+        logging.getLogger(__name__).info("RESULT ANNOUNCED (" + str(reasoner.output) + "): " + reasoner.name)
+        self.winner = reasoner
+        reasoner.status = macleod.Process.get_success_status(reasoner)
+        self._kill_all(except_for=reasoner)
+
+        # the rest of the output (usually statistics) is not worth waiting for long
+        asyncio.get_running_loop().call_later(self.grace, self._stop, reasoner)
+
+    def _kill_all(self, except_for):
+        """ Kill all running reasoners except the winner """
+
+        for r in self.reasoners:
+            if r is not except_for and r.getId() in self._processes:
+                self._kill(r, 'KILLED')
+
+    def _kill(self, reasoner, status):
+        """ Kill the process (group) of a reasoner """
+
+        process = self._processes.get(reasoner.getId())
+        if process is None or process.returncode is not None:
+            return
+
+        logging.getLogger(__name__).debug("KILLING: " + reasoner.name)
+        reasoner.status = status
+        self._killed.add(reasoner.getId())
+        self._stop(reasoner)
+
+    def _stop(self, reasoner):
+        """ Terminate the process (group) of a reasoner if it is still running """
+
+        process = self._processes.get(reasoner.getId())
+        if process is None or process.returncode is not None:
+            return
+
+        try:
+            if os.name == 'nt':
+                process.kill()
+            else:
+                # the reasoner runs in its own session, so this also kills all its children
+                os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    def _notify(callback, reasoner):
+        if callback is not None:
+            callback(reasoner)
+
+
+def _process_options(cpu_limit, memory_limit):
+    """ Options for starting a reasoner process with its own process group and resource limits """
+
+    if os.name == 'nt':
+        return {}
+
+    return {'preexec_fn': macleod.Process.limit_resources(cpu_limit, memory_limit)}
+
+
+def race(reasoners, on_started=None, on_finished=None, on_killed=None):
+    """
+    Run a set of theorem provers and model finders in parallel until one terminates successfully
+
+    :param ReasonerSet reasoners, reasoners whose commands have been constructed already
+    :return ReasonerSet reasoners
+    """
+
+    return Race(reasoners, on_started, on_finished, on_killed).run()
@@ -1,6 +1,8 @@
 import macleod
 import macleod.Commands
 import macleod.Filemgt
+import macleod.ProblemDelivery
+import macleod.ReasonerRegistry
 import logging
 
 
@@ -11,7 +13,7 @@ class Reasoner (object):
     PROVER = 'PROVER'
 
     # initialize
-    def __init__(self, name, reasoner_type=None, reasoner_id=None):
+    def __init__(self, name, reasoner_type=None, reasoner_id=None, timeout=None):
         
         logging.getLogger(__name__).debug('Initializing ' + name)
 
@@ -23,6 +25,9 @@ class Reasoner (object):
 
         self.input_files = ''
 
+        # problem streamed to the standard input of the reasoner, None if it reads its input files (see ProblemDelivery)
+        self.input_text = None
+
         self.output_file = ''
 
         self.ontology = ''
@@ -31,6 +36,21 @@ class Reasoner (object):
 
         self.output = None
 
+        # status of the reasoner process in the most recent race (RUNNING, KILLED, PROOF, MODEL, ...)
+        self.status = ''
+
+        # ReasonerResult of the most recent run, determined only once
+        self.result = None
+
+        # (start size, end size, increment) if this model finder searches only a shard of the domain sizes
+        self.domain_sizes = None
+
+        # options file with the strategy of this prover if several strategies are raced (see Commands.get_p9_strategies)
+        self.strategy = None
+
+        # LADR file with hints from a past proof of the same problem (see ProofHints)
+        self.hints = None
+
         self.name = name
 
         if reasoner_type:
@@ -40,7 +60,10 @@ class Reasoner (object):
         else:
             self.identifier = name
 
-        self.timeout = macleod.Filemgt.read_config(self.name,'timeout')
+        if timeout is None:
+            self.timeout = macleod.Filemgt.read_config(self.name,'timeout')
+        else:
+            self.timeout = str(timeout)
         
         logging.getLogger(__name__).debug('Finished initializing ' + name)
         
@@ -62,18 +85,42 @@ class Reasoner (object):
     def constructCommand (self, ontology):
         import os
         """Return the command (includes constructing it if necessary) to invoke the reasoner."""
-        self.args = macleod.Commands.get_system_command(self.name, ontology)
+        self.args = macleod.Commands.get_system_command(self.name, ontology, self.timeout, self.domain_sizes, self.strategy, self.hints)
+        self.resetResult()
 
         self.ontology = ontology
+        self.input_text = macleod.ProblemDelivery.get_input_text(self, ontology)
         self.output_file = ontology.get_output_filename(self.name, out=True)
+        if self.identifier != self.name:
+            # several instances of the same reasoner (shards or strategies) need separate output files
+            (root, ending) = os.path.splitext(self.output_file)
+            self.output_file = root + '.' + self.identifier.replace(self.name + '_', '', 1) + ending
         logging.getLogger(__name__).info(self.name + " writes output to " + self.output_file)
 
         logging.getLogger(__name__).debug('Reasoner command: ' + str(self.args))
         return self.args
 
+    def setTimeout (self, timeout):
+        """Change the time limit (in seconds) of the reasoner, including the one passed on its command line if the command has been constructed already."""
+
+        self.timeout = timeout
+        if self.args:
+            self.args = macleod.Commands.get_system_command(self.name, self.ontology, timeout, self.domain_sizes, self.strategy, self.hints)
+
+    def setHints (self, hints):
+        """Give the prover a file with hints from a past proof (or none), including on its command line if the command has been constructed already."""
+
+        self.hints = hints
+        if self.args:
+            self.args = macleod.Commands.get_system_command(self.name, self.ontology, self.timeout, self.domain_sizes, self.strategy, hints)
+
     def getCommand (self):
         return self.args
 
+    def getInput (self):
+        """Return the problem to stream to the standard input of the reasoner, or None if it reads its input files."""
+        return self.input_text
+
     def getOutputFile (self):
         return self.output_file
 
@@ -84,132 +131,71 @@ class Reasoner (object):
         if self.type==Reasoner.PROVER: return True
         else: return False
 
+    def getResult (self):
+        """Return the result of the most recent run of the reasoner, parsing its output file only the first time.
+
+        :return ReasonerResult result
+        """
+
+        if self.result is None:
+            self.result = self.parseOutput()
+            self.output = self.result.output
+
+        return self.result
+
+    def resetResult (self):
+        """Forget the result of a previous run, e.g., before running the reasoner again."""
+
+        self.result = None
+        self.output = None
+
+    def parseOutput (self):
+        """Determine the result of a terminated reasoner from its output file. Only the lines starting with one of the
+        reasoner's markers are of interest, and these appear towards the end of the output; hence only the tail of the
+        file is read, unless the result cannot be found there.
+
+        :return ReasonerResult result
+        """
+
+        plugin = macleod.ReasonerRegistry.get_plugin(self.name)
+        if plugin is None:
+            return ReasonerResult(macleod.Ontology.UNKNOWN, 'Unknown', None, self.output_file)
+
+        lines = read_marked_lines(self.output_file, plugin.output_lines, plugin.marker[0] if plugin.marker else None)
+        output = plugin.result(lines)
+
+        return ReasonerResult(output, get_szs_status(self, output, lines), get_cputime(lines), self.output_file)
+
     def terminatedSuccessfully (self):
-        mapping = {
-            macleod.Ontology.PROOF: True,
-            macleod.Ontology.COUNTEREXAMPLE: True,
-            macleod.Ontology.CONSISTENT: True,
-            macleod.Ontology.INCONSISTENT: True,
-            macleod.Ontology.ERROR : False,
-            macleod.Ontology.UNKNOWN : False,
-            None: False
-        }
-
-        def paradox_status(line):
-            if 'Theorem' in line:
-                #print "PARADOX SZS status found: THEOREM"
-                return macleod.Ontology.PROOF
-            elif 'Unsatisfiable' in line:
-                return macleod.Ontology.INCONSISTENT
-            elif 'CounterSatisfiable' in line:
-                return macleod.Ontology.COUNTEREXAMPLE
-            elif 'Satisfiable' in line:
-                return macleod.Ontology.CONSISTENT
-            else: # Timeout, GaveUp
-                return macleod.Ontology.UNKNOWN
-
-        def vampire_status(line):
-            if 'Refutation not found' in line:
-                return macleod.Ontology.UNKNOWN
-            elif 'Refutation' in line:
-                #print "VAMPIRE SZS status found: THEOREM"
-                return macleod.Ontology.PROOF
-            elif 'Unsatisfiable' in line:
-                return macleod.Ontology.INCONSISTENT
-            elif 'CounterSatisfiable' in line:
-                return macleod.Ontology.COUNTEREXAMPLE
-            elif 'Satisfiable' in line:
-                return macleod.Ontology.CONSISTENT
-            else: # Timeout, GaveUp
-                return macleod.Ontology.UNKNOWN
-
-        def success_default (self):
-            return False
+        return self.getResult().output in (macleod.Ontology.PROOF, macleod.Ontology.COUNTEREXAMPLE,
+                                           macleod.Ontology.CONSISTENT, macleod.Ontology.INCONSISTENT)
 
-        def success_prover9 (self):
-            out_file = open(self.output_file, 'r')
-            lines = out_file.readlines()
-            out_file.close()
-            output_lines = [x for x in lines if x.startswith('THEOREM PROVED')]
-            if len(output_lines)>0:
-                self.output = macleod.Ontology.PROOF
-
-            return mapping[self.output]
-
-
-
-        def success_vampire (self):
-            out_file = open(self.output_file, 'r')
-            lines = out_file.readlines()
-            out_file.close()
-            output_lines = [x for x in lines if x.startswith('% Termination reason:')]
-            l = len(output_lines)
-            if l==0:
-                self.output = macleod.Ontology.UNKNOWN
-            # at least one line has a termination reason, so this might be an intermediate line (since Vampire in competition mode restarts several times)
-            else:
-                # examine the last output line
-                self.output = vampire_status(output_lines[l-1])
-                if self.output == macleod.Ontology.UNKNOWN:
-                    # Handle exceptions during parsing
-                    #print(str(lines))
-                    output_lines = [x for x in lines if x.startswith('Parser exception:')]
-                    if len(output_lines)>0:
-                        self.output = macleod.Ontology.ERROR
-
-            return mapping[self.output]
-
-
-        def success_paradox (self):
-            out_file = open(self.output_file, 'r')
-            lines = out_file.readlines()
-            out_file.close()
-            output_lines = [x for x in lines if x.startswith('+++ RESULT:')]
-            if len(output_lines)!=1:
-                output_lines = [x for x in lines if x.startswith('*** Unexpected:')]
-                #print(str(lines))
-                if len(output_lines)>0:
-                    self.output = macleod.Ontology.ERROR
-                else:
-                    self.output = macleod.Ontology.UNKNOWN
-            else:
-                self.output = paradox_status(output_lines[0])
-                #logging.getLogger(self.__module__ + "." + self.__class__.__name__).debug('Paradox terminated successfully : ' + str(self.output))
-
-            return mapping[self.output]
-
-        def success_mace4 (self):
-            out_file = open(self.output_file, 'r')
-            lines = out_file.readlines()
-            out_file.close()
-            output_lines = [x for x in lines if x.startswith('Exiting with 1 model.')]
-            if len(output_lines)==0:
-                self.output = macleod.Ontology.UNKNOWN
-            else:
-                self.output = macleod.Ontology.CONSISTENT
-                self.output = macleod.Ontology.CONSISTENT
-
-            return mapping[self.output]
-
-
-        handlers = {
-            "mace4": success_mace4,
-            "prover9": success_prover9,
-            "paradox": success_paradox,
-            "vampire": success_vampire,
-        }
-
-        return handlers.get(self.name, success_default)(self)
+    def scanLine (self, line):
+        """Check a single line of the reasoner's output (while it is still running) for a marker of a decisive result.
+        If one is found, the result is stored, so that the output file does not need to be parsed afterwards.
 
-    def terminatedWithError (self):
-        # need to involve terminatedSuccessfully to make sure the self.output is set
-        self.terminatedSuccessfully()
+        :param str line, a line of output
+        :return bool True if the line decides the problem
+        """
 
-        if self.output==macleod.Ontology.ERROR:
-            return True
-        else:
+        plugin = macleod.ReasonerRegistry.get_plugin(self.name)
+        marker = plugin.marker if plugin is not None else None
+        if marker is None or not line.startswith(marker[0]):
+            return False
+
+        output = marker[1](line)
+        if output not in (macleod.Ontology.PROOF, macleod.Ontology.INCONSISTENT,
+                          macleod.Ontology.CONSISTENT, macleod.Ontology.COUNTEREXAMPLE):
+            # e.g., an intermediate termination reason of Vampire in competition mode
             return False
 
+        self.output = output
+        self.result = ReasonerResult(output, get_szs_status(self, output, {marker[0]: [line]}), None, self.output_file)
+        return True
+
+    def terminatedWithError (self):
+        return self.getResult().output==macleod.Ontology.ERROR
+
     def terminatedUnknowingly (self):
         return not(self.terminatedSuccessfully()) and not(self.terminatedWithError())
 
@@ -218,3 +204,103 @@ class Reasoner (object):
             return False
         else:
             return True
+
+
+class ReasonerResult (object):
+    """The result of a single run of a reasoner"""
+
+    def __init__(self, output, szs=None, cputime=None, output_file=None):
+
+        # one of the return values defined in Ontology (PROOF, CONSISTENT, UNKNOWN, ERROR, ...)
+        self.output = output
+
+        # SZS status (Theorem, Unsatisfiable, CounterSatisfiable, Satisfiable, Unknown, Error)
+        self.szs = szs
+
+        # CPU time in seconds reported by the reasoner (or the time measured while running it)
+        self.cputime = cputime
+
+        self.output_file = output_file
+
+    def __repr__(self):
+        return "ReasonerResult(" + str(self.szs) + ", " + str(self.cputime) + "s, " + str(self.output_file) + ")"
+
+
+def read_marked_lines(filename, prefixes, marker=None, tail_size=None):
+    """Collect the lines of an output file that start with one of the given prefixes. Only the tail of the file is read,
+    unless the marker (one of the prefixes) does not occur there, in which case the whole file is scanned line by line.
+
+    :param str filename, the output file
+    :param tuple prefixes, the prefixes of interest
+    :param str marker, prefix that has to be found if it occurs in the file at all
+    :param int tail_size, number of bytes read from the end of the file
+    :return dict [prefix] : [list of lines starting with the prefix, in order]
+    """
+
+    if tail_size is None:
+        tail_size = TAIL_SIZE
+
+    def collect(lines):
+        found = dict((prefix, []) for prefix in prefixes)
+        for line in lines:
+            for prefix in prefixes:
+                if line.startswith(prefix):
+                    found[prefix].append(line.rstrip('\n'))
+        return found
+
+    try:
+        with open(filename, 'rb') as f:
+            f.seek(0, 2)
+            size = f.tell()
+            f.seek(max(0, size - tail_size))
+            tail = f.read().decode('utf-8', errors='replace').split('\n')
+            if size > tail_size:
+                # the first line is incomplete
+                tail = tail[1:]
+            found = collect(tail)
+
+            if size > tail_size and (marker is None or not found[marker]):
+                f.seek(0)
+                found = collect(line.decode('utf-8', errors='replace') for line in f)
+    except OSError:
+        return collect([])
+
+    return found
+
+
+def get_szs_status(reasoner, output, lines):
+    """Determine the SZS status of a result; Vampire and Paradox report it themselves."""
+
+    for szs_lines in (lines.get('% SZS status', []), lines.get('+++ RESULT:', [])):
+        if szs_lines:
+            words = szs_lines[-1].replace('+++ RESULT:', '').replace('% SZS status', '').split()
+            if words:
+                return words[0]
+
+    conjectures = isinstance(reasoner.ontology, macleod.Ontology) and len(reasoner.ontology.conjectures) > 0
+    if output == macleod.Ontology.PROOF:
+        return 'Theorem' if conjectures else 'Unsatisfiable'
+    elif output == macleod.Ontology.CONSISTENT:
+        return 'CounterSatisfiable' if conjectures else 'Satisfiable'
+    elif output == macleod.Ontology.ERROR:
+        return 'Error'
+    return 'Unknown'
+
+
+def get_cputime(lines):
+    """Extract the CPU time from the statistics printed by Prover9 and Mace4 (User_CPU=..., System_CPU=...)
+    or Vampire (% Time elapsed: ...)"""
+
+    try:
+        if lines.get('User_CPU='):
+            fields = dict(field.strip().split('=', 1) for field in lines['User_CPU='][-1].split(',') if '=' in field)
+            return float(fields.get('User_CPU', 0)) + float(fields.get('System_CPU', 0))
+        if lines.get('% Time elapsed:'):
+            return float(lines['% Time elapsed:'][-1].split(':', 1)[1].split()[0])
+    except (ValueError, IndexError):
+        pass
+    return None
+
+
+# number of bytes at the end of an output file that are searched for the result first
+TAIL_SIZE = 65536
@@ -0,0 +1,283 @@
+"""
+Registry of the reasoners (theorem provers and model finders) that macleod can run.
+
+Each reasoner is supported through a plugin that declares
+    - how to build the command that runs the reasoner on an ontology,
+    - the input format it reads (ladr or tptp),
+    - which lines of its output matter for the result and how to determine the result from them, and
+    - optionally, the line that announces a decisive result while the reasoner is still running, and
+    - optionally, how the names of the axioms used in a proof are read from the output (see ProofCore), and
+    - optionally, how the model found is read from the output (see Model and ModelStore), and
+    - whether it can read the problem from its standard input (see ProblemDelivery).
+
+The plugins for Prover9, Mace4, Paradox and Vampire as well as a fake reasoner (for tests and
+benchmarks, see scripts/fake_reasoner.py) are built in. Further reasoners are added without
+changing macleod itself through the option plugin in the reasoner's section of the configuration
+file, which names either a registered plugin (e.g., to run the fake reasoner with different settings
+under another name) or a Python module whose attribute PLUGIN is a ReasonerPlugin.
+"""
+
+import configparser
+import importlib
+import logging
+import re
+
+import macleod
+import macleod.Commands
+import macleod.Filemgt
+import macleod.Model
+
+
+class ReasonerPlugin(object):
+    """
+    Everything macleod needs to know about a single reasoner
+    """
+
+    def __init__(self, name, command, input_format, result, output_lines=(), marker=None, used_axioms=None, model=None,
+                 stdin=False):
+        """
+        :param str name, name of the plugin (and default name of the reasoner's section in the configuration file)
+        :param function command, called with (section, ontology, timeout, **options) to build the command as a list of arguments
+        :param str input_format, 'ladr' or 'tptp'
+        :param function result, called with the marked lines of the output (see Reasoner.read_marked_lines) to determine the result
+        :param tuple output_lines, the starts of the lines in the output that matter for determining the result
+        :param tuple marker, ([start of the line that announces a decisive result], [function that extracts the result from that line])
+        :param function used_axioms, called with the output file to get the names of the axioms used in the proof found (None if the reasoner does not report proofs)
+        :param function model, called with the output file to get the Model found (None if the reasoner does not report models)
+        :param bool stdin, the reasoner reads the problem from its standard input if given ProblemDelivery.STDIN_PATH as the input file
+        """
+
+        self.name = name
+        self.command = command
+        self.input_format = input_format
+        self.result = result
+        self.output_lines = tuple(output_lines)
+        self.marker = marker
+        self.used_axioms = used_axioms
+        self.model = model
+        self.stdin = stdin
+
+    def write_input(self, ontology):
+        """
+        Write the input files of the reasoner for an ontology
+
+        :param Ontology ontology
+        :return list of paths to the input files (LADR problems may be split into the shared axioms and the rest)
+        """
+
+        if self.input_format == 'ladr':
+            return ontology.get_ladr_files()
+        return [ontology.write_tptp_file()]
+
+    def __repr__(self):
+        return "ReasonerPlugin(" + self.name + ", " + self.input_format + ")"
+
+
+# [name of a reasoner] : [ReasonerPlugin]
+PLUGINS = {}
+
+
+def register(plugin, name=None):
+    """
+    Make a plugin available for the reasoner of the given name
+
+    :param ReasonerPlugin plugin
+    :param str name, name of the reasoner (default: the name of the plugin)
+    """
+
+    PLUGINS[name or plugin.name] = plugin
+
+
+def get_plugin(name):
+    """
+    Find the plugin for a reasoner: a registered one or the one named by the option plugin in the reasoner's section
+
+    :param str name, name of the reasoner (i.e., of its section in the configuration file)
+    :return ReasonerPlugin plugin or None if the reasoner is not supported
+    """
+
+    if name in PLUGINS:
+        return PLUGINS[name]
+
+    try:
+        plugin_name = macleod.Filemgt.read_config(name, 'plugin')
+    except configparser.NoSectionError:
+        plugin_name = None
+    if plugin_name is None:
+        logging.getLogger(__name__).error("NO PLUGIN FOR REASONER " + name)
+        return None
+
+    plugin_name = plugin_name.strip()
+    if plugin_name in PLUGINS:
+        plugin = PLUGINS[plugin_name]
+    else:
+        try:
+            plugin = importlib.import_module(plugin_name).PLUGIN
+        except (ImportError, AttributeError) as e:
+            logging.getLogger(__name__).error("COULD NOT LOAD PLUGIN " + plugin_name + " FOR REASONER " + name + ": " + str(e))
+            return None
+
+    register(plugin, name)
+    return plugin
+
+
+def builtin_command(function):
+    """ Adapt the command builders in Commands, which read their own section of the configuration file """
+
+    return lambda section, ontology, timeout=None, **options: function(ontology, timeout, **options)
+
+
+def result_prover9(lines):
+    if lines['THEOREM PROVED']:
+        return macleod.Ontology.PROOF
+    return macleod.Ontology.UNKNOWN
+
+
+def result_mace4(lines):
+    if lines['Exiting with 1 model']:
+        return macleod.Ontology.CONSISTENT
+    return macleod.Ontology.UNKNOWN
+
+
+def result_vampire(lines):
+    output_lines = lines['% Termination reason:']
+    # there might be intermediate lines (since Vampire in competition mode restarts several times)
+    if len(output_lines)==0:
+        output = macleod.Ontology.UNKNOWN
+    else:
+        # examine the last output line
+        output = get_vampire_status(output_lines[-1])
+    if output == macleod.Ontology.UNKNOWN and lines['Parser exception:']:
+        # Handle exceptions during parsing
+        output = macleod.Ontology.ERROR
+    return output
+
+
+def result_paradox(lines):
+    output_lines = lines['+++ RESULT:']
+    if len(output_lines)!=1:
+        if lines['*** Unexpected:']:
+            return macleod.Ontology.ERROR
+        return macleod.Ontology.UNKNOWN
+    return get_paradox_status(output_lines[0])
+
+
+def result_szs(lines):
+    output_lines = lines['% SZS status']
+    if not output_lines:
+        return macleod.Ontology.UNKNOWN
+    return get_szs_result(output_lines[-1])
+
+
+def used_axioms_prover9(filename):
+    """ Names of the axioms used in the first proof of Prover9, which keeps the labels of the input formulas """
+
+    return read_used_axioms(filename, '============================== PROOF', '============================== end of proof',
+                            LADR_LABEL)
+
+
+def used_axioms_vampire(filename):
+    """ Names of the axioms used in the proof of Vampire, which refers to the names of the input formulas """
+
+    return read_used_axioms(filename, '% SZS output start', '% SZS output end', TPTP_SOURCE)
+
+
+def read_used_axioms(filename, start, end, pattern):
+    """
+    Collect the names of the axioms referred to in the first proof in an output file
+
+    :param str filename, the output file
+    :param str start, start of the line that begins the proof
+    :param str end, start of the line that ends the proof
+    :param pattern, regular expression whose first group is the name of an axiom
+    :return set of str names of the axioms, or None if the output contains no complete proof
+    """
+
+    names = set()
+    in_proof = False
+    try:
+        with open(filename, 'r', errors='replace') as f:
+            for line in f:
+                if not in_proof:
+                    in_proof = line.startswith(start)
+                elif line.startswith(end):
+                    return names
+                else:
+                    names.update(pattern.findall(line))
+    except OSError:
+        pass
+
+    return None
+
+
+# the label of an input formula in a proof of Prover9: ... # label(axiom10) ... [assumption].
+LADR_LABEL = re.compile(r'# label\((axiom\d+)\)')
+
+# the source of an input formula in a proof of Vampire: file('...',axiom10) in TPTP format or [input axiom10] otherwise
+TPTP_SOURCE = re.compile(r"(?:file\('[^']*',\s*|\[input\s+)(axiom\d+)")
+
+
+def get_paradox_status(line):
+    if 'Theorem' in line:
+        #print "PARADOX SZS status found: THEOREM"
+        return macleod.Ontology.PROOF
+    elif 'Unsatisfiable' in line:
+        return macleod.Ontology.INCONSISTENT
+    elif 'CounterSatisfiable' in line:
+        return macleod.Ontology.COUNTEREXAMPLE
+    elif 'Satisfiable' in line:
+        return macleod.Ontology.CONSISTENT
+    else: # Timeout, GaveUp
+        return macleod.Ontology.UNKNOWN
+
+
+def get_vampire_status(line):
+    if 'Refutation not found' in line:
+        return macleod.Ontology.UNKNOWN
+    elif 'Refutation' in line:
+        #print "VAMPIRE SZS status found: THEOREM"
+        return macleod.Ontology.PROOF
+    elif 'Unsatisfiable' in line:
+        return macleod.Ontology.INCONSISTENT
+    elif 'CounterSatisfiable' in line:
+        return macleod.Ontology.COUNTEREXAMPLE
+    elif 'Satisfiable' in line:
+        return macleod.Ontology.CONSISTENT
+    else: # Timeout, GaveUp
+        return macleod.Ontology.UNKNOWN
+
+
+def get_szs_result(line):
+    """ Result of a line '% SZS status [status] ...' """
+
+    words = line.replace('% SZS status', '').split()
+    status = words[0] if words else ''
+    if status in ('Theorem', 'Unsatisfiable', 'ContradictoryAxioms'):
+        return macleod.Ontology.PROOF
+    elif status in ('CounterSatisfiable', 'Satisfiable'):
+        return macleod.Ontology.CONSISTENT
+    elif status in ('Error', 'SyntaxError', 'InputError'):
+        return macleod.Ontology.ERROR
+    return macleod.Ontology.UNKNOWN
+
+
+register(ReasonerPlugin('prover9', builtin_command(macleod.Commands.get_p9_cmd), 'ladr', result_prover9,
+                        ('THEOREM PROVED', 'User_CPU='),
+                        ('THEOREM PROVED', lambda line: macleod.Ontology.PROOF), used_axioms_prover9, stdin=True))
+
+register(ReasonerPlugin('mace4', builtin_command(macleod.Commands.get_m4_cmd), 'ladr', result_mace4,
+                        ('Exiting with 1 model', 'User_CPU='),
+                        ('Exiting with 1 model', lambda line: macleod.Ontology.CONSISTENT),
+                        model=macleod.Model.read_mace4_model, stdin=True))
+
+register(ReasonerPlugin('paradox', builtin_command(macleod.Commands.get_paradox_cmd), 'tptp', result_paradox,
+                        ('+++ RESULT:', '*** Unexpected:'),
+                        ('+++ RESULT:', get_paradox_status), model=macleod.Model.read_paradox_model))
+
+register(ReasonerPlugin('vampire', builtin_command(macleod.Commands.get_vampire_cmd), 'tptp', result_vampire,
+                        ('% Termination reason:', 'Parser exception:', '% SZS status', '% Time elapsed:'),
+                        ('% Termination reason:', get_vampire_status), used_axioms_vampire, stdin=True))
+
+register(ReasonerPlugin('fake', macleod.Commands.get_fake_cmd, 'ladr', result_szs,
+                        ('% SZS status', '% Time elapsed:'),
+                        ('% SZS status', get_szs_result), used_axioms_vampire))
@@ -1,5 +1,7 @@
+import macleod.Commands
 import macleod.Filemgt
 import macleod.Reasoner
+import macleod.ReasonerRegistry
 
 import logging
 
@@ -24,14 +26,59 @@ class ReasonerSet (list):
         provers = [x for x in provers if len(x)>0]
         finders = [x for x in finders if len(x)>0]
 
-        self.extend([macleod.Reasoner.Reasoner(r) for r in provers])
-        self.extend([macleod.Reasoner.Reasoner(r, reasoner_type=macleod.Reasoner.Reasoner.MODEL_FINDER) for r in finders])
+        # reasoners without a plugin cannot be run (see ReasonerRegistry)
+        unsupported = [x for x in provers + finders if macleod.ReasonerRegistry.get_plugin(x) is None]
+        if unsupported:
+            logging.getLogger(__name__).warning("IGNORING REASONERS WITHOUT PLUGIN: " + str(unsupported))
+        provers = [x for x in provers if x not in unsupported]
+        finders = [x for x in finders if x not in unsupported]
+
+        for r in provers:
+            self.extend(self.get_strategies(r))
+        for r in finders:
+            self.extend(self.get_shards(r))
 
         logging.getLogger(__name__).debug("REASONER SET: " + str(provers+finders))
 
         return True
 
 
+    def get_strategies (self, prover):
+        """Create the instances of a prover: one per strategy if several strategies are to be raced
+        (option strategies in the prover's section; only supported by Prover9), a single one otherwise."""
+
+        strategies = macleod.Commands.get_p9_strategies() if prover == 'prover9' else []
+        if not strategies:
+            return [macleod.Reasoner.Reasoner(prover)]
+
+        instances = []
+        for strategy in strategies:
+            reasoner = macleod.Reasoner.Reasoner(prover, reasoner_id=prover + '_' + macleod.Commands.get_strategy_name(strategy))
+            reasoner.strategy = strategy
+            instances.append(reasoner)
+
+        logging.getLogger(__name__).debug("STRATEGIES OF " + prover + ": " + str(strategies))
+        return instances
+
+    def get_shards (self, finder):
+        """Create the instances of a model finder: several ones if its domain sizes are split into shards
+        (option shards in the model finder's section; only supported by Mace4), a single one otherwise."""
+
+        shards = macleod.Filemgt.read_config(finder, 'shards')
+        if finder != 'mace4' or shards is None or int(shards) < 2:
+            return [macleod.Reasoner.Reasoner(finder, reasoner_type=macleod.Reasoner.Reasoner.MODEL_FINDER)]
+
+        mode = macleod.Filemgt.read_config(finder, 'shard_mode') or 'interleaved'
+        instances = []
+        for (k, domain_sizes) in enumerate(macleod.Commands.get_m4_shards(int(shards), mode.strip()), start=1):
+            reasoner = macleod.Reasoner.Reasoner(finder, reasoner_type=macleod.Reasoner.Reasoner.MODEL_FINDER,
+                                                 reasoner_id=finder + '_shard' + str(k))
+            reasoner.domain_sizes = domain_sizes
+            instances.append(reasoner)
+
+        logging.getLogger(__name__).debug("DOMAIN SIZE SHARDS OF " + finder + ": " + str([r.domain_sizes for r in instances]))
+        return instances
+
     def constructAllCommands (self, ontology):
         for r in self:
             r.constructCommand(ontology)
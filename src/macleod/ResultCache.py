@@ -0,0 +1,247 @@
+"""
+Persistent store of decisive reasoner results, kept in an sqlite database in the output folder.
+
+A result is stored under a hash of the problem the reasoner has been run on: the canonical form of
+every input file of the command (the generated TPTP/LADR file and any options file), the name of
+the reasoner and its remaining command line options. The canonical form ignores comments, blank
+lines and the numbering of the axioms, which depends on the order in which modules are parsed.
+Only decisive results (proofs, models, inconsistencies) are stored; entries expire after a
+configurable number of days. Since a decisive result holds whatever the time limit, the time limits
+on the command line are not part of the key: a result found with a short budget (e.g. by the
+likely winner of a Portfolio or in the first pass of a BatchScheduler) is found again with the
+configured timeout.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import re
+import sqlite3
+import time
+
+import macleod
+import macleod.Filemgt
+import macleod.ProblemDelivery
+import macleod.Reasoner
+
+
+# default number of days after which a stored result expires
+DEFAULT_TTL = 30
+
+# file name of the database within the output folder
+CACHE_FILE = 'reasoner_results'
+
+# options setting a time limit, either with the seconds attached (-t300 for Prover9 and Mace4, -s60 for the
+# time per domain size of Mace4) or as the next argument (-t 300 for Vampire, --time 300 for Paradox)
+TIME_LIMIT_OPTION = re.compile(r'^(-t|-s|--time|--time_limit)(\d+)?$')
+
+
+class ResultCache(object):
+    """
+    Reasoner results keyed by the problem, the reasoner and its options
+    """
+
+    def __init__(self, filename=None, ttl=None):
+        """
+        :param str filename, path of the database (default: reasoner_results.sqlite in the output folder)
+        :param float ttl, days after which results expire (default: option result_cache_ttl in the [system] section)
+        """
+
+        if filename is None:
+            filename = macleod.Filemgt.get_full_path(CACHE_FILE, folder=macleod.Filemgt.read_config('output', 'folder'),
+                                                     ending='.sqlite')
+        if ttl is None:
+            ttl = macleod.Filemgt.read_config('system', 'result_cache_ttl')
+            ttl = float(ttl) if ttl is not None else DEFAULT_TTL
+
+        self.filename = filename
+        self.ttl = float(ttl)
+
+        self.hits = 0
+        self.misses = 0
+
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS results ("
+                                 "key TEXT PRIMARY KEY, reasoner TEXT, output INTEGER, szs TEXT, "
+                                 "cputime REAL, output_file TEXT, created REAL)")
+        self._connection.commit()
+
+        self.evict()
+
+    def make_key(self, reasoner):
+        """
+        Compute the key of the problem a reasoner is run on
+
+        :param Reasoner reasoner, a reasoner whose command has been constructed
+        :return str key
+        """
+
+        sha = hashlib.sha256()
+        sha.update(reasoner.name.encode('utf-8'))
+
+        # the executable itself may be installed anywhere
+        time_limit = False
+        for arg in reasoner.getCommand()[1:]:
+            if time_limit:
+                # the seconds of the preceding time limit option
+                time_limit = False
+                continue
+            match = TIME_LIMIT_OPTION.match(str(arg))
+            if match is not None:
+                time_limit = match.group(2) is None
+                continue
+            if arg == reasoner.hints:
+                # hints only guide the search (see ProofHints), the problem is the same
+                continue
+            sha.update(b'\0')
+            if arg == macleod.ProblemDelivery.STDIN_PATH and reasoner.getInput() is not None:
+                # the problem is streamed to the reasoner instead of being read from a file
+                sha.update(canonical_digest(None, reasoner.getInput()).encode('utf-8'))
+            elif os.path.isfile(arg):
+                sha.update(canonical_digest(arg).encode('utf-8'))
+            else:
+                sha.update(str(arg).encode('utf-8'))
+
+        return sha.hexdigest()
+
+    def lookup(self, reasoner):
+        """
+        Find a stored result for the problem a reasoner is about to be run on; if one exists,
+        it becomes the result of the reasoner
+
+        :param Reasoner reasoner, a reasoner whose command has been constructed
+        :return ReasonerResult result or None
+        """
+
+        row = self._connection.execute("SELECT output, szs, cputime, output_file, created FROM results WHERE key = ?",
+                                       (self.make_key(reasoner),)).fetchone()
+
+        if row is None or row[4] < self._expiry():
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        result = macleod.Reasoner.ReasonerResult(row[0], row[1], row[2], row[3])
+        reasoner.result = result
+        reasoner.output = result.output
+        reasoner.time = result.cputime if result.cputime is not None else 0
+        reasoner.status = 'CACHED'
+        if result.output_file is not None and os.path.isfile(result.output_file):
+            # point to the output of the run the result stems from
+            reasoner.output_file = result.output_file
+        logging.getLogger(__name__).info("USING STORED RESULT (" + str(result.output) + ") of " + reasoner.name +
+                                         " from " + time.ctime(row[4]))
+
+        return result
+
+    def store(self, reasoner):
+        """
+        Store the result of a reasoner if it is decisive
+
+        :param Reasoner reasoner, a reasoner that has terminated
+        :return bool True if the result has been stored
+        """
+
+        if reasoner.status == 'CACHED' or not reasoner.terminatedSuccessfully():
+            return False
+
+        result = reasoner.getResult()
+        self._connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 (self.make_key(reasoner), reasoner.name, result.output, result.szs,
+                                  result.cputime, result.output_file, time.time()))
+        self._connection.commit()
+
+        return True
+
+    def evict(self):
+        """
+        Remove all expired results
+
+        :return int number of removed results
+        """
+
+        cursor = self._connection.execute("DELETE FROM results WHERE created < ?", (self._expiry(),))
+        self._connection.commit()
+
+        return cursor.rowcount
+
+    def clear(self):
+        """
+        Remove all results
+        """
+
+        self._connection.execute("DELETE FROM results")
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    def _expiry(self):
+        """ Time before which results are expired """
+
+        return time.time() - self.ttl * 86400
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def canonical_digest(path, text=None):
+    """
+    Hash of the canonical form of a problem or options file: comments, blank lines and
+    surrounding whitespace are ignored, axioms are renumbered in order of appearance and
+    included TPTP files (such as shared axioms, see Ontology.share_axioms) are hashed in place
+
+    :param str path, path to the file
+    :param str text, the problem itself (instead of a file), as streamed to a reasoner
+    :return str hexdigest
+    """
+
+    numbers = {}
+
+    def renumber(match):
+        return 'axiom' + str(numbers.setdefault(match.group(0), len(numbers)))
+
+    sha = hashlib.sha256()
+
+    def update(path, text=None):
+        with (io.StringIO(text) if text is not None else open(path, 'r', errors='replace')) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('%'):
+                    continue
+                include = TPTP_INCLUDE.match(line)
+                if include is not None and os.path.isfile(include.group(1)):
+                    update(include.group(1))
+                    continue
+                sha.update(AXIOM_NAME.sub(renumber, line).encode('utf-8'))
+                sha.update(b'\n')
+
+    update(path, text)
+
+    return sha.hexdigest()
+
+
+# names of axioms in generated TPTP and LADR files
+AXIOM_NAME = re.compile(r'\baxiom\d+\b')
+
+# an include directive in a TPTP file
+TPTP_INCLUDE = re.compile(r"include\('([^']*)'\)\.")
+
+
+__cache = None
+
+
+def get_cache():
+    """
+    Return the process-wide result cache, opening it on first use
+
+    :return ResultCache cache
+    """
+
+    global __cache
+
+    if __cache is None:
+        __cache = ResultCache()
+
+    return __cache
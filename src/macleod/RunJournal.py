@@ -0,0 +1,182 @@
+"""
+Journal of a batch run (check_consistency_all, prove_lemma_all), kept in an sqlite database in the output folder.
+
+Every ontology added to a BatchScheduler is recorded as a pending job together with a hash of its inputs
+(the complete problem, see ProblemDelivery.get_problem_text); as soon as it is decided, its verdict and
+the reasoner that found it are recorded. Each change is committed immediately, so the journal survives
+a run that dies partway (out of memory, reboot, Ctrl-C).
+
+A resumed run takes the verdicts of the jobs that have been completed with unchanged inputs from the
+journal instead of running the reasoners again; only new, pending and failed jobs and those whose inputs
+have changed (e.g. an edited axiom or, with LemmaChain, a different set of proved lemmas) are queued.
+An unknown verdict counts as completed, since the reasoners have used up their budgets on it.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+
+import macleod
+import macleod.Filemgt
+import macleod.ProblemDelivery
+import macleod.Reasoner
+import macleod.ResultCache
+
+
+# file name of the database within the output folder
+JOURNAL_FILE = 'run_journal'
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class RunJournal(object):
+    """
+    Inputs, status and verdict of every job of a batch run
+    """
+
+    def __init__(self, run, resume=False, filename=None):
+        """
+        :param str run, identifies the batch run (e.g. the script and the folder it checks), so that different runs can share the database
+        :param bool resume, whether to take the verdicts of completed jobs from an earlier run (default: start the run afresh, forgetting earlier jobs)
+        :param str filename, path of the database (default: run_journal.sqlite in the output folder)
+        """
+
+        if filename is None:
+            filename = macleod.Filemgt.get_full_path(JOURNAL_FILE, folder=macleod.Filemgt.read_config('output', 'folder'),
+                                                     ending='.sqlite')
+        self.filename = filename
+        self.run = run
+
+        # number of jobs whose verdict has been taken from the journal
+        self.resumed = 0
+        # number of jobs that were pending or had failed in the earlier run
+        self.requeued = 0
+        # number of jobs that were completed in the earlier run but whose inputs have changed since
+        self.changed = 0
+
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS jobs ("
+                                 "run TEXT, name TEXT, inputs TEXT, status TEXT, verdict INTEGER, reasoner TEXT, "
+                                 "output_file TEXT, updated REAL, PRIMARY KEY (run, name))")
+        if not resume:
+            self._connection.execute("DELETE FROM jobs WHERE run = ?", (run,))
+        self._connection.commit()
+
+        logging.getLogger(__name__).info(("RESUMING" if resume else "STARTING") + " RUN " + run + " (JOURNAL " + filename + ")")
+
+    def make_key(self, ontology):
+        """
+        Compute the hash of the inputs of a job: the complete problem of the ontology, in canonical form
+
+        :param Ontology ontology
+        :return str key
+        """
+
+        text = macleod.ProblemDelivery.get_problem_text(ontology, 'ladr')
+        return hashlib.sha256(macleod.ResultCache.canonical_digest(None, text).encode('utf-8')).hexdigest()
+
+    def lookup(self, ontology, key=None):
+        """
+        Find the verdict of a job that has been completed with the same inputs
+
+        :param Ontology ontology
+        :param str key, the hash of the inputs of the job (default: computed from the ontology)
+        :return tuple (verdict, reasoner name, output file), or None if the job needs to be run
+        """
+
+        row = self._connection.execute("SELECT inputs, status, verdict, reasoner, output_file FROM jobs WHERE run = ? AND name = ?",
+                                       (self.run, ontology.name)).fetchone()
+        if row is None:
+            return None
+
+        if row[1] != DONE:
+            logging.getLogger(__name__).info("JOB " + ontology.name + " WAS " + row[1].upper() + ", QUEUEING IT AGAIN")
+            self.requeued += 1
+            return None
+
+        if row[0] != (key or self.make_key(ontology)):
+            logging.getLogger(__name__).info("INPUTS OF " + ontology.name + " HAVE CHANGED, QUEUEING IT AGAIN")
+            self.changed += 1
+            return None
+
+        return (row[2], row[3], row[4])
+
+    def resume(self, ontology, reasoners):
+        """
+        Take the verdict of a completed job from the journal, or record the job as pending
+
+        :param Ontology ontology
+        :param ReasonerSet reasoners, the reasoners that would be run on the ontology
+        :return tuple (verdict, reasoner), the reasoner (if any) having the journaled result as a cached result,
+                or None if the job needs to be run
+        """
+
+        key = self.make_key(ontology)
+        found = self.lookup(ontology, key)
+
+        if found is None:
+            self._connection.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                     (self.run, ontology.name, key, PENDING, None, None, None, time.time()))
+            self._connection.commit()
+            return None
+
+        (verdict, name, output_file) = found
+        self.resumed += 1
+        logging.getLogger(__name__).info("USING JOURNALED RESULT (" + str(verdict) + ") OF " + ontology.name)
+        if name is None:
+            return (verdict, None)
+
+        # preferably the reasoner that found the verdict, which may no longer be active
+        reasoner = ([r for r in reasoners if r.name == name] or list(reasoners))[0]
+        if output_file is not None and os.path.isfile(output_file):
+            reasoner.output_file = output_file
+        reasoner.result = macleod.Reasoner.ReasonerResult(verdict, None, 0, reasoner.output_file)
+        reasoner.output = verdict
+        reasoner.time = 0
+        reasoner.status = 'CACHED'
+
+        return (verdict, reasoner)
+
+    def finish(self, ontology, return_value, reasoner):
+        """
+        Record the verdict of a job
+
+        :param Ontology ontology
+        :param int return_value, the consolidated result of the job
+        :param Reasoner reasoner, the fastest reasoner that found the result, or None
+        :return str status of the job
+        """
+
+        status = FAILED if return_value in (macleod.Ontology.ERROR, macleod.Ontology.CONTRADICTION) else DONE
+        self._connection.execute("UPDATE jobs SET status = ?, verdict = ?, reasoner = ?, output_file = ?, updated = ? "
+                                 "WHERE run = ? AND name = ?",
+                                 (status, return_value, None if reasoner is None else reasoner.name,
+                                  None if reasoner is None else reasoner.getOutputFile() or None, time.time(), self.run, ontology.name))
+        self._connection.commit()
+
+        return status
+
+    def status(self):
+        """
+        :return dict [status] : number of jobs of the run
+        """
+
+        return dict(self._connection.execute("SELECT status, COUNT(*) FROM jobs WHERE run = ? GROUP BY status", (self.run,)))
+
+    def report(self):
+        """
+        :return str summary of the journal of this run
+        """
+
+        return "Took {} verdicts from the run journal, queued {} pending or failed jobs and {} jobs with changed inputs again ({})".format(
+            self.resumed, self.requeued, self.changed, self.filename)
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM jobs WHERE run = ?", (self.run,)).fetchone()[0]
@@ -0,0 +1,179 @@
+"""
+The persistent stores that a consistency check consults before and updates after running the reasoners.
+
+Both Ontology.check_consistency and the BatchScheduler decide an ontology by the same steps:
+
+1. results of the reasoners stored in the ResultCache,
+2. models from the ModelStore that satisfy the ontology (or refute its lemma),
+3. clauses of past proofs given to Prover9 by ProofHints,
+4. the axioms of a past proof checked alone first with a ProofCore,
+5. the likely winner run alone first with a short budget by a Portfolio,
+6. the outcome recorded in all stores.
+
+They differ only in how the reasoners are run, so the steps are kept here and both call them.
+Every store is optional; without any store, the reasoners are simply run on the full ontology.
+"""
+
+import logging
+
+import macleod
+import macleod.Ontology
+
+
+class Stores(object):
+    """
+    The stores used by consistency checks, any of which may be None
+    """
+
+    def __init__(self, cache=None, portfolio=None, cores=None, models=None, hints=None):
+        """
+        :param ResultCache cache, cache of reasoner results that is consulted before running any reasoners (default: none)
+        :param Portfolio portfolio, statistics used to run the likely winner alone first and to which outcomes are added (default: none, run all reasoners)
+        :param ProofCore cores, axioms used in past proofs, which are checked alone first and to which new proofs are added (default: none, always use all axioms)
+        :param ModelStore models, models found in past checks, which are evaluated first and to which new models are added (default: none)
+        :param ProofHints hints, clauses from past Prover9 proofs, which guide Prover9 and to which new proofs are added (default: none)
+        """
+
+        self.cache = cache
+        self.portfolio = portfolio
+        self.cores = cores
+        self.models = models
+        self.hints = hints
+
+    def lookup(self, ontology, reasoners):
+        """
+        Decide an ontology without running any reasoners: from the stored results of the reasoners or from a stored model
+
+        :param Ontology ontology, the ontology to check
+        :param ReasonerSet reasoners, the reasoners whose commands have been constructed for the ontology
+        :return list reasoners, the reasoners carrying the results (to be consolidated), or None if the reasoners need to be run
+        """
+
+        if self.cache is not None:
+            cached = [r for r in reasoners if self.cache.lookup(r) is not None]
+            if cached:
+                logging.getLogger(__name__).info("Using stored results of " + str([r.name for r in cached]) +
+                                                 " for " + ontology.name)
+                return cached
+
+        reused = None if self.models is None else self.models.reuse(ontology, reasoners)
+        if reused is not None:
+            return [reused]
+
+        return None
+
+    def prepare(self, ontology, reasoners):
+        """
+        Get the reasoners ready to run on an ontology: give Prover9 the clauses of a past proof of the same problem
+
+        :param Ontology ontology, the ontology to check
+        :param ReasonerSet reasoners, the reasoners whose commands have been constructed for the ontology
+        :return None
+        """
+
+        if self.hints is not None:
+            self.hints.apply(ontology, reasoners)
+
+    def get_core_ontology(self, ontology):
+        """
+        The ontology made of the axioms used in a past proof of the same problem, to be checked before the full ontology
+
+        :param Ontology ontology, the ontology to check
+        :return tuple (core_ontology, budget) or None if no core is known
+        """
+
+        if self.cores is None:
+            return None
+
+        return self.cores.get_core_ontology(ontology)
+
+    def core_decided(self, ontology, return_value, fastest_reasoner):
+        """
+        Take the result of checking the core of an ontology: a proof from the core is a proof from the full ontology
+
+        :param Ontology ontology, the full ontology
+        :param int return_value, the result of checking the core
+        :param Reasoner fastest_reasoner, the reasoner that has decided the core
+        :return bool True if the full ontology is decided by the result, False if it needs to be checked with all axioms
+        """
+
+        if return_value == macleod.Ontology.PROOF:
+            self.cores.hits += 1
+            # the proof from the core may need even fewer axioms
+            self.cores.record(ontology, fastest_reasoner)
+            return True
+
+        logging.getLogger(__name__).info("No proof from the core of " + ontology.name + ", using all axioms")
+        self.cores.fallbacks += 1
+        return False
+
+    def select(self, ontology, reasoners):
+        """
+        The reasoners to run alone first on an ontology
+
+        :param Ontology ontology, the ontology to check
+        :param ReasonerSet reasoners, the reasoners whose commands have been constructed for the ontology
+        :return tuple (likely_winners, budget) or None if all reasoners are to be run at once
+        """
+
+        if self.portfolio is None:
+            return None
+
+        return self.portfolio.select(ontology, reasoners)
+
+    def escalate(self, ontology, likely_winner):
+        """
+        Note that the likely winner has not decided an ontology under its short budget, so that all reasoners are run
+
+        :param Ontology ontology, the ontology to check
+        :param Reasoner likely_winner, the reasoner that has been run alone
+        :return None
+        """
+
+        logging.getLogger(__name__).info("No result from " + likely_winner.name + " on " + ontology.name +
+                                         ", running all reasoners")
+        self.portfolio.escalations += 1
+
+    def record(self, ontology, reasoners, return_value, fastest_reasoner, record_unknown=True):
+        """
+        Add the outcome of running reasoners on an ontology to all stores
+
+        :param Ontology ontology, the checked ontology
+        :param list reasoners, the reasoners that have been run
+        :param int return_value, the consolidated result of the reasoners
+        :param Reasoner fastest_reasoner, the reasoner that has decided the ontology, or None
+        :param bool record_unknown, whether the portfolio learns of an undecided outcome (not for a likely winner under its short budget, which is run again)
+        :return None
+        """
+
+        if self.portfolio is not None and reasoners and (fastest_reasoner is not None or record_unknown):
+            self.portfolio.record(ontology, reasoners, fastest_reasoner)
+
+        if self.cache is not None and return_value in (macleod.Ontology.CONSISTENT, macleod.Ontology.INCONSISTENT):
+            for r in reasoners:
+                if r.output == return_value:
+                    self.cache.store(r)
+
+        if self.cores is not None and return_value == macleod.Ontology.PROOF:
+            self.cores.record(ontology, fastest_reasoner)
+
+        if self.hints is not None and return_value == macleod.Ontology.PROOF:
+            self.hints.record(ontology, fastest_reasoner)
+
+        if self.models is not None and return_value == macleod.Ontology.CONSISTENT:
+            self.models.record(ontology, fastest_reasoner)
+
+    def report(self):
+        """
+        The statistics of all stores in use
+
+        :return list lines, one line per store
+        """
+
+        lines = []
+        if self.cache is not None:
+            lines.append("Result cache: {} hits, {} misses ({})".format(self.cache.hits, self.cache.misses, self.cache.filename))
+        for store in (self.portfolio, self.cores, self.models, self.hints):
+            if store is not None:
+                lines.append(store.report())
+        return lines
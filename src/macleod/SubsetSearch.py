@@ -0,0 +1,305 @@
+"""
+Consistency search over the subontologies of an ontology, i.e. the import closures of its modules,
+which replaces ClifModuleSet.run_consistency_check_by_subset and run_consistency_check_by_depth.
+
+The candidate closures are built from the import DAG of the resolved ontology, either one per module
+(the module and everything it imports) or one per depth level (all modules at least as deep in the
+import hierarchy as the level, as in ClifModuleSet). All of them are added to a BatchScheduler at once
+and checked concurrently within its reasoner slots, in search order: the largest closures first, or the
+smallest ones first if increasing.
+
+Consistency is monotonic, which saves many checks: once a closure is consistent, so is every closure
+contained in it, and once a closure is inconsistent, so is every closure that contains it. The verdicts
+of such closures are inferred and their outstanding checks are dropped. With abort, the closures after
+the first one (in search order) that yields the abort signal are dropped as well, since a sequential
+search would have stopped there; the closures before it are still decided.
+
+The closures of a lemma (an ontology with conjectures) keep its conjectures, so that they try to prove the lemma
+from fewer axioms: a proof (an inconsistency) from a closure is a proof from every closure that contains it, and a
+counterexample (a model) for a closure is one for every closure it contains.
+
+Closures that have been checked in an earlier run take their verdicts from the result cache and the
+model store of the scheduler.
+"""
+
+import collections
+import logging
+import os
+
+import macleod
+
+
+class SubsetSearch(object):
+    """
+    Closures of modules of an ontology, whose consistency is checked by a BatchScheduler
+    """
+
+    def __init__(self, scheduler, abort=True, abort_signal=macleod.Ontology.CONSISTENT):
+        """
+        :param BatchScheduler scheduler, the scheduler that checks the closures; its callback is still called for every closure
+        :param bool abort, whether to stop the search once a closure yields the abort signal
+        :param int abort_signal, Ontology.CONSISTENT to look for a consistent closure, Ontology.INCONSISTENT to look for an inconsistent one
+        """
+
+        self.scheduler = scheduler
+        self._callback = scheduler.callback
+        scheduler.callback = self._decided
+        self.abort = abort
+        self.abort_signal = abort_signal
+
+        # [_Closure] all closures in search order
+        self.closures = []
+        # [ontology name] : [_Closure], to find the closure of a decided ontology
+        self._by_name = {}
+
+    def add(self, ontology, by_depth=False, increasing=False):
+        """
+        Build the closures of the modules of an ontology and add them to the scheduler
+
+        :param Ontology ontology, the ontology (with resolved imports)
+        :param bool by_depth, build one closure per depth level instead of one per module
+        :param bool increasing, start with the smallest closures instead of the largest ones
+        :return list of _Closure, the new closures in search order
+        """
+
+        if by_depth:
+            candidates = get_depth_closures(ontology)
+        else:
+            candidates = get_module_closures(ontology)
+        candidates.sort(key=lambda c: len(c.modules), reverse=not increasing)
+
+        known = set(c.modules for c in self.closures)
+        added = []
+        for closure in candidates:
+            if closure.modules in known:
+                # e.g. the closure of a module in an import cycle
+                continue
+            known.add(closure.modules)
+            self.closures.append(closure)
+            self._by_name[closure.ontology.name] = closure
+            added.append(closure)
+
+        logging.getLogger(__name__).info("CHECKING " + str(len(added)) + " CLOSURES OF MODULES OF " + ontology.name)
+
+        for closure in added:
+            # earlier closures may have decided or dropped it already (e.g. by a cached result)
+            if closure.status is None:
+                closure.status = 'queued'
+                self.scheduler.add(closure.ontology)
+
+        return added
+
+    def _decided(self, ontology, return_value, fastest_reasoner):
+        """ Record the verdict of a closure, infer the verdicts of the closures it contains or is contained in, and abort """
+
+        closure = self._by_name.get(ontology.name)
+        if closure is not None:
+            closure.verdict = return_value
+            closure.reasoner = fastest_reasoner
+            closure.status = 'checked'
+
+        if self._callback is not None:
+            self._callback(ontology, return_value, fastest_reasoner)
+
+        if closure is None:
+            return
+
+        for other in self.closures:
+            if other.status not in (None, 'queued'):
+                continue
+            if (return_value == macleod.Ontology.CONSISTENT and other.modules <= closure.modules) or \
+                    (return_value == macleod.Ontology.INCONSISTENT and other.modules >= closure.modules):
+                other.verdict = return_value
+                other.status = 'inferred'
+                other.source = closure
+                self.scheduler.drop(other.ontology.name)
+                logging.getLogger(__name__).info("INFERRED RESULT (" + str(return_value) + ") OF " + other.ontology.name +
+                                                 " FROM " + ontology.name)
+                if self._callback is not None:
+                    self._callback(other.ontology, return_value, None)
+
+        if self.abort and return_value == self.abort_signal:
+            for other in self.closures[self.closures.index(closure) + 1:]:
+                if other.status in (None, 'queued'):
+                    other.status = 'aborted'
+                    self.scheduler.drop(other.ontology.name)
+            logging.getLogger(__name__).info("ABORT SIGNAL (" + str(return_value) + ") FROM " + ontology.name)
+
+    def get_results(self):
+        """
+        :return list of tuples (closure ontology, module names, return value or None, fastest reasoner or None, status)
+                in search order; the status is 'checked', 'inferred' or 'aborted' ('queued' if the scheduler has not decided it)
+        """
+
+        return [(c.ontology, sorted(c.modules), c.verdict, c.reasoner, c.status) for c in self.closures]
+
+    def report(self):
+        """
+        :return str summary of the search
+        """
+
+        counts = collections.Counter(c.status for c in self.closures)
+        return "Searched {} closures of modules: {} checked by the reasoners, {} inferred from the results of other closures, " \
+               "{} abandoned after the abort signal".format(len(self.closures), counts['checked'], counts['inferred'], counts['aborted'])
+
+
+class _Closure(object):
+    """
+    The import closure of some modules, checked as a single ontology
+    """
+
+    def __init__(self, ontology, modules, depth=None):
+        self.ontology = ontology
+        # frozenset of the names of all modules in the closure
+        self.modules = modules
+        # the depth level of the closure (only for closures by depth)
+        self.depth = depth
+        self.verdict = None
+        self.reasoner = None
+        # the closure whose result the verdict has been inferred from
+        self.source = None
+        # None (not added yet), 'queued', 'checked', 'inferred' or 'aborted'
+        self.status = None
+
+
+def get_import_closure(ontology):
+    """
+    All modules an ontology imports, directly or indirectly, including itself
+
+    :param Ontology ontology, an ontology with resolved imports
+    :return OrderedDict [module name] : [Ontology] in breadth-first order
+    """
+
+    closure = collections.OrderedDict([(ontology.name, ontology)])
+    processing = collections.deque([ontology])
+    while processing:
+        module = processing.popleft()
+        for imported in module.imports.values():
+            # imports that could not be parsed are None
+            if imported is not None and imported.name not in closure:
+                closure[imported.name] = imported
+                processing.append(imported)
+
+    return closure
+
+
+def get_depths(ontology):
+    """
+    The depth of every module in the import hierarchy of an ontology: its shortest distance from the ontology
+    (as in ClifModule.get_depth)
+
+    :param Ontology ontology, an ontology with resolved imports
+    :return dict [module name] : [depth]
+    """
+
+    depths = {ontology.name: 0}
+    processing = collections.deque([ontology])
+    while processing:
+        module = processing.popleft()
+        for imported in module.imports.values():
+            if imported is not None and imported.name not in depths:
+                depths[imported.name] = depths[module.name] + 1
+                processing.append(imported)
+
+    return depths
+
+
+def make_closure_ontology(ontology, name, modules):
+    """
+    Construct an ontology without axioms of its own that imports some modules of an ontology and has its conjectures
+
+    :param Ontology ontology, the ontology the modules belong to
+    :param str name, the name of the new ontology, which determines its output files
+    :param list modules, the imported modules (Ontology objects with resolved imports)
+    :return Ontology closure ontology
+    """
+
+    closure_ontology = macleod.Ontology(name, basepath=ontology.basepath, preserve_conditionals=ontology.preserve_conditionals,
+                                        registry=ontology.registry)
+    # keyed like the imports of the modules themselves, so that each module contributes its axioms once
+    for module in modules:
+        closure_ontology.imports[get_import_path(ontology, module)] = module
+    closure_ontology.resolve = True
+    closure_ontology.conjectures = list(ontology.conjectures)
+    if ontology.nontrivial:
+        closure_ontology.add_nontrivial_axioms()
+
+    return closure_ontology
+
+
+def get_import_path(ontology, module):
+    """ The path under which a module is imported within the import closure of an ontology """
+
+    for importer in get_import_closure(ontology).values():
+        for (path, imported) in importer.imports.items():
+            if imported is module:
+                return path
+
+    return module.name
+
+
+def get_closure_name(ontology, module):
+    """
+    The name of the closure of a module of an ontology: the name of the module itself, so that the closure shares its
+    output files (and stored results) with a check of the module alone, unless the closure carries the conjectures of the ontology
+
+    :param Ontology ontology, an ontology with resolved imports
+    :param Ontology module, a module imported by the ontology
+    :return str name
+    """
+
+    if not ontology.conjectures:
+        return module.name
+
+    # the same modules are imported by many lemmas
+    (root, ending) = os.path.splitext(ontology.name)
+    return root + '_' + os.path.basename(module.name)
+
+
+def get_module_closures(ontology):
+    """
+    One closure per module of an ontology: the module and everything it imports; the closure of the ontology itself is the ontology
+
+    :param Ontology ontology, an ontology with resolved imports
+    :return list of _Closure
+    """
+
+    closures = []
+    for module in get_import_closure(ontology).values():
+        modules = frozenset(get_import_closure(module))
+        if module is ontology:
+            closures.append(_Closure(ontology, modules))
+        else:
+            closures.append(_Closure(make_closure_ontology(ontology, get_closure_name(ontology, module), [module]), modules))
+
+    return closures
+
+
+def get_depth_closures(ontology):
+    """
+    One closure per depth level of the import hierarchy of an ontology: all modules whose depth is at least the level,
+    and everything they import; the closure of level 0 is the ontology
+
+    :param Ontology ontology, an ontology with resolved imports
+    :return list of _Closure
+    """
+
+    modules = get_import_closure(ontology)
+    depths = get_depths(ontology)
+    (root, ending) = os.path.splitext(ontology.name)
+
+    closures = [_Closure(ontology, frozenset(modules), 0)]
+    for depth in range(1, max(depths.values()) + 1):
+        deep = [m for m in modules.values() if depths[m.name] >= depth]
+        # import only the modules that are not imported by another one, the largest closures first
+        deep.sort(key=lambda m: len(get_import_closure(m)), reverse=True)
+        covered = set()
+        selected = []
+        for module in deep:
+            if module.name not in covered:
+                selected.append(module)
+                covered.update(get_import_closure(module))
+        closures.append(_Closure(make_closure_ontology(ontology, root + '_depth' + str(depth) + ending, selected),
+                                 frozenset(covered), depth))
+
+    return closures
@@ -0,0 +1,254 @@
+"""
+Signature (nonlogical symbols) of an ontology, maintained incrementally as axioms are added
+"""
+
+import logging
+
+
+class Symbol(object):
+    """
+    A nonlogical symbol together with its kind, arity and the modules in which it is used
+    """
+
+    PREDICATE = 'PREDICATE'
+    FUNCTION = 'FUNCTION'
+    CONSTANT = 'CONSTANT'
+
+    def __init__(self, name, kind, arity, module=None):
+
+        self.name = name
+        self.kind = kind
+        self.arity = arity
+
+        # the first module is the one that declares (i.e. first uses) the symbol
+        self.modules = []
+        if module is not None:
+            self.modules.append(module)
+
+        # number of axioms in which the symbol is used
+        self.occurrences = 0
+
+    @property
+    def module(self):
+        """ The module that declares the symbol """
+
+        return self.modules[0] if self.modules else None
+
+    def is_predicate(self):
+        return self.kind == Symbol.PREDICATE
+
+    def is_function(self):
+        return self.kind == Symbol.FUNCTION
+
+    def is_constant(self):
+        return self.kind == Symbol.CONSTANT
+
+    def __eq__(self, other):
+        if not isinstance(other, Symbol):
+            return False
+        return (self.name, self.kind, self.arity) == (other.name, other.kind, other.arity)
+
+    def __hash__(self):
+        return hash((self.name, self.kind, self.arity))
+
+    def __repr__(self):
+        return self.name + "(" + str(self.arity) + ")"
+
+
+class SymbolTable(object):
+    """
+    Maps each symbol name to its uses as predicate, function or constant of some arity.
+    All lookups are dictionary lookups; conflicting uses of a name are recorded as soon as they
+    are added rather than by comparing sets of symbols afterwards.
+    """
+
+    def __init__(self):
+
+        # [name] : {[(kind, arity)] : [Symbol]}
+        self._symbols = {}
+
+        # [name] : [list of warnings about conflicting uses of the name]
+        self._conflicts = {}
+
+    def add_axiom(self, axiom, module=None):
+        """
+        Add all nonlogical symbols used in an axiom
+
+        :param Axiom axiom, an analyzed axiom
+        :param str module, name of the module the axiom belongs to
+        :return None
+        """
+
+        seen = set()
+        for predicate in axiom.unary_predicates + axiom.binary_predicates + axiom.nary_predicates:
+            seen.add((predicate.name, Symbol.PREDICATE, len(predicate.variables)))
+        for function in axiom.functs:
+            seen.add((function.name, Symbol.FUNCTION, len(function.variables)))
+        for constant in axiom.consts:
+            seen.add((constant, Symbol.CONSTANT, 0))
+
+        for (name, kind, arity) in seen:
+            self.add(name, kind, arity, module)
+
+    def add(self, name, kind, arity, module=None, occurrences=1):
+        """
+        Record a use of a symbol
+
+        :param str name, the symbol
+        :param str kind, one of Symbol.PREDICATE, Symbol.FUNCTION or Symbol.CONSTANT
+        :param int arity, number of arguments (0 for constants)
+        :param str module, name of the module in which the symbol is used
+        :param int occurrences, number of axioms in which the symbol is used
+        :return Symbol symbol, the entry for the symbol
+        """
+
+        uses = self._symbols.setdefault(name, {})
+
+        symbol = uses.get((kind, arity))
+        if symbol is None:
+            for other in uses.values():
+                self._add_conflict(name, other, kind, arity)
+            symbol = Symbol(name, kind, arity)
+            uses[(kind, arity)] = symbol
+
+        if module is not None and module not in symbol.modules:
+            symbol.modules.append(module)
+        symbol.occurrences += occurrences
+
+        return symbol
+
+    def merge(self, other):
+        """
+        Add all symbols of another table, e.g. of an imported module
+
+        :param SymbolTable other, the table to merge into this one
+        :return None
+        """
+
+        for symbol in other:
+            entry = self.add(symbol.name, symbol.kind, symbol.arity, occurrences=symbol.occurrences)
+            for module in symbol.modules:
+                if module not in entry.modules:
+                    entry.modules.append(module)
+
+    def get(self, name, kind=None, arity=None):
+        """
+        Find the entry for a symbol
+
+        :param str name, the symbol
+        :param str kind, restrict to a kind of use (optional)
+        :param int arity, restrict to an arity (optional)
+        :return Symbol symbol or None if the symbol is not used that way
+        """
+
+        uses = self._symbols.get(name)
+        if not uses:
+            return None
+
+        if kind is not None and arity is not None:
+            return uses.get((kind, arity))
+
+        for (k, a), symbol in uses.items():
+            if (kind is None or k == kind) and (arity is None or a == arity):
+                return symbol
+
+        return None
+
+    def lookup(self, name):
+        """
+        Get all uses of a symbol name
+
+        :param str name, the symbol
+        :return list of Symbol entries (more than one if the name is used inconsistently)
+        """
+
+        return list(self._symbols.get(name, {}).values())
+
+    def arity(self, name):
+        """ Return the arity of a symbol (of its first use if there are several) or None if it is unknown """
+
+        symbol = self.get(name)
+        return symbol.arity if symbol is not None else None
+
+    def kind(self, name):
+        """ Return the kind of a symbol (of its first use if there are several) or None if it is unknown """
+
+        symbol = self.get(name)
+        return symbol.kind if symbol is not None else None
+
+    def module(self, name):
+        """ Return the module that declares a symbol or None if it is unknown """
+
+        symbol = self.get(name)
+        return symbol.module if symbol is not None else None
+
+    def conflicts(self, name=None):
+        """
+        Get the warnings about names that are used inconsistently
+
+        :param str name, only return the warnings about this name (optional)
+        :return list of str warnings
+        """
+
+        if name is not None:
+            return list(self._conflicts.get(name, []))
+
+        return [warning for warnings in self._conflicts.values() for warning in warnings]
+
+    def predicates(self, arity=None):
+        """ Return all predicate symbols, optionally only those of a specific arity """
+
+        return [s for s in self if s.kind == Symbol.PREDICATE and (arity is None or s.arity == arity)]
+
+    def nary_predicates(self):
+        """ Return all predicate symbols with more than two arguments """
+
+        return [s for s in self if s.kind == Symbol.PREDICATE and s.arity > 2]
+
+    def functions(self):
+        """ Return all function symbols """
+
+        return [s for s in self if s.kind == Symbol.FUNCTION]
+
+    def constants(self):
+        """ Return all constants """
+
+        return [s for s in self if s.kind == Symbol.CONSTANT]
+
+    def _add_conflict(self, name, other, kind, arity):
+        """ Record a warning that the new use (kind, arity) of name clashes with an existing one """
+
+        kinds = {other.kind, kind}
+
+        if kinds == {Symbol.PREDICATE}:
+            arities = sorted([other.arity, arity])
+            if arities[0] == 1 and arities[1] == 2:
+                warning = "Predicate " + repr(name) + " used as unary predicate (class) and binary predicate (relation)"
+            elif arities[0] == 1:
+                warning = "Predicate " + repr(name) + " used as unary predicate (class) and n-ary predicate (relation)"
+            elif arities[0] == 2:
+                warning = "Predicate " + repr(name) + " used as binary and n-ary predicate (relation)"
+            else:
+                warning = "Predicate " + repr(name) + " used with " + str(arities[0]) + " and " + str(arities[1]) + " arguments"
+        elif kinds == {Symbol.FUNCTION}:
+            warning = "Function symbol " + repr(name) + " used with " + str(other.arity) + " and " + str(arity) + " arguments"
+        elif kinds == {Symbol.PREDICATE, Symbol.FUNCTION}:
+            warning = repr(name) + " used as predicate and function symbol"
+        elif kinds == {Symbol.PREDICATE, Symbol.CONSTANT}:
+            warning = name + " used as predicate and constant"
+        else:
+            warning = name + " used as function symbol and constant"
+
+        logging.getLogger(__name__).debug(warning)
+        self._conflicts.setdefault(name, []).append(warning)
+
+    def __contains__(self, name):
+        return name in self._symbols
+
+    def __iter__(self):
+        for uses in self._symbols.values():
+            for symbol in uses.values():
+                yield symbol
+
+    def __len__(self):
+        return sum(len(uses) for uses in self._symbols.values())
@@ -0,0 +1,76 @@
+"""
+Cache of the TPTP, LADR and LaTeX translations of individual axioms.
+
+Imported modules are shared between ontologies through the ModuleRegistry, and so are their
+Axiom objects; caching the translations per Axiom lets every ontology that imports a module
+reuse the translations produced for earlier ontologies. The cache only holds weak references
+to the axioms, so translations disappear together with the modules they belong to.
+"""
+
+import time
+import weakref
+
+
+class TranslationCache(object):
+    """
+    Translations of Axiom objects by output format
+    """
+
+    # output format : function that produces it
+    TRANSLATORS = {
+        'tptp': lambda axiom: axiom.to_tptp(),
+        'tptp_conjecture': lambda axiom: axiom.to_tptp(conjecture=True),
+        'ladr': lambda axiom: axiom.to_ladr(),
+        'ladr_labelled': lambda axiom: axiom.to_ladr(label=True),
+        'latex': lambda axiom: axiom.to_latex(),
+    }
+
+    def __init__(self):
+
+        # [Axiom] : {[output format] : ([translation], [seconds it took to produce])}
+        self._translations = weakref.WeakKeyDictionary()
+
+        self.hits = 0
+        self.misses = 0
+        # accumulated time of the translations that did not have to be redone
+        self.time_saved = 0.0
+
+    def translate(self, axiom, output_type):
+        """
+        Return the translation of an axiom, producing it only if it has not been produced before
+
+        :param Axiom axiom, the axiom to translate
+        :param str output_type, one of the keys of TranslationCache.TRANSLATORS
+        :return str translation
+        """
+
+        translations = self._translations.get(axiom)
+        if translations is None:
+            translations = {}
+            self._translations[axiom] = translations
+
+        cached = translations.get(output_type)
+        if cached is not None:
+            self.hits += 1
+            self.time_saved += cached[1]
+            return cached[0]
+
+        self.misses += 1
+        start = time.perf_counter()
+        translation = TranslationCache.TRANSLATORS[output_type](axiom)
+        translations[output_type] = (translation, time.perf_counter() - start)
+
+        return translation
+
+    def clear(self):
+        """
+        Drop all translations and reset the statistics
+        """
+
+        self._translations = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+
+    def __len__(self):
+        return len(self._translations)
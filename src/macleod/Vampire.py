@@ -26,13 +26,13 @@ def select_lemma (self, tptp_in_file, number, total, use_previous = False):
                 # remove line; do not copy to output
                 pass
             elif count==number:
-                out_text.append(line[i].replace(',axiom,', ',conjecture,'))
+                out_text.append(text[i].replace(',axiom,', ',conjecture,'))
             else:
-                out_text.append(line[i])
+                out_text.append(text[i])
 
     single_file = open(tptp_in_file, 'w+')
     single_file.writelines(out_text)
-    out_file.close()
+    single_file.close()
 
 
 # get the version of the currently installed vampire
@@ -57,6 +57,15 @@ class Axiom(object):
         # TODO: Figure out how to not make it crash rather than just comment this out
         self.analyze_logical()
 
+    def get_name(self):
+        """
+        Name of this axiom in the TPTP and LADR translations, by which reasoners refer to it in proofs
+
+        :return str name
+        """
+
+        return "axiom{}".format(self.id*10)
+
     def quantifiers(self):
         """
         Returns a list of universal and existential quantifiers.
@@ -356,10 +365,11 @@ class Axiom(object):
         self.sentence = Util.quote_constants(self.sentence, self.consts)
 
 
-    def to_tptp(self):
+    def to_tptp(self, conjecture=False):
         """
         Produce a TPTP representation of this axiom.
 
+        :param bool conjecture, produce the axiom as a conjecture (i.e. a goal to prove) instead
         :return str tptp, TPTP formatted version of this axiom
         """
 
@@ -435,13 +445,15 @@ class Axiom(object):
             else:
                 raise ValueError("Not a valid type for TPTP output")
 
-        return "fof(axiom{}, axiom, {}).".format(str(self.id*10),tptp_logical(self.sentence))
+        role = "conjecture" if conjecture else "axiom"
+        return "fof({}, {}, {}).".format(self.get_name(), role, tptp_logical(self.sentence))
 
 
-    def to_ladr(self):
+    def to_ladr(self, label=False):
         """
         Produce a LADR representation of this axiom.
 
+        :param bool label, add the name of the axiom as a label, which identifies it in Prover9's proofs (see ProofCore)
         :return str ladr, LADR formatted version of this axiom
         """
 
@@ -492,6 +504,8 @@ class Axiom(object):
             else:
                 raise ValueError("Not a valid type for LADR output")
 
+        if label:
+            return "{} # label({}).".format(ladr_logical(self.sentence), self.get_name())
         return "{}.".format(ladr_logical(self.sentence))
 
     def to_latex(self):
@@ -3,6 +3,7 @@ import os
 import ply.lex as lex
 import ply.yacc as yacc
 import re
+import time
 
 from pathlib import Path
 
@@ -526,7 +527,7 @@ def p_error(p):
     return p
 
 
-def parse_file(path, sub, base, resolve=False, name=None, preserve_conditionals = True):
+def parse_file(path, sub, base, resolve=False, name=None, preserve_conditionals = True, registry=None):
     """
     Accepts a path to a Common Logic file and parses it to return an Ontology object.
 
@@ -536,6 +537,7 @@ def parse_file(path, sub, base, resolve=False, name=None, preserve_conditionals
     :param resolve, resolve imports?
     :param name, for overriding the default naming
     :param preserve_conditionals, keep conditionals as it (True, default) or convert to disjunctions
+    :param registry, ModuleRegistry to take already parsed imports from (default: the process-wide registry)
     :return Ontology onto, newly constructed ontology object
     """
 
@@ -553,12 +555,15 @@ def parse_file(path, sub, base, resolve=False, name=None, preserve_conditionals
     #else:
     #    LOGGER.info("Eliminating all conditionals")
 
-    ontology = macleod.Ontology(path, preserve_conditionals = conditionals)
+    ontology = macleod.Ontology(path, preserve_conditionals = conditionals, registry = registry)
 
     if name is not None:
         ontology.name = name
 
 
+    # (not named start: yacc picks up the local variables of its caller)
+    parse_begin = time.perf_counter()
+
     with open(path, 'r') as f:
         buff = f.read()
 
@@ -582,6 +587,8 @@ def parse_file(path, sub, base, resolve=False, name=None, preserve_conditionals
 
             ontology.add_import(logical_thing)
 
+    ontology.parse_time = time.perf_counter() - parse_begin
+
     if resolve:
 
         ontology.resolve_imports()
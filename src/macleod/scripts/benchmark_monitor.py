@@ -0,0 +1,78 @@
+"""
+Benchmark of the overhead of monitoring the CPU time and memory of running reasoners:
+polling via ps (one shell subprocess per measurement, as Process.get_usage still does on systems
+without /proc) versus reading /proc directly in-process (Linux only, as Process.get_usage does there for
+ReasonerProcess and Race._watch).
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+import macleod.Process
+
+
+def ps_usage(pid):
+    """Measure the CPU time and memory of a process group via two ps calls, as Process.get_cputime and get_memory do without /proc"""
+
+    cputime = 0
+    ps_process = subprocess.Popen("ps -g " + str(pid) + " -o time", shell=True, stdout=subprocess.PIPE)
+    for entry in ps_process.communicate()[0].decode('utf-8').split('\n')[1:]:
+        if entry.strip():
+            cputime += macleod.Process.parse_ps_time(entry)
+
+    memory = 0
+    ps_process = subprocess.Popen("ps -g " + str(pid) + " -o rss", shell=True, stdout=subprocess.PIPE)
+    for entry in ps_process.communicate()[0].decode('utf-8').split('\n')[1:]:
+        if entry.strip():
+            memory += int(entry)
+
+    return (cputime, memory // 1024)
+
+
+def benchmark(function, pids, rounds):
+    """
+    Time the measurement of all process groups
+
+    :return float seconds per measurement of a single process group
+    """
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for pid in pids:
+            function(pid)
+    return (time.perf_counter() - start) / (rounds * len(pids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the overhead of monitoring reasoner processes.')
+    parser.add_argument('-n', '--processes', type=int, default=16, help='Number of simulated reasoners (process groups)')
+    parser.add_argument('-r', '--rounds', type=int, default=10, help='Number of times each process group is measured')
+    args = parser.parse_args()
+
+    if macleod.Process.get_platform() != 'linux':
+        print("Reading /proc is only supported on Linux")
+        return -1
+
+    with open('/dev/null', 'w') as null:
+        processes = [macleod.Process.startSubprocessWithOutput(['sleep', '600'], null) for _ in range(args.processes)]
+
+    try:
+        pids = [p.pid for p in processes]
+        ps_time = benchmark(ps_usage, pids, args.rounds)
+        proc_time = benchmark(macleod.Process.read_process_group, pids, args.rounds)
+    finally:
+        for p in processes:
+            p.kill()
+            p.wait()
+
+    print("Measuring {} process groups {} times each:".format(args.processes, args.rounds))
+    print("  ps:    {:8.3f}ms per measurement".format(ps_time * 1000))
+    print("  /proc: {:8.3f}ms per measurement".format(proc_time * 1000))
+    print("  with one measurement per reasoner and second, ps keeps {:.1%} of a CPU busy for {} reasoners, /proc {:.1%}".format(
+        ps_time * args.processes, args.processes, proc_time * args.processes))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Benchmark of the latency of a race of reasoners, i.e., of the time between the announcement of a result
+by the winner and the end of the race (including killing all other reasoners), using fake reasoners
+(see fake_reasoner.py) so that no real reasoners need to be installed.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import macleod.Race
+from macleod.Reasoner import Reasoner
+
+
+def make_reasoners(number, delay, folder, linger):
+    """
+    Create fake reasoners of which the first announces a proof after the given delay and all others never finish
+
+    :return list of Reasoner reasoners whose commands have been constructed
+    """
+
+    reasoners = []
+    for k in range(number):
+        reasoner = Reasoner('fake', reasoner_id='fake' + str(k + 1), timeout=600)
+        if k == 0:
+            options = ['--verdict', 'proof', '--delay', str(delay), '--linger', str(linger)]
+        else:
+            options = ['--verdict', 'unknown', '--delay', '600']
+        reasoner.args = [sys.executable, '-m', 'macleod.scripts.fake_reasoner'] + options + ['-t', '600', 'benchmark']
+        reasoner.output_file = os.path.join(folder, reasoner.getId() + '.out')
+        reasoners.append(reasoner)
+    return reasoners
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the latency of races of fake reasoners.')
+    parser.add_argument('-n', '--reasoners', type=int, default=4, help='Number of reasoners in each race')
+    parser.add_argument('-r', '--rounds', type=int, default=5, help='Number of races')
+    parser.add_argument('-d', '--delay', type=float, default=2, help='Seconds until the winner announces its result')
+    parser.add_argument('--linger', type=float, default=0, help='Seconds the winner keeps running after announcing its result')
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp()
+    try:
+        # the time the fake reasoners need to start, which is not caused by the race
+        start = time.perf_counter()
+        macleod.Race.race(make_reasoners(args.reasoners, 0, folder, 0))
+        startup = time.perf_counter() - start
+
+        latencies = []
+        for _ in range(args.rounds):
+            reasoners = make_reasoners(args.reasoners, args.delay, folder, args.linger)
+            start = time.perf_counter()
+            macleod.Race.race(reasoners)
+            latencies.append(time.perf_counter() - start - args.delay - startup)
+            if reasoners[0].status != 'PROOF':
+                print("The winner did not win: " + str([(r.getId(), r.status) for r in reasoners]))
+                return -1
+    finally:
+        shutil.rmtree(folder)
+
+    print("Racing {} fake reasoners {} times, the winner announcing its result after {}s:".format(args.reasoners, args.rounds, args.delay))
+    print("  race with an immediate result (starting the processes): {:8.3f}ms".format(startup * 1000))
+    print("  latency of the race beyond that: mean {:8.3f}ms, min {:8.3f}ms, max {:8.3f}ms".format(
+        statistics.mean(latencies) * 1000, min(latencies) * 1000, max(latencies) * 1000))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
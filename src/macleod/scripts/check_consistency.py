@@ -5,7 +5,17 @@ import sys, os
 
 LOGGER = logging.getLogger(__name__)
 
+import macleod.BatchScheduler
+import macleod.Diagnosis
 import macleod.Filemgt
+import macleod.ModelStore
+import macleod.Portfolio
+import macleod.ProofCore
+import macleod.ProofHints
+import macleod.ResultCache
+import macleod.Stores
+import macleod.SubsetSearch
+import macleod.parsing.parser as Parser
 import macleod.scripts.parser as parser_script
 
 #print(os.path.dirname(os.path.abspath(__file__)))
@@ -15,12 +25,14 @@ import macleod.scripts.parser as parser_script
 default_dir = macleod.Filemgt.read_config('system', 'path')
 default_prefix = macleod.Filemgt.read_config('cl', 'prefix')
 
-def main():
+def get_arguments(argv=None):
     '''
-    Main entry point, makes all options available
+    Parse the command line arguments of check_consistency
+
+    :param list argv, arguments to parse (default: sys.argv)
+    :return Namespace args
     '''
 
-    LOGGER.info('Called script check_consistency')
     # Setup the command line arguments to the program
     parser = argparse.ArgumentParser(description='Function to check the consistency of ontologies in the Common Logic Interchange Format (.clif).')
 
@@ -33,16 +45,23 @@ def main():
     optionalArguments.add_argument('--stats', action="store_true", help='Present detailed statistics (including definitions) about the ontology', default=True)
     optionalArguments.add_argument('-n', '--nontrivial', action="store_true", default=False, help='Instantiate all predicates to check for nontrivial consistency')
     optionalArguments.add_argument('-b', '--base', default=None, type=str, help='Path to directory containing ontology files (basepath; only relevant when option --resolve is turned on; can also be set in configuration file)')
+    optionalArguments.add_argument('--no-cache', action="store_true", help='Run the reasoners even if a result for the same problem is stored in the result cache, and do not store new results', default=False)
+    optionalArguments.add_argument('--no-portfolio', action="store_true", help='Always run all active reasoners instead of running the reasoner that won most past checks of similar ontologies alone first', default=False)
+    optionalArguments.add_argument('--no-cores', action="store_true", help='Always use all axioms instead of trying the axioms used in a past proof (of an inconsistency) of the same ontology alone first', default=False)
+    optionalArguments.add_argument('--no-models', action="store_true", help='Run the reasoners even if the model found in a past check of the same ontology still satisfies all axioms, and do not store new models', default=False)
+    optionalArguments.add_argument('--no-hints', action="store_true", help='Do not give Prover9 the clauses of a past proof (of an inconsistency) of the same ontology as hints, and do not store new hints', default=False)
+    optionalArguments.add_argument('--diagnose', action="store_true", help='If the ontology is inconsistent, find a minimal inconsistent set of its modules and then of their axioms, checking halves of the candidates in parallel', default=False)
     optionalArguments.add_argument('-s', '--sub', default=None, type=str, help='String to replace with basepath found in imports, only relevant when option --resolve is turned on')
 
     exclusiveArguments = parser.add_mutually_exclusive_group()
     exclusiveArguments.add_argument('--simple', action='store_true', help='Do a simple consistency check', default=True)
-    exclusiveArguments.add_argument('--full', action='store_true', help='Do a full resursive consistency check in case the entire ontology is not provably consistent', default=False)
-    exclusiveArguments.add_argument('--module', action='store_true', help='Check each module individually', default=False)
-    #exclusiveArguments.add_argument('--depth', action='store_true', help='Check with iteratively increasing depths', default=False)
+    exclusiveArguments.add_argument('--full', action='store_true', help='Do a full resursive consistency check in case the entire ontology is not provably consistent: check the import closures of all modules in parallel, largest first, until one is consistent', default=False)
+    exclusiveArguments.add_argument('--module', action='store_true', help='Check each module (with its imports) individually, in parallel', default=False)
+    exclusiveArguments.add_argument('--depth', action='store_true', help='Check with iteratively increasing depths: the modules at or below each level of the import hierarchy, in parallel, until one is consistent', default=False)
+    optionalArguments.add_argument('-j', '--slots', type=int, default=None, help='Number of reasoners running at the same time with --full, --module, --depth or --diagnose (default: reasoner_slots in the configuration file or the number of CPUs)')
 
     # Parse the command line arguments
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     # do not need TPTP and LADR translations prior to running the reasoners; they are called as part of the command construction
     args.tptp = False
     args.ladr = False
@@ -50,6 +69,10 @@ def main():
     args.nocond = False
     args.owl = False
     args.ffpcnf = False
+    # the search over the modules needs the import closure
+    if args.full or args.module or args.depth:
+        args.simple = False
+        args.resolve = True
 
     # Parse out the ontology object then print it nicely
     default_basepath = macleod.Filemgt.get_ontology_basepath()
@@ -58,6 +81,18 @@ def main():
     if args.base is None:
         args.base = default_basepath[1]
 
+    return args
+
+
+def main():
+    '''
+    Main entry point, makes all options available
+    '''
+
+    LOGGER.info('Called script check_consistency')
+
+    args = get_arguments()
+
     # TODO need to substitute base path
     full_path = args.file
 
@@ -65,7 +100,11 @@ def main():
         logging.getLogger(__name__).info("Starting to parse " + args.file)
         # Creation of the ModuleSet is from the old deprecated approach
         #m = ClifModuleSet(full_path)
-        derp, clif = consistent(full_path, args)
+        try:
+            derp, clif = consistent(full_path, args)
+        except (Parser.ParseError, TypeError) as e:
+            logging.getLogger(__name__).error("Could not parse " + full_path + ": " + str(e))
+            return -1
 
     elif os.path.isdir(full_path):
         logging.getLogger(__name__).info("Starting to parse all CLIF files in folder " + args.file)
@@ -76,9 +115,87 @@ def main():
 
 
 
-def consistent(filename, args):
+def search_subsets(ontology, args):
+    """
+    Check the consistency of the import closures of the modules of an ontology in parallel
+
+    :param Ontology ontology, the prepared ontology (with resolved imports)
+    :param Namespace args, the arguments as returned by get_arguments (one of full, module or depth is set)
+    :return SubsetSearch search, whose closures have all been decided or abandoned
+    """
+
+    def report(closure_ontology, return_value, fastest_reasoner):
+        print(str(return_value) + " " + closure_ontology.name +
+              ("" if fastest_reasoner is None else " (" + fastest_reasoner.name + ")"))
+
+    scheduler = macleod.BatchScheduler.BatchScheduler(args.slots, callback=report, stores=get_stores(args))
+    if args.module:
+        # every module matters: start with the small ones, whose inconsistencies carry over to all modules importing them
+        search = macleod.SubsetSearch.SubsetSearch(scheduler, abort=False)
+        search.add(ontology, increasing=True)
+    else:
+        search = macleod.SubsetSearch.SubsetSearch(scheduler, abort=True, abort_signal=macleod.Ontology.CONSISTENT)
+        search.add(ontology, by_depth=args.depth)
+    scheduler.run()
+
+    return search
+
+
+def diagnose(ontology, args, reasoner=None):
+    """
+    Find and print a minimal inconsistent set of modules and axioms of an inconsistent ontology
+
+    :param Ontology ontology, the inconsistent ontology
+    :param Namespace args, the arguments as returned by get_arguments
+    :param Reasoner reasoner, the reasoner that has found the inconsistency (default: none)
+    :return Diagnosis diagnosis
+    """
+
+    if not ontology.resolve:
+        ontology.resolve_imports()
+
+    stores = get_stores(args)
+    # the subsets differ from any problem seen before, only stored results and the portfolio are of use
+    scheduler = macleod.BatchScheduler.BatchScheduler(args.slots, stores=macleod.Stores.Stores(cache=stores.cache,
+                                                                                                 portfolio=stores.portfolio))
+    diagnosis = macleod.Diagnosis.Diagnosis(ontology, scheduler)
+    axioms = diagnosis.run(reasoner)
+
+    print("Minimal inconsistent set of modules: " + ", ".join(diagnosis.modules))
+    print("Minimal inconsistent set of axioms:")
+    for (axiom, module) in axioms:
+        print("  " + module + ": " + repr(axiom))
+    print(diagnosis.report())
+
+    return diagnosis
+
+
+def get_stores(args):
+    """
+    The result cache, portfolio statistics, proof cores, models and proof hints to use for the consistency checks
+
+    :param Namespace args, the arguments as returned by get_arguments
+    :return Stores stores, without the stores disabled by the arguments
+    """
 
-    ontology = parser_script.convert_file(filename, args, preserve_conditionals=True)
+    return macleod.Stores.Stores(cache=None if args.no_cache else macleod.ResultCache.get_cache(),
+                                 portfolio=None if args.no_portfolio else macleod.Portfolio.get_portfolio(),
+                                 cores=None if args.no_cores else macleod.ProofCore.get_cores(),
+                                 models=None if args.no_models else macleod.ModelStore.get_models(),
+                                 hints=None if args.no_hints else macleod.ProofHints.get_hints())
+
+
+def prepare(filename, args, registry=None):
+    """
+    Parse an ontology and get it ready for the consistency check (without running any reasoners)
+
+    :param str filename, path to the CLIF file of the ontology
+    :param Namespace args, the arguments as returned by get_arguments
+    :param ModuleRegistry registry, registry to share parsed imports with other checks (default: the process-wide registry)
+    :return Ontology ontology
+    """
+
+    ontology = parser_script.convert_file(filename, args, preserve_conditionals=True, registry=registry)
 
     if args.resolve:
         ontology.resolve_imports()
@@ -91,12 +208,27 @@ def consistent(filename, args):
     if args.nontrivial:
         ontology.add_nontrivial_axioms()
 
+    return ontology
+
+
+def consistent(filename, args, registry=None):
+    """
+    Check the consistency of a single ontology
+
+    :param str filename, path to the CLIF file of the ontology
+    :param Namespace args, the arguments as returned by get_arguments
+    :param ModuleRegistry registry, registry to share parsed imports with other checks (default: the process-wide registry)
+    :return tuple (return_value, ontology), return_value being one of the Ontology return codes or None
+    """
+
+    ontology = prepare(filename, args, registry)
+
     if args.simple:
         # Run the parsing script first to translate to TPTP and LADR
         # as part of the args, it is communicated whether to resolve the ontology or not
 
 
-        (return_value, fastest_reasoner) = ontology.check_consistency()
+        (return_value, fastest_reasoner) = ontology.check_consistency(stores=get_stores(args))
 
         if return_value == macleod.Ontology.CONSISTENT:
             if args.nontrivial:
@@ -104,18 +236,27 @@ def consistent(filename, args):
             else:
                 print(fastest_reasoner.name + " proved consistency of " + ontology.name)
             print("Results saved to " + fastest_reasoner.output_file)
-        exit(0)
-    elif args.full:
-        # TODO not yet working again
-        # Run the parsing script first to translate to TPTP and LADR
-        ontology = parser_script.convert_file(filename,args,preserve_conditionals=True)
-        ontology.check_consistency()
-        #results = m.run_full_consistency_check(abort=True, abort_signal=ClifModuleSet.CONSISTENT)
-        exit(-1)
-    elif args.module:
-        # TODO not yet working again
-        #results = m.run_consistency_check_by_subset(abort=True, abort_signal=ClifModuleSet.CONSISTENT)
-        exit(-1)
+        elif return_value == macleod.Ontology.INCONSISTENT and args.diagnose:
+            diagnose(ontology, args, fastest_reasoner)
+        return (return_value, ontology)
+    elif args.full or args.module or args.depth:
+        search = search_subsets(ontology, args)
+        results = search.get_results()
+
+        for (closure_ontology, modules, return_value, fastest_reasoner, status) in results:
+            if return_value == macleod.Ontology.INCONSISTENT:
+                print("Inconsistency found in " + closure_ontology.name + " (" + str(len(modules)) + " modules)")
+        consistent_closures = [r for r in results if r[2] == macleod.Ontology.CONSISTENT]
+        if consistent_closures:
+            (closure_ontology, modules, _, fastest_reasoner, status) = max(consistent_closures, key=lambda r: len(r[1]))
+            print("Largest consistent closure: " + closure_ontology.name + " (" + str(len(modules)) + " modules" +
+                  ("" if fastest_reasoner is None else ", proved by " + fastest_reasoner.name) + ")")
+        print(search.report())
+
+        # the result of the whole ontology, if it has been decided
+        return ([r[2] for r in results if r[0] is ontology][0], ontology)
+
+    return (None, ontology)
 
 
     # the following code block is about preseting the results from multiple modules
@@ -1,25 +1,66 @@
+import argparse
 import os
 import sys
-import macleod.scripts.licence 
-import macleod.scripts.check_consistency
+import time
+
+import macleod.Ontology
+import macleod.BatchScheduler
+import macleod.Filemgt
+import macleod.ModuleRegistry
+import macleod.RunJournal
+import macleod.parsing.parser as Parser
+import macleod.scripts.licence
+import macleod.scripts.check_consistency as check_consistency
 
 def main():
     """Entrypoint for check consistency all"""
 
-    licence.print_terms()
+    macleod.scripts.licence.print_terms()
 
     #print(os.path.dirname(os.path.abspath(__file__)))
     sys.path.append(os.path.dirname(os.path.abspath(__file__))+"/../")
 
+    parser = argparse.ArgumentParser(description='Check the consistency of all ontologies (.clif files) in a folder and its subfolders, running the reasoners for many ontologies in parallel. All other arguments are passed on to check_consistency.')
+    parser.add_argument('folder', type=str, help='Folder to check')
+    parser.add_argument('-j', '--slots', type=int, default=None, help='Number of reasoners running at the same time (default: reasoner_slots in the configuration file or the number of CPUs)')
+    parser.add_argument('-t', '--first-timeout', type=int, default=None, help='Check in passes with growing budgets, starting with this many seconds per reasoner (default: first_timeout in the configuration file or a single pass with the configured timeouts)')
+    parser.add_argument('--timeout-factor', type=float, default=macleod.BatchScheduler.DEFAULT_TIMEOUT_FACTOR, help='Factor by which the budget grows from one pass to the next')
+    parser.add_argument('--summary', type=str, default='log/consistency_summary.log', help='File (relative to the configuration folder) to which the result of each ontology is written as soon as it is known')
+    parser.add_argument('--resume', action='store_true', default=False, help='Resume an earlier run of the same folder that did not finish: take the results of the ontologies it completed from the run journal unless their axioms have changed, and check only the others')
+    (batch_args, remaining) = parser.parse_known_args()
+
     #ignores = ["theorems", "generated", "output","consistency"]
     ignores = ["theorems", "generated", "output"]
     #necessary = "_nontrivial"
     necessary = False
 
-    good = 0
-    bad = 0
-    neutral = 0
-    for directory, subdirs, files in os.walk(sys.argv[1]):
+    # the remaining arguments are passed on to the individual consistency checks
+    args = check_consistency.get_arguments(['-f', batch_args.folder, '--resolve'] + remaining)
+
+    # one registry for the whole run, so that the modules imported by many files
+    # are parsed and translated only once
+    registry = macleod.ModuleRegistry.ModuleRegistry()
+    start = time.perf_counter()
+
+    summary_file = os.path.normpath(os.path.join(os.path.abspath(macleod.Filemgt.config_dir), batch_args.summary))
+    os.makedirs(os.path.dirname(summary_file), exist_ok=True)
+
+    def report(ontology, return_value, fastest_reasoner):
+        print(str(return_value) + " " + ontology.name +
+              ("" if fastest_reasoner is None else " (" + fastest_reasoner.name + ")"))
+
+    stores = check_consistency.get_stores(args)
+    journal = macleod.RunJournal.RunJournal('check_consistency_all ' + os.path.abspath(batch_args.folder), batch_args.resume)
+    first_timeout = batch_args.first_timeout
+    if first_timeout is None:
+        first_timeout = macleod.Filemgt.read_config('system', 'first_timeout')
+    scheduler = macleod.BatchScheduler.BatchScheduler(batch_args.slots, summary_file=summary_file, callback=report, stores=stores,
+                                                      first_timeout=None if first_timeout is None else int(first_timeout),
+                                                      timeout_factor=batch_args.timeout_factor, journal=journal)
+    # files that could not be parsed
+    errors = []
+
+    for directory, subdirs, files in os.walk(batch_args.folder):
 
         subdirs.sort()
         files.sort()
@@ -34,17 +75,39 @@ def main():
                         pass
                     filename = os.path.join(directory.replace('qs\\',''), single_file)
 #                    print filename
-                    (result, _) = check_consistency.consistent(filename, options=['-simple'])
-                    if result is True:
-                        good += 1
-                    elif result is False:
-                        bad += 1
-                    else:
-                        neutral += 1
+                    try:
+                        scheduler.add(check_consistency.prepare(filename, args, registry=registry))
+                    except (Parser.ParseError, TypeError) as e:
+                        print("Could not parse " + filename + ": " + str(e))
+                        errors.append(filename)
+
+    results = scheduler.run()
+
+    good = 0
+    bad = 0
+    neutral = 0
+    for (result, _) in results.values():
+        if result == macleod.Ontology.CONSISTENT:
+            good += 1
+        elif result == macleod.Ontology.INCONSISTENT:
+            bad += 1
+        else:
+            neutral += 1
     print(str(good+bad+neutral) + " files in total")
     print(str(good) + " consistent")
     print(str(neutral) + " unknown")
     print(str(bad) + " inconsistent")
+    if errors:
+        print(str(len(errors)) + " could not be parsed: " + ", ".join(errors))
+    for pass_report in scheduler.pass_reports:
+        print(pass_report)
+    print("Finished in {:.2f}s using {} reasoner slots".format(time.perf_counter() - start, scheduler.slots))
+    print("Results written to " + summary_file)
+    print(registry.report())
+    for line in stores.report():
+        print(line)
+    if batch_args.resume:
+        print(journal.report())
 
 if __name__ == '__main__':
     sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+A fake reasoner that announces configurable results after configurable delays, without doing any reasoning.
+
+It stands in for real theorem provers and model finders in tests and benchmarks of the orchestration
+(races, batches, caches) on machines where no reasoners are installed. Its output follows the SZS
+conventions (% SZS status ...), which the built-in plugin 'fake' of the ReasonerRegistry understands.
+To use it, add a section like the following to the configuration file and activate 'fake' as a prover
+or model finder:
+
+    [fake]
+    command = fake_reasoner
+    options = --verdict proof --delay 2
+    timeout = 60
+
+Several fake reasoners with different behaviour are configured through sections of other names with the option plugin = fake.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+# [verdict] : [SZS status announced by the fake reasoner]
+VERDICTS = {
+    'proof': 'Unsatisfiable',
+    'model': 'Satisfiable',
+    'unknown': 'GaveUp',
+    'error': 'Error',
+}
+
+
+def wait(seconds, busy=False):
+    """ Wait for the given time, either sleeping or keeping a CPU busy (so that CPU time limits apply) """
+
+    if not busy:
+        time.sleep(seconds)
+        return
+
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def read_axiom_names(filenames):
+    """ Names of the axioms in generated LADR or TPTP files, in order """
+
+    names = []
+    for filename in filenames:
+        try:
+            with open(filename, 'r', errors='replace') as f:
+                names += AXIOM_NAME.findall(f.read())
+        except OSError:
+            pass
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake reasoner that announces a configurable result after a configurable delay.')
+    parser.add_argument('input_files', type=str, nargs='+', help='Input files (the name of the last one is matched against --when, the names of their axioms are used by --uses)')
+    parser.add_argument('--verdict', choices=sorted(VERDICTS), default='unknown', help='Result to announce')
+    parser.add_argument('--delay', type=float, default=0, help='Seconds before the result is announced')
+    parser.add_argument('--when', nargs=3, action='append', default=[], metavar=('SUBSTRING', 'VERDICT', 'DELAY'),
+                        help='Announce a different result after a different delay if the name of the input file contains the substring (can be repeated; the first match counts)')
+    parser.add_argument('--busy', action='store_true', default=False, help='Keep a CPU busy while waiting instead of sleeping')
+    parser.add_argument('--lines', type=int, default=0, help='Number of lines of search output printed before the result')
+    parser.add_argument('--linger', type=float, default=0, help='Seconds the fake reasoner keeps running after announcing its result (as if writing a proof or statistics)')
+    parser.add_argument('--uses', type=int, default=None, help='Print a proof (in the TPTP format of Vampire) that uses the first USES axioms of the input file when announcing a proof')
+    parser.add_argument('--memory', type=int, default=0, help='Megabytes of memory the fake reasoner (and each of its children) keeps resident')
+    parser.add_argument('--children', type=int, default=0, help='Number of child processes (POSIX only) that keep running, and holding their memory, alongside the fake reasoner until it announces its result')
+    parser.add_argument('-t', '--timeout', type=float, default=None, help='Time limit in seconds')
+    args = parser.parse_args()
+    input_file = args.input_files[-1]
+
+    start = time.perf_counter()
+    verdict = args.verdict
+    delay = args.delay
+    for (substring, when_verdict, when_delay) in args.when:
+        if substring in input_file:
+            if when_verdict not in VERDICTS:
+                parser.error('unknown verdict ' + when_verdict)
+            verdict = when_verdict
+            delay = float(when_delay)
+            break
+
+    # written to, so that the memory is resident (and counts towards the resident memory of every child as well)
+    ballast = b'x' * (args.memory * 1024 * 1024)
+    for _ in range(args.children):
+        if os.fork() == 0:
+            # a child: hold on to the memory until the result is announced
+            time.sleep(delay if args.timeout is None else min(delay, args.timeout))
+            os._exit(0)
+
+    print('% Fake reasoner running on ' + input_file, flush=True)
+    for i in range(args.lines):
+        print('given #' + str(i + 1) + ' (I,wt=' + str(i % 17 + 1) + '): fake clause.')
+    sys.stdout.flush()
+
+    if args.timeout is not None and delay > args.timeout:
+        wait(args.timeout, args.busy)
+        print('% SZS status Timeout for ' + input_file, flush=True)
+    else:
+        wait(delay, args.busy)
+        print('% SZS status ' + VERDICTS[verdict] + ' for ' + input_file, flush=True)
+        if verdict == 'proof' and args.uses is not None:
+            print('% SZS output start Proof for ' + input_file)
+            for (i, name) in enumerate(read_axiom_names(args.input_files)[:args.uses], start=1):
+                print("fof(f" + str(i) + ",axiom,$true,file('" + input_file + "'," + name + ")).")
+            print('% SZS output end Proof for ' + input_file, flush=True)
+        wait(args.linger, args.busy)
+
+    print('% Time elapsed: {:.3f} s'.format(time.perf_counter() - start), flush=True)
+    return 1 if verdict == 'error' else 0
+
+
+# the name of an axiom in a generated LADR or TPTP file
+AXIOM_NAME = re.compile(r'(?:label\(|fof\()(axiom\d+)')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
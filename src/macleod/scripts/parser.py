@@ -1,6 +1,7 @@
 import argparse
+import concurrent.futures
 import logging
-import sys, os
+import sys, os, time
 
 
 LOGGER = logging.getLogger(__name__)
@@ -11,6 +12,9 @@ import macleod.Filemgt
 default_dir = macleod.Filemgt.read_config('system', 'path')
 default_prefix = macleod.Filemgt.read_config('cl', 'prefix')
 
+# preserve (True) or eliminate (False) conditionals; set by main from the option --nocond
+conditionals = True
+
 def parse_clif():
     '''
     Main entry point, makes all options available
@@ -36,6 +40,7 @@ def parse_clif():
     optionalArguments.add_argument('--nocond', action='store_true', help='Do not use conditionals (only applies to TPTP, LADR and LaTeX production)', default=False)
     optionalArguments.add_argument('-b', '--base', default=None, type=str, help='Path to directory containing ontology files (basepath; only relevant when option --resolve is turned on; can also be set in configuration file)')
     optionalArguments.add_argument('-s', '--sub', default=None, type=str, help='String to replace with basepath found in imports, only relevant when option --resolve is turned on')
+    optionalArguments.add_argument('-j', '--jobs', type=int, default=1, help='Number of files converted in parallel when converting a folder')
     optionalArguments.add_argument('--ffpcnf', action='store_true', help='Automatically convert axioms to function-free prenex conjuntive normal form (FF-PCNF)', default=False)
     optionalArguments.add_argument('--clip', action='store_true', help='Split FF-PCNF axioms across the top level quantifier', default=False)
 
@@ -44,7 +49,7 @@ def parse_clif():
     if (args.owl):
         args.nocond = True
 
-    main(args)
+    sys.exit(main(args))
 
 def clif_to_tptp():
     '''
@@ -64,6 +69,7 @@ def clif_to_tptp():
     optionalArguments.add_argument('--nocond', action='store_true', help='Do not use conditionals (only applies to TPTP, LADR and LaTeX production)', default=False)
     optionalArguments.add_argument('-b', '--base', default=None, type=str, help='Path to directory containing ontology files (basepath; only relevant when option --resolve is turned on; can also be set in configuration file)')
     optionalArguments.add_argument('-s', '--sub', default=None, type=str, help='String to replace with basepath found in imports, only relevant when option --resolve is turned on')
+    optionalArguments.add_argument('-j', '--jobs', type=int, default=1, help='Number of files converted in parallel when converting a folder')
 
     # Parse the command line arguments
     args = parser.parse_args()
@@ -72,7 +78,7 @@ def clif_to_tptp():
     args.latex = False
     args.owl = False
     args.ffpcnf = False
-    main(args)
+    sys.exit(main(args))
 
 def clif_to_ladr():
     '''
@@ -92,6 +98,7 @@ def clif_to_ladr():
     optionalArguments.add_argument('--nocond', action='store_true', help='Do not use conditionals (only applies to TPTP, LADR and LaTeX production)', default=False)
     optionalArguments.add_argument('-b', '--base', default=None, type=str, help='Path to directory containing ontology files (basepath; only relevant when option --resolve is turned on; can also be set in configuration file)')
     optionalArguments.add_argument('-s', '--sub', default=None, type=str, help='String to replace with basepath found in imports, only relevant when option --resolve is turned on')
+    optionalArguments.add_argument('-j', '--jobs', type=int, default=1, help='Number of files converted in parallel when converting a folder')
 
     # Parse the command line arguments
     args = parser.parse_args()
@@ -100,7 +107,7 @@ def clif_to_ladr():
     args.latex = False
     args.owl = False
     args.ffpcnf = False
-    main(args)
+    sys.exit(main(args))
 
 def clif_to_owl():
     '''
@@ -119,6 +126,7 @@ def clif_to_owl():
     optionalArguments.add_argument('--resolve', action="store_true", help='Automatically resolve imports', default=False)
     optionalArguments.add_argument('-b', '--base', default=None, type=str, help='Path to directory containing ontology files (basepath; only relevant when option --resolve is turned on; can also be set in configuration file)')
     optionalArguments.add_argument('-s', '--sub', default=None, type=str, help='String to replace with basepath found in imports, only relevant when option --resolve is turned on')
+    optionalArguments.add_argument('-j', '--jobs', type=int, default=1, help='Number of files converted in parallel when converting a folder')
     optionalArguments.add_argument('--ffpcnf', action='store_true', help='Automatically convert axioms to function-free prenex conjuntive normal form (FF-PCNF)', default=True)
     optionalArguments.add_argument('--clip', action='store_true', help='Split FF-PCNF axioms across the top level quantifier', default=False)
 
@@ -150,7 +158,7 @@ def clif_to_owl():
     else:
         args.full = Owl.Profile.OWL2_FULL
 
-    main(args)
+    sys.exit(main(args))
 
 def clif_to_latex():
     '''
@@ -170,6 +178,7 @@ def clif_to_latex():
     optionalArguments.add_argument('--resolve', action="store_true", help='Automatically resolve imports', default=False)
     optionalArguments.add_argument('-b', '--base', default=None, type=str, help='Path to directory containing ontology files (basepath; only relevant when option --resolve is turned on; can also be set in configuration file)')
     optionalArguments.add_argument('-s', '--sub', default=None, type=str, help='String to replace with basepath found in imports, only relevant when option --resolve is turned on')
+    optionalArguments.add_argument('-j', '--jobs', type=int, default=1, help='Number of files converted in parallel when converting a folder')
 
     # Parse the command line arguments
     args = parser.parse_args()
@@ -179,14 +188,14 @@ def clif_to_latex():
     args.ladr = False
     args.owl = False
     args.ffpcnf = False
-    main(args)
+    sys.exit(main(args))
 
 
 def main(args):
     '''
 
     :param args: arguments passed from customized entry points
-    :return:
+    :return: -1 if a file could not be converted (the exit status of the entry points), None otherwise
     '''
 
     # Parse out the ontology object then print it nicely
@@ -207,16 +216,22 @@ def main(args):
 
     if os.path.isfile(full_path):
         logging.getLogger(__name__).info("Starting to parse " + args.file)
-        convert_file(full_path, args=args)
+        try:
+            convert_file(full_path, args=args)
+        except (Parser.ParseError, TypeError) as e:
+            logging.getLogger(__name__).error("Could not parse " + full_path + ": " + str(e))
+            return -1
 
     elif os.path.isdir(full_path):
         logging.getLogger(__name__).info("Starting to parse all CLIF files in folder " + args.file)
-        convert_folder(full_path, args=args)
+        if convert_folder(full_path, args=args):
+            return -1
     else:
         logging.getLogger(__name__).error("Attempted to parse non-existent file or directory: " + full_path)
+        return -1
 
 
-def convert_file(file, args, preserve_conditionals = None):
+def convert_file(file, args, preserve_conditionals = None, registry = None):
 
     global conditionals
 
@@ -224,11 +239,12 @@ def convert_file(file, args, preserve_conditionals = None):
     if preserve_conditionals is not None:
         conditionals = preserve_conditionals
 
-    ontology = Parser.parse_file(file, args.sub, args.base, args.resolve, preserve_conditionals = conditionals)
+    # imports are taken from the registry (the process-wide one if None) if they have been parsed before
+    ontology = Parser.parse_file(file, args.sub, args.base, args.resolve, preserve_conditionals = conditionals, registry = registry)
 
     if ontology is None:
         # some error occurred while parsing CLIF file(s)
-        exit(-1)
+        raise Parser.ParseError("Could not parse " + file)
 
     # producing OWL output
     if args.owl:
@@ -281,22 +297,111 @@ def convert_file(file, args, preserve_conditionals = None):
 
 
 def convert_folder(folder, args):
+    """
+    Convert all CLIF files in a folder and its subfolders, optionally with several worker processes
+    (option --jobs). Files that cannot be parsed are reported at the end instead of aborting the conversion.
+
+    :param str folder, the folder to convert
+    :param Namespace args, the arguments of the entry point
+    :return list of (file, error) tuples for the files that could not be converted
+    """
 
     tempfolder = macleod.Filemgt.read_config('converters', 'tempfolder')
     ignores = [tempfolder]
     cl_ending = macleod.Filemgt.read_config('cl', 'ending')
     #logging.getLogger(__name__).info("Traversing folder " + folder)
 
-    for directory, subdirs, files in os.walk(folder):
+    files = []
+    for directory, subdirs, filenames in os.walk(folder):
+        subdirs.sort()
         if any(ignore in directory for ignore in ignores):
             pass
         else:
-            for single_file in files:
+            for single_file in sorted(filenames):
                 if single_file.endswith(cl_ending):
-                    file = os.path.join(directory, single_file)
-                    logging.getLogger(__name__).info("Parsing CLIF file " + file)
-                    convert_file(file, args=args)
+                    files.append(os.path.join(directory, single_file))
+
+    jobs = max(1, getattr(args, 'jobs', 1) or 1)
+    start = time.perf_counter()
+    results = []
+
+    if jobs == 1 or len(files) < 2:
+        _init_worker(args, conditionals)
+        for file in files:
+            results.append(_convert_in_worker(file))
+    else:
+        # every worker keeps its own module registry, which is shared by all files converted in that worker
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                                    initargs=(args, conditionals)) as executor:
+            for result in executor.map(_convert_in_worker, files):
+                results.append(result)
+
+    errors = [(file, error) for (file, error, _) in results if error is not None]
+    print_timing_report(results, time.perf_counter() - start, jobs)
+
+    return errors
+
+
+def print_timing_report(results, elapsed, jobs):
+    """
+    Print how long the conversion of a folder took and which files could not be converted
+
+    :param list results, (file, error, seconds) tuple for each file
+    :param float elapsed, wall clock time of the whole conversion in seconds
+    :param int jobs, number of worker processes
+    :return None
+    """
+
+    busy = sum(seconds for (_, _, seconds) in results)
+    failed = [(file, error) for (file, error, _) in results if error is not None]
+
+    print("\n-- Conversion report --\n")
+    print("Converted {} of {} files in {:.2f}s using {} worker(s) ({:.2f}s of conversion time in total)".format(
+        len(results) - len(failed), len(results), elapsed, jobs, busy))
+
+    slowest = sorted(results, key=lambda result: result[2], reverse=True)[:5]
+    if slowest:
+        print("Slowest files:")
+        for (file, _, seconds) in slowest:
+            print("  {:8.2f}s {}".format(seconds, file))
+
+    if failed:
+        print("Could not convert {} files:".format(len(failed)))
+        for (file, error) in failed:
+            print("  " + file + ": " + error)
+
+
+# arguments of the entry point within a worker process of convert_folder
+_worker_args = None
+
+
+def _init_worker(args, preserve_conditionals):
+    """ Set up a worker process (or the main process if converting serially) for convert_folder """
+
+    global _worker_args, conditionals
+    _worker_args = args
+    conditionals = preserve_conditionals
+
+
+def _convert_in_worker(file):
+    """
+    Convert a single file for convert_folder
+
+    :return tuple (file, error message or None, seconds)
+    """
+
+    logging.getLogger(__name__).info("Parsing CLIF file " + file)
+    start = time.perf_counter()
+    error = None
+
+    try:
+        convert_file(file, args=_worker_args)
+    except (Parser.ParseError, TypeError) as e:
+        logging.getLogger(__name__).error("Could not parse " + file + ": " + str(e))
+        error = str(e)
+
+    return (file, error, time.perf_counter() - start)
 
 
 if __name__ == '__main__':
-    sys.exit(main())
+    parse_clif()
@@ -4,127 +4,252 @@ Created on 2013-03-29
 @author: Torsten Hahmann
 '''
 
+import argparse
 import os, sys, datetime
 
 #print(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.dirname(os.path.abspath(__file__))+"/../")
 
 import macleod.scripts.licence
-import macleod.ClifLemmaSet as ClifLemmaSet
-import macleod.ClifModuleSet as ClifModuleSet
+import macleod.BatchScheduler
 import macleod.Filemgt as filemgt
+import macleod.LemmaChain
+import macleod.ModelStore
+import macleod.ModuleRegistry
+import macleod.Portfolio
+import macleod.ProofCore
+import macleod.ProofHints
+import macleod.ResultCache
+import macleod.Stores
+import macleod.SubsetSearch
+import macleod.parsing.parser as Parser
+from macleod.Ontology import Ontology
 import logging
 
 
-def run_simple_check(m):
-    (_, r, _) = m.run_simple_consistency_check()[0]
-    if r==ClifModuleSet.PROOF:
-        logging.getLogger(__name__).info("+++ LEMMA PROVED " +m.get_lemma_module().module_name + " from AXIOMS: " + str(m.get_axioms())  +"\n")
-    elif r==ClifModuleSet.COUNTEREXAMPLE:
-        logging.getLogger(__name__).info("+++ SENTENCE REFUTED " +m.get_lemma_module().module_name + " in AXIOMS: " + str(m.get_axioms())  +"\n")
+def log_result(lemma_ontology, r):
+    if r==Ontology.PROOF:
+        logging.getLogger(__name__).info("+++ LEMMA PROVED " + lemma_ontology.name + " from AXIOMS: " + str(list(lemma_ontology.imports))  +"\n")
+    elif r==Ontology.COUNTEREXAMPLE:
+        logging.getLogger(__name__).info("+++ SENTENCE REFUTED " + lemma_ontology.name + " in AXIOMS: " + str(list(lemma_ontology.imports))  +"\n")
     else:
-        logging.getLogger(__name__).info("+++ SENTENCE NEITHER PROVED NOR REFUTED " +m.get_lemma_module().module_name + " in AXIOMS: " + str(m.get_axioms())  +"\n")
+        r = Ontology.UNKNOWN
+        logging.getLogger(__name__).info("+++ SENTENCE NEITHER PROVED NOR REFUTED " + lemma_ontology.name + " in AXIOMS: " + str(list(lemma_ontology.imports))  +"\n")
     return r
 
 
-def prove (lemmas_filename, summary_file, axioms_filename=None, options=[]):
+def get_lemma_ontologies(lemmas_filename, axioms_filename=None, registry=None):
+    """
+    Construct one ontology per lemma, each of which has the lemma as its only conjecture
+    and imports the axioms from which the lemma is to be proved. The axioms are translated and
+    written only once for all lemmas; the files of each lemma contain only its goal (see Ontology.share_axioms).
+
+    :param str lemmas_filename, path to the CLIF file containing the lemmas
+    :param str axioms_filename, path to the CLIF file containing the axioms (default: the imports of the lemmas file)
+    :param ModuleRegistry registry, registry from which already parsed modules are taken (default: the process-wide registry)
+    :return list of Ontology lemma ontologies
+    """
+
+    if registry is None:
+        registry = macleod.ModuleRegistry.get_registry()
+
+    sub, base = filemgt.get_ontology_basepath()
+
+    lemmas = Parser.parse_file(lemmas_filename, sub, base, registry=registry)
+    if lemmas is None:
+        return []
+
+    axioms = None
+    if axioms_filename is not None:
+        axioms_filename = os.path.abspath(axioms_filename)
+        axioms = registry.lookup(axioms_filename)
+        if axioms is None:
+            axioms = Parser.parse_file(axioms_filename, sub, base, resolve=True, registry=registry)
+            if axioms is None:
+                return []
+            registry.store(axioms_filename, axioms)
+
+    lemma_ontologies = []
+    stem = lemmas.name.rsplit('.', 1)[0]
+
+    shared = axioms
+    if axioms is None and lemmas.imports:
+        shared = Ontology(stem + "_axioms.clif", basepath=(sub, base), registry=registry)
+        for path in lemmas.imports:
+            shared.add_import(path)
+        shared.resolve_imports()
+
+    for (i, lemma) in enumerate(lemmas.axioms, start=1):
+        lemma_ontology = Ontology(stem + "_lemma" + str(i) + ".clif", basepath=(sub, base), registry=registry)
+        lemma_ontology.conjectures.append(lemma)
+
+        if axioms is None:
+            for path in lemmas.imports:
+                lemma_ontology.add_import(path)
+        else:
+            lemma_ontology.imports[axioms.name] = axioms
 
-    if axioms_filename is None:
-        m = ClifModuleSet(lemmas_filename)
-        #print "REMOVING " + m.get_top_module().module_name
-        m.remove_module(m.get_top_module())
-    else:
-        m = ClifModuleSet(axioms_filename)
+        # the shared modules are only parsed once
+        lemma_ontology.resolve_imports()
+        if shared is not None:
+            lemma_ontology.share_axioms(shared)
+        lemma_ontologies.append(lemma_ontology)
 
-    lemmas = ClifLemmaSet(lemmas_filename)
+    return lemma_ontologies
 
-    lemma_modules = lemmas.get_lemmas()
 
-    for l in lemma_modules:
-        logging.getLogger(__name__).info("LEMMA MODULE: " + l.module_name + " TPTP_SENTENCE " + l.tptp_sentence)
+def add_arguments(parser):
+    """
+    Add the options shared by prove_lemma and prove_lemma_all to a parser
+
+    :param ArgumentParser parser
+    :return the mutually exclusive group of the options that determine the order in which the lemmas are proved
+    """
+
+    parser.add_argument('-j', '--slots', type=int, default=None, help='Number of reasoners running at the same time (default: reasoner_slots in the configuration file or the number of CPUs)')
+    parser.add_argument('-t', '--first-timeout', type=int, default=None, help='Prove in passes with growing budgets, starting with this many seconds per reasoner (default: first_timeout in the configuration file or a single pass with the configured timeouts)')
+    parser.add_argument('--timeout-factor', type=float, default=macleod.BatchScheduler.DEFAULT_TIMEOUT_FACTOR, help='Factor by which the budget grows from one pass to the next')
+    parser.add_argument('--summary', type=str, default='log/lemma_summary.log', help='File (relative to the configuration folder) to which the result of each lemma is written as soon as it is known')
+    parser.add_argument('--no-cache', action='store_true', default=False, help='Run the reasoners even if a result for the same problem is stored in the result cache, and do not store new results')
+    parser.add_argument('--no-portfolio', action='store_true', default=False, help='Always run all active reasoners instead of running the reasoner that won most past proofs of similar lemmas alone first')
+    parser.add_argument('--no-cores', action='store_true', default=False, help='Always use all axioms instead of trying the axioms used in a past proof of the same lemma alone first')
+    parser.add_argument('--no-models', action='store_true', default=False, help='Send every lemma to the reasoners instead of refuting it by a model found in a past run on the same axioms first, and do not store new models')
+    parser.add_argument('--no-hints', action='store_true', default=False, help='Do not give Prover9 the clauses of a past proof of the same lemma as hints, and do not store new hints')
+
+    order = parser.add_mutually_exclusive_group()
+    order.add_argument('--chain', action='store_true', default=False, help='Prove the lemmas of each file in file order, adding every proved lemma as an axiom to all later lemmas of the file')
+    order.add_argument('--dag', type=str, default=None, help='Like --chain, but in the order given by this file, whose lines name a lemma and the lemmas it depends on (e.g. lem_theorems_lemma3: lem_theorems_lemma1 lem_theorems_lemma2); independent lemmas are proved in parallel')
+    return order
+
+
+def get_arguments(argv=None):
+    """
+    Parse the command line arguments of prove_lemma
+
+    :param list argv, arguments to parse (default: sys.argv)
+    :return Namespace args
+    """
+
+    parser = argparse.ArgumentParser(description='Prove the lemmas in a lemma file, each of its sentences being one lemma, running the reasoners for all lemmas in parallel.')
+    parser.add_argument('axioms', type=str, nargs='?', default=None, help='CLIF file of the axioms from which the lemmas are proved (default: the modules imported by the lemma file)')
+    parser.add_argument('lemmas', type=str, help='CLIF file of the lemmas')
+    order = add_arguments(parser)
+    order.add_argument('--module', action='store_true', default=False, help='Try to prove each lemma from the import closure of every module first, the smallest closures first, until one yields a proof')
+    order.add_argument('--depth', action='store_true', default=False, help='Like --module, but from one closure per depth level of the import hierarchy')
+
+    return parser.parse_args(argv)
+
+
+def get_summary_file(args):
+    """
+    The file to which the result of each lemma is written, whose folder is created if necessary
+
+    :param Namespace args, the arguments as returned by get_arguments
+    :return str absolute path
+    """
+
+    summary_file = os.path.normpath(os.path.join(os.path.abspath(filemgt.config_dir), args.summary))
+    os.makedirs(os.path.dirname(summary_file), exist_ok=True)
+    return summary_file
+
+
+def get_stores(args):
+    """
+    The result cache, portfolio statistics, proof cores, models and proof hints to use for the proofs
+
+    :param Namespace args, the arguments as returned by get_arguments
+    :return Stores stores, without the stores disabled by the arguments
+    """
+
+    return macleod.Stores.Stores(cache=None if args.no_cache else macleod.ResultCache.get_cache(),
+                                 portfolio=None if args.no_portfolio else macleod.Portfolio.get_portfolio(),
+                                 cores=None if args.no_cores else macleod.ProofCore.get_cores(),
+                                 models=None if args.no_models else macleod.ModelStore.get_models(),
+                                 hints=None if args.no_hints else macleod.ProofHints.get_hints())
+
+
+def get_first_timeout(args):
+    """
+    The budget of each reasoner in the first pass
+
+    :param Namespace args, the arguments as returned by get_arguments
+    :return int seconds, or None for a single pass with the configured timeouts
+    """
+
+    first_timeout = args.first_timeout
+    if first_timeout is None:
+        first_timeout = filemgt.read_config('system', 'first_timeout')
+    return None if first_timeout is None else int(first_timeout)
+
+
+def prove (args, registry=None):
+    """
+    Prove the lemmas of a lemma file
+
+    :param Namespace args, the arguments as returned by get_arguments
+    :param ModuleRegistry registry, registry to share parsed modules with other proofs (default: the process-wide registry)
+    :return tuple (proofs, counterexamples, unknown), the number of lemmas with each result
+    """
+
+    if registry is None:
+        registry = macleod.ModuleRegistry.get_registry()
+
+    lemma_modules = get_lemma_ontologies(args.lemmas, args.axioms, registry)
 
     for l in lemma_modules:
-        m.add_lemma_module(l)
-
-        #print str(m.get_imports())
-        l.output = ClifModuleSet.UNKNOWN
-
-        if '-module' in options:
-            results = m.run_consistency_check_by_subset(abort_signal = ClifModuleSet.PROOF, increasing=True)
-            for (i, r) in results.items():
-                if r==ClifModuleSet.PROOF:
-                    l.output = ClifModuleSet.PROOF
-                    logging.getLogger(__name__).info("+++ LEMMA PROVED " +l.module_name + "from AXIOMS: " + str(i)  +"\n")
-            if l.output != ClifModuleSet.PROOF:
-                l.output = run_simple_check(m)
-
-        elif '-depth' in options:
-            results = m.run_consistency_check_by_depth(abort_signal = ClifModuleSet.PROOF, increasing=True)
-            for (i, r) in results.items():
-                if r==ClifModuleSet.PROOF:
-                    l.output = ClifModuleSet.PROOF
-                    logging.getLogger(__name__).info("+++ LEMMA PROVED " +l.module_name + "from AXIOMS: " + str(i)  +"\n")
-            if l.output != ClifModuleSet.PROOF:
-                l.output = run_simple_check(m)
-
-        elif '-simple' in options:
-            l.output = run_simple_check(m)
-        else:
-            results = m.run_full_consistency_check()
-            for (i, r) in results.items():
-                if len(results)==1 and r==ClifModuleSet.COUNTEREXAMPLE:
-                    l.output = ClifModuleSet.COUNTEREXAMPLE
-                    logging.getLogger(__name__).info("+++ SENTENCE REFUTED " +m.get_lemma_module().module_name+ " in AXIOMS: " + str(m.get_axioms())  +"\n")
-                if r==ClifModuleSet.PROOF:
-                    l.output = ClifModuleSet.PROOF
-                    logging.getLogger(__name__).info("+++ LEMMA PROVED " +l.module_name + "from AXIOMS: " + str(i)  +"\n")
-            if l.output != ClifModuleSet.PROOF:
-                l.output = ClifModuleSet.UNKNOWN
-                logging.getLogger(__name__).info("+++ SENTENCE NEITHER PROVED NOR REFUTED " +m.get_lemma_module().module_name + " in AXIOMS: " + str(m.get_axioms())  +"\n")
+        logging.getLogger(__name__).info("LEMMA MODULE: " + l.name + " TPTP_SENTENCE " + registry.translations.translate(l.conjectures[0], 'tptp_conjecture'))
+
+    stores = get_stores(args)
+
+    # the lemmas are proved concurrently (sharing the translation of their axioms, see get_lemma_ontologies),
+    # and the result of each lemma is written to the summary file as soon as it is known
+    scheduler = macleod.BatchScheduler.BatchScheduler(args.slots, summary_file=get_summary_file(args),
+                                                      callback=lambda l, r, _: log_result(l, r), stores=stores,
+                                                      first_timeout=get_first_timeout(args), timeout_factor=args.timeout_factor)
+    chain = None
+    searches = None
+    if args.module or args.depth:
+        # each lemma is tried from the smallest import closures first, as by ClifModuleSet.run_consistency_check_by_subset;
+        # its own closure (all axioms) comes last, and a proof from any closure proves it
+        searches = {}
+        for l in lemma_modules:
+            searches[l.name] = macleod.SubsetSearch.SubsetSearch(scheduler, abort=True, abort_signal=Ontology.PROOF)
+            searches[l.name].add(l, by_depth=args.depth, increasing=True)
+    elif args.chain or args.dag:
+        # proved lemmas become axioms of the lemmas that depend on them (by default: all later lemmas)
+        chain = macleod.LemmaChain.LemmaChain(scheduler)
+        chain.add(lemma_modules, macleod.LemmaChain.read_dependencies(args.dag) if args.dag else None)
+    else:
+        for l in lemma_modules:
+            scheduler.add(l)
+    results = scheduler.run()
+    if chain is not None:
+        logging.getLogger(__name__).info(chain.report())
+    if searches is not None:
+        # the verdict of each lemma is that of its own closure, whether checked or inferred from a smaller one
+        results = {}
+        for (name, search) in searches.items():
+            logging.getLogger(__name__).info(search.report())
+            for (closure_ontology, _, return_value, fastest_reasoner, _) in search.get_results():
+                if closure_ontology.name == name:
+                    results[name] = (return_value, fastest_reasoner)
+    for line in stores.report():
+        logging.getLogger(__name__).info(line)
 
     proofs = 0
     counterexamples = 0
     unknown = 0
-
-    summary_file = os.path.normpath(os.path.join(os.path.abspath(filemgt.config_dir),summary_file))
-
-    # write results to summary single_file
-    single_file = open(summary_file, "a+")
-    for l in lemma_modules:
-        if l.output == ClifModuleSet.PROOF: proofs += 1
-        elif l.output == ClifModuleSet.COUNTEREXAMPLE: counterexamples += 1
+    for (output, _) in results.values():
+        if output == Ontology.PROOF: proofs += 1
+        elif output == Ontology.COUNTEREXAMPLE: counterexamples += 1
         else: unknown += 1
-        single_file.write(str(l.output) + " " + l.module_name + "\n")
-    single_file.flush()
-    single_file.close()
 
     return (proofs, counterexamples, unknown)
 
-def print_options ():
-    print("USAGE: prove_lemma [axiom_file] lemmas_file [options]")
-    print("with the following options:")
-    print("-find: only to be used when omitting the axiom_file. The axiom_file will be inferred from the lemmas_file. If this option is not used, the axiom_file MUST be specified.")
-    print("-simple:")
-    print("-module:")
-    print("-depth:")
 
 def main():
-    licence.print_terms()
-    options = sys.argv
-    options.reverse()
-    options.pop()
-    if not options:
-        print_options()
-        sys.exit()
-    if '-find' in options:
-        options.remove('-find')
-        axioms_filename = None
-        lemmas_filename = options.pop()        
-    else:
-        axioms_filename = options.pop()
-        lemmas_filename = options.pop()
-    prove (lemmas_filename, 'lemma_summary.log', axioms_filename=axioms_filename, options=options)
+    macleod.scripts.licence.print_terms()
+    prove(get_arguments())
 
 if __name__ == '__main__':
     sys.exit(main())
-
@@ -1,11 +1,17 @@
-
-import os, sys, datetime
+import argparse
+import os, sys, datetime, time
 
 #print(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.dirname(os.path.abspath(__file__))+"/../")
 
-import macleod.scripts.licence 
-import macleod.scripts.prove_lemma
+import macleod.BatchScheduler
+import macleod.LemmaChain
+import macleod.ModuleRegistry
+import macleod.RunJournal
+import macleod.parsing.parser as Parser
+import macleod.scripts.licence
+import macleod.scripts.prove_lemma as prove_lemma
+from macleod.Ontology import Ontology
 
 #global variables
 #ignores = ["theorems", "generated", "output", "consistency"]
@@ -14,13 +20,41 @@ necessary = "_theorems"
 #necessary = false
 
 def main():
-    licence.print_terms()
-	
-    proofs = 0
-    counterexamples = 0
-    unknown = 0
+    macleod.scripts.licence.print_terms()
+
+    parser = argparse.ArgumentParser(description='Prove all lemmas in the lemma files (*_theorems.clif) in a folder and its subfolders, running the reasoners for many lemmas in parallel.')
+    parser.add_argument('folder', type=str, help='Folder to search for lemma files')
+    prove_lemma.add_arguments(parser)
+    parser.add_argument('--resume', action='store_true', default=False, help='Resume an earlier run on the same folder that did not finish: take the results of the lemmas it completed from the run journal unless their axioms have changed, and prove only the others')
+    args = parser.parse_args()
+
+    # one registry for the whole run, so that the axioms shared by many lemma files
+    # are parsed and translated only once
+    registry = macleod.ModuleRegistry.ModuleRegistry()
+    start = time.perf_counter()
+
+    summary_file = prove_lemma.get_summary_file(args)
+
+    def report(lemma_ontology, return_value, fastest_reasoner):
+        # a model of the axioms and the negated lemma is a counterexample, an inconsistency is a proof
+        if return_value == Ontology.PROOF:
+            print("+++ LEMMA PROVED " + lemma_ontology.name + " by " + fastest_reasoner.name)
+        elif return_value == Ontology.COUNTEREXAMPLE:
+            print("+++ SENTENCE REFUTED " + lemma_ontology.name + " by " + fastest_reasoner.name)
+        else:
+            print("+++ SENTENCE NEITHER PROVED NOR REFUTED " + lemma_ontology.name)
+
+    stores = prove_lemma.get_stores(args)
+    journal = macleod.RunJournal.RunJournal('prove_lemma_all ' + os.path.abspath(args.folder), args.resume)
+    scheduler = macleod.BatchScheduler.BatchScheduler(args.slots, summary_file=summary_file, callback=report, stores=stores,
+                                                      first_timeout=prove_lemma.get_first_timeout(args),
+                                                      timeout_factor=args.timeout_factor, journal=journal)
+    # the lemmas of different files are independent of each other and are proved in parallel
+    chain = macleod.LemmaChain.LemmaChain(scheduler) if args.chain or args.dag else None
+    dependencies = macleod.LemmaChain.read_dependencies(args.dag) if args.dag else None
+
     files_no = 0
-    for directory, subdirs, files in os.walk(sys.argv[1]):
+    for directory, subdirs, files in os.walk(args.folder):
 
         subdirs.sort()
         files.sort()
@@ -37,21 +71,45 @@ def main():
                     filename = os.path.normpath(os.path.join(directory.replace('qs'+os.sep,''), single_file))
                     #print filename
                     files_no += 1
-                    (proofs_add, counterexamples_add, unknown_add) = prove_lemma.prove(filename, 
-                                                                                       'log/lemma_summary.log',
-                                                                                        axioms_filename=None,
-                                                                                        options=['-simple'])
-                    proofs += proofs_add
-                    counterexamples += counterexamples_add
-                    unknown += unknown_add
-
-                    print("---------------------")
-                    print(str(files_no) + " lemma files")
-                    print(str(proofs+counterexamples+unknown) + " lemmas in total")
-                    print(str(proofs) + " proofs")
-                    print(str(unknown) + " unknown")
-                    print(str(counterexamples) + " counterexamples")
-                    print("---------------------")
+                    try:
+                        lemma_ontologies = prove_lemma.get_lemma_ontologies(filename, registry=registry)
+                        if chain is not None:
+                            chain.add(lemma_ontologies, dependencies)
+                        else:
+                            for lemma_ontology in lemma_ontologies:
+                                scheduler.add(lemma_ontology)
+                    except (Parser.ParseError, TypeError, ValueError) as e:
+                        print("Could not parse " + filename + ": " + str(e))
+
+    results = scheduler.run()
+
+    proofs = 0
+    counterexamples = 0
+    unknown = 0
+    for (output, _) in results.values():
+        if output == Ontology.PROOF: proofs += 1
+        elif output == Ontology.COUNTEREXAMPLE: counterexamples += 1
+        else: unknown += 1
+
+    print("---------------------")
+    print(str(files_no) + " lemma files")
+    print(str(proofs+counterexamples+unknown) + " lemmas in total")
+    print(str(proofs) + " proofs")
+    print(str(unknown) + " unknown")
+    print(str(counterexamples) + " counterexamples")
+    print("---------------------")
+    for pass_report in scheduler.pass_reports:
+        print(pass_report)
+
+    print("Finished in {:.2f}s using {} reasoner slots".format(time.perf_counter() - start, scheduler.slots))
+    print("Results written to " + summary_file)
+    print(registry.report())
+    for line in stores.report():
+        print(line)
+    if chain is not None:
+        print(chain.report())
+    if args.resume:
+        print(journal.report())
 
 if __name__ == '__main__':
     sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Fixtures shared by the tests: a temporary folder for ontologies and their output, a stand-in for the BatchScheduler and the fake reasoner
+"""
+
+import collections
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from macleod.ModuleRegistry import ModuleRegistry
+from macleod.Ontology import Ontology
+from macleod.Reasoner import Reasoner
+
+
+class FolderTestCase(unittest.TestCase):
+    """
+    A test case with a temporary folder, which is removed after each test, and a registry shared by the ontologies in it
+    """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.registry = ModuleRegistry()
+
+    def new_ontology(self, path, *axioms):
+        """
+        Construct an ontology in the temporary folder
+
+        :param str path, path of the ontology within the folder
+        :param list axioms, axioms added to the ontology
+        :return Ontology ontology
+        """
+
+        ontology = Ontology(os.path.join(self.folder, path), basepath=('', self.folder), registry=self.registry)
+        for axiom in axioms:
+            ontology.add_axiom(axiom)
+        return ontology
+
+
+class Scheduler(object):
+    """
+    Stands in for a BatchScheduler: records the added and dropped ontologies, which the tests decide one by one
+    through the callback, or which run() decides with a given function
+    """
+
+    def __init__(self, summary_file=None, decide=None):
+        """
+        :param str summary_file, file to which the results are written
+        :param function decide, called by run() with every ontology that has not been decided yet, returns (return value, fastest reasoner)
+        """
+
+        self.summary_file = summary_file
+        self.callback = None
+        self.decide = decide
+        # the ontologies in the order in which they have been added
+        self.added = []
+        # the names of the dropped ontologies
+        self.dropped = []
+        self.results = collections.OrderedDict()
+
+    def add(self, ontology, reasoners=None):
+        self.added.append(ontology)
+
+    def drop(self, name):
+        self.dropped.append(name)
+        return True
+
+    def run(self):
+        for ontology in self.added:
+            if ontology.name not in self.results:
+                self.results[ontology.name] = self.decide(ontology)
+        return self.results
+
+
+class FakeReasoner(Reasoner):
+    """
+    The fake reasoner (scripts/fake_reasoner.py) with fixed options, whose command is constructed without the configuration file
+    """
+
+    def __init__(self, name, timeout, *options):
+        Reasoner.__init__(self, 'fake', reasoner_id=name, timeout=timeout)
+        self.options = list(options)
+
+    def constructCommand(self, ontology):
+        self.ontology = ontology
+        self.resetResult()
+        self.output_file = os.path.splitext(ontology.name)[0] + '.' + self.getId() + '.out'
+        self.setTimeout(self.timeout)
+        return self.args
+
+    def setTimeout(self, timeout):
+        self.timeout = timeout
+        # the fake reasoner matches the name of its input file against --when
+        self.args = [sys.executable, '-m', 'macleod.scripts.fake_reasoner'] + self.options + ['-t', str(timeout), self.ontology.name]
@@ -0,0 +1,144 @@
+import os
+import time
+import unittest
+import unittest.mock
+
+import macleod
+import macleod.ProblemDelivery
+from macleod.BatchScheduler import BatchScheduler
+from macleod.ReasonerSet import ReasonerSet
+from macleod.tests.helpers import FakeReasoner, FolderTestCase
+
+
+class BudgetReasoner(FakeReasoner):
+    """
+    A fake reasoner that records the time limit on its command line: the configured one when the command is constructed,
+    then the budget of every run
+    """
+
+    def __init__(self, name, timeout, *options):
+        FakeReasoner.__init__(self, name, timeout, *options)
+        self.budgets = []
+
+    def setTimeout(self, timeout):
+        FakeReasoner.setTimeout(self, timeout)
+        self.budgets.append(int(self.args[self.args.index('-t') + 1]))
+
+
+class BatchSchedulerTest(FolderTestCase):
+    """
+    Test the decisions, passes and dropped ontologies of small batches of fake reasoners
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+        # keep the scheduler from reading the configuration file
+        macleod.ProblemDelivery.set_mode(macleod.ProblemDelivery.FILES)
+        self.addCleanup(macleod.ProblemDelivery.set_mode, None)
+        patcher = unittest.mock.patch('macleod.Process.get_memory_limit', return_value=512)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_ontology(self, name):
+        return self.new_ontology(name + '.clif')
+
+    def make_reasoners(self, *reasoners):
+        # bypass the constructor, which reads the active reasoners from the configuration file
+        reasoner_set = ReasonerSet.__new__(ReasonerSet)
+        reasoner_set.extend(reasoners)
+        return reasoner_set
+
+    def test_announced_result(self):
+        # the winner keeps running long after announcing its proof, the other reasoners never finish
+        winner = FakeReasoner('winner', 60, '--verdict', 'proof', '--linger', '60')
+        loser = FakeReasoner('loser', 60, '--verdict', 'model', '--delay', '60')
+        queued = FakeReasoner('queued', 60, '--verdict', 'model', '--delay', '60')
+        scheduler = BatchScheduler(slots=2)
+        ontology = self.make_ontology('a')
+        scheduler.add(ontology, self.make_reasoners(winner, loser, queued))
+
+        start = time.perf_counter()
+        results = scheduler.run()
+        self.assertLess(time.perf_counter() - start, 30)
+
+        self.assertEqual(results[ontology.name], (macleod.Ontology.PROOF, winner))
+        self.assertEqual(loser.status, 'KILLED')
+        # the queued job is dropped instead of taking the freed slot
+        self.assertFalse(os.path.exists(queued.getOutputFile()))
+
+    def add_undecided(self, scheduler, name, timeout):
+        # the reasoner gives up at once, whatever its budget
+        reasoner = BudgetReasoner(name, timeout, '--verdict', 'unknown')
+        scheduler.add(self.make_ontology(name), self.make_reasoners(reasoner))
+        return reasoner
+
+    def test_single_pass(self):
+        scheduler = BatchScheduler(slots=2)
+        (long, short) = (self.add_undecided(scheduler, 'long', 300), self.add_undecided(scheduler, 'short', 60))
+        results = scheduler.run()
+
+        # every reasoner runs once with its configured timeout
+        self.assertEqual((long.budgets, short.budgets), ([300, 300], [60, 60]))
+        self.assertEqual([r[0] for r in results.values()], [macleod.Ontology.UNKNOWN, macleod.Ontology.UNKNOWN])
+        self.assertEqual(scheduler.pass_reports, ["pass 1: 2 ontologies decided, 0 remaining"])
+
+    def test_deepening_budgets(self):
+        scheduler = BatchScheduler(slots=2, first_timeout=2, timeout_factor=5)
+        (long, short) = (self.add_undecided(scheduler, 'long', 300), self.add_undecided(scheduler, 'short', 60))
+        scheduler.run()
+
+        # the budgets grow by the factor until they reach the configured timeout
+        self.assertEqual(long.budgets, [300, 2, 10, 50, 250, 300])
+        self.assertEqual(short.budgets, [60, 2, 10, 50, 60])
+        self.assertEqual(scheduler.pass_reports, ["pass 1: 0 ontologies decided with budgets of up to 2 seconds, 2 remaining",
+                                                  "pass 2: 0 ontologies decided with budgets of up to 10 seconds, 2 remaining",
+                                                  "pass 3: 0 ontologies decided with budgets of up to 50 seconds, 2 remaining",
+                                                  "pass 4: 1 ontologies decided with budgets of up to 250 seconds, 1 remaining",
+                                                  "pass 5: 1 ontologies decided with budgets of up to 1250 seconds, 0 remaining"])
+
+    def test_passes(self):
+        # the proof for the hard ontology takes longer than the first budget, but not than the second one
+        summary_file = os.path.join(self.folder, 'summary.log')
+        scheduler = BatchScheduler(slots=2, summary_file=summary_file, first_timeout=1, timeout_factor=3)
+        (easy, hard) = (self.make_ontology('easy'), self.make_ontology('hard'))
+        for ontology in (easy, hard):
+            scheduler.add(ontology, self.make_reasoners(FakeReasoner('fake', 10, '--verdict', 'proof', '--when', 'hard', 'proof', '2')))
+        results = scheduler.run()
+
+        self.assertEqual([results[o.name][0] for o in (easy, hard)], [macleod.Ontology.PROOF, macleod.Ontology.PROOF])
+        self.assertEqual(scheduler.pass_reports, ["pass 1: 1 ontologies decided with budgets of up to 1 seconds, 1 remaining",
+                                                  "pass 2: 1 ontologies decided with budgets of up to 3 seconds, 0 remaining"])
+        with open(summary_file) as f:
+            self.assertEqual(f.read().splitlines(), ["-1 " + easy.name + " fake",
+                                                     "# " + scheduler.pass_reports[0],
+                                                     "-1 " + hard.name + " fake",
+                                                     "# " + scheduler.pass_reports[1]])
+
+    def test_drop(self):
+        # the reasoner of the quick ontology is done first, while the slow one is running and the queued one waits for a slot
+        scheduler = BatchScheduler(slots=2)
+        (quick, slow, queued) = (self.make_ontology('quick'), self.make_ontology('slow'), self.make_ontology('queued'))
+        reasoners = {}
+        for ontology in (quick, slow, queued):
+            reasoners[ontology] = FakeReasoner('fake', 60, '--verdict', 'model', '--delay', '60', '--when', 'quick', 'proof', '0')
+            scheduler.add(ontology, self.make_reasoners(reasoners[ontology]))
+        self.assertFalse(scheduler.drop(self.make_ontology('unknown').name))
+
+        dropped = []
+        scheduler.callback = lambda ontology, return_value, fastest_reasoner: dropped.extend(scheduler.drop(o.name) for o in (slow, queued))
+        start = time.perf_counter()
+        results = scheduler.run()
+        self.assertLess(time.perf_counter() - start, 30)
+
+        self.assertEqual(dropped, [True, True])
+        self.assertEqual(list(results), [quick.name])
+        self.assertEqual(reasoners[slow].status, 'KILLED')
+        self.assertFalse(os.path.exists(reasoners[queued].getOutputFile()))
+        self.assertEqual(scheduler.pass_reports, ["pass 1: 1 ontologies decided, 0 remaining"])
+        # a decided or dropped ontology cannot be dropped (again)
+        self.assertFalse(scheduler.drop(quick.name))
+        self.assertFalse(scheduler.drop(slow.name))
+
+
+if __name__ == '__main__':
+    unittest.main()
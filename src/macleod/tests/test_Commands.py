@@ -0,0 +1,54 @@
+import os
+import unittest
+import unittest.mock
+
+from macleod.Commands import DEFAULT_STRATEGY, get_p9_strategies, get_strategy_name, split_domain_sizes
+
+
+class CommandsTest(unittest.TestCase):
+    """
+    Test the splitting of Mace4's domain sizes into shards
+    """
+
+    def sizes(self, shards):
+        return sorted(n for (start, end, increment) in shards for n in range(start, end + 1, increment))
+
+    def test_interleaved(self):
+        shards = split_domain_sizes(2, 12, 3)
+        self.assertEqual(shards, [(2, 12, 3), (3, 12, 3), (4, 12, 3)])
+        self.assertEqual(self.sizes(shards), list(range(2, 13)))
+
+    def test_blocked(self):
+        shards = split_domain_sizes(2, 12, 3, mode='blocked')
+        self.assertEqual(shards, [(2, 5, 1), (6, 9, 1), (10, 12, 1)])
+        self.assertEqual(self.sizes(shards), list(range(2, 13)))
+
+    def test_more_shards_than_sizes(self):
+        self.assertEqual(split_domain_sizes(2, 3, 4), [(2, 3, 2), (3, 3, 2)])
+        self.assertEqual(split_domain_sizes(2, 3, 4, mode='blocked'), [(2, 2, 1), (3, 3, 1)])
+
+    def test_unknown_mode(self):
+        self.assertRaises(ValueError, split_domain_sizes, 2, 12, 3, 'random')
+
+
+class StrategiesTest(unittest.TestCase):
+    """
+    Test reading the strategies of Prover9 from the configuration
+    """
+
+    def strategies(self, value):
+        with unittest.mock.patch('macleod.Filemgt.read_config', return_value=value):
+            return get_p9_strategies()
+
+    def test_no_strategies(self):
+        self.assertEqual(self.strategies(None), [])
+        self.assertEqual(self.strategies(' , '), [])
+
+    def test_strategies(self):
+        strategies = self.strategies('default, conf/order.p9opts,')
+        self.assertEqual(strategies, [DEFAULT_STRATEGY, os.path.abspath('conf/order.p9opts')])
+        self.assertEqual([get_strategy_name(s) for s in strategies], ['default', 'order'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import unittest
+
+import macleod
+from macleod.Diagnosis import Diagnosis
+from macleod.logical.symbol import Predicate
+from macleod.Reasoner import Reasoner
+from macleod.tests.helpers import FolderTestCase, Scheduler
+
+
+class DiagnosisTest(FolderTestCase):
+    """
+    Test the search for minimal inconsistent sets of modules and axioms
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+
+        # root imports the modules m0 to m7, each with two axioms
+        self.root = self.new_ontology('root.clif')
+        self.root.resolve = True
+        self.modules = []
+        for i in range(8):
+            module = self.new_ontology('m' + str(i) + '.clif', Predicate('P' + str(i), ['a']), Predicate('Q' + str(i), ['a']))
+            self.root.imports['http://example.org/m' + str(i) + '.clif'] = module
+            self.modules.append(module)
+
+    def make_scheduler(self, culprit, proofs=True):
+        """ A scheduler for which an ontology is inconsistent if it contains all axioms of the culprit, which Prover9 then reports as the axioms used in its proof """
+
+        def decide(ontology):
+            if not all(axiom in ontology.axioms for axiom in culprit):
+                return (macleod.Ontology.UNKNOWN, None)
+            reasoner = Reasoner('prover9', timeout=10)
+            reasoner.output_file = os.path.join(self.folder, os.path.basename(ontology.name) + '.out')
+            with open(reasoner.output_file, 'w') as f:
+                if proofs:
+                    f.write("============================== PROOF =================================\n")
+                    for (i, axiom) in enumerate(culprit, start=1):
+                        f.write(str(i) + " " + axiom.to_ladr(label=True)[:-1] + ".  [assumption].\n")
+                    f.write("============================== end of proof ==========================\n")
+            return (macleod.Ontology.INCONSISTENT, reasoner)
+
+        return Scheduler(decide=decide)
+
+    def test_minimal_set(self):
+        culprit = [self.modules[2].axioms[1], self.modules[5].axioms[0]]
+        diagnosis = Diagnosis(self.root, self.make_scheduler(culprit, proofs=False))
+        axioms = diagnosis.run()
+
+        self.assertEqual(diagnosis.modules, [self.modules[2].name, self.modules[5].name])
+        self.assertEqual(axioms, [(culprit[0], self.modules[2].name), (culprit[1], self.modules[5].name)])
+        # the halves of each step are checked in the same round
+        self.assertGreater(diagnosis.checks, diagnosis.rounds)
+        self.assertEqual(diagnosis.pruned, 0)
+
+    def test_pruning_by_proofs(self):
+        culprit = [self.modules[2].axioms[1], self.modules[5].axioms[0]]
+        scheduler = self.make_scheduler(culprit)
+        diagnosis = Diagnosis(self.root, scheduler)
+        diagnosis.run()
+
+        self.assertEqual(diagnosis.modules, [self.modules[2].name, self.modules[5].name])
+        self.assertEqual([a for (a, _) in diagnosis.axioms], culprit)
+        self.assertGreater(diagnosis.pruned, 0)
+        # the proofs narrow the candidates down to the culprit
+        unpruned = Diagnosis(self.root, self.make_scheduler(culprit, proofs=False))
+        unpruned.run()
+        self.assertLess(diagnosis.checks, unpruned.checks)
+        self.assertIn("2 modules and 2 axioms", diagnosis.report())
+
+    def test_single_module(self):
+        culprit = self.modules[7].axioms
+        diagnosis = Diagnosis(self.root, self.make_scheduler(culprit, proofs=False))
+        self.assertEqual([a for (a, _) in diagnosis.run()], culprit)
+        self.assertEqual(diagnosis.modules, [self.modules[7].name])
+
+
+if __name__ == '__main__':
+    unittest.main()
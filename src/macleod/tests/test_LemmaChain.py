@@ -0,0 +1,103 @@
+import os
+import unittest
+
+import macleod
+from macleod.LemmaChain import LemmaChain, read_dependencies
+from macleod.logical.symbol import Predicate
+from macleod.Reasoner import Reasoner
+from macleod.tests.helpers import FolderTestCase, Scheduler
+
+
+class LemmaChainTest(FolderTestCase):
+    """
+    Test the release of lemmas in dependency order and the reuse of proved lemmas as axioms
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+        self.scheduler = Scheduler(os.path.join(self.folder, 'summary.log'))
+        self.chain = LemmaChain(self.scheduler)
+
+    def make_lemmas(self, *predicates):
+        lemmas = []
+        for (i, predicate) in enumerate(predicates, start=1):
+            lemma = self.new_ontology('a_theorems_lemma' + str(i) + '.clif')
+            lemma.add_conjecture(Predicate(predicate, ['a']))
+            lemmas.append(lemma)
+        return lemmas
+
+    def make_reasoner(self, text):
+        # the timeout keeps the constructor from reading the configuration file
+        reasoner = Reasoner('prover9', timeout=10)
+        reasoner.output_file = os.path.join(self.folder, 'a.out')
+        with open(reasoner.output_file, 'w') as f:
+            f.write(text)
+        return reasoner
+
+    def prover9_proof(self, *axioms):
+        return ("============================== PROOF =================================\n" +
+                "".join(str(i) + " " + a.to_ladr(label=True)[:-1] + ".  [assumption].\n" for (i, a) in enumerate(axioms, start=1)) +
+                "============================== end of proof ==========================\n"
+                "THEOREM PROVED\n")
+
+    def test_file_order(self):
+        (first, second, third) = self.make_lemmas('p', 'q', 'r')
+        self.chain.add([first, second, third])
+        self.assertEqual(self.scheduler.added, [first])
+
+        self.chain._decided(first, macleod.Ontology.PROOF, None)
+        self.assertEqual(self.scheduler.added, [first, second])
+        self.assertEqual([a.sentence for a in second.axioms], [first.conjectures[0].sentence])
+
+        # a lemma that is not proved is not added to the later lemmas
+        self.chain._decided(second, macleod.Ontology.UNKNOWN, None)
+        self.assertEqual(self.scheduler.added, [first, second, third])
+        self.assertEqual([a.sentence for a in third.axioms], [first.conjectures[0].sentence])
+
+    def test_dag(self):
+        (first, second, third) = self.make_lemmas('p', 'q', 'r')
+        self.chain.add([first, second, third], {'a_theorems_lemma3': ['a_theorems_lemma1', 'a_theorems_lemma2', 'lemma9']})
+        # the lemmas that depend on no other lemma are proved in parallel
+        self.assertEqual(self.scheduler.added, [first, second])
+
+        self.chain._decided(second, macleod.Ontology.PROOF, None)
+        self.assertEqual(self.scheduler.added, [first, second])
+        self.chain._decided(first, macleod.Ontology.PROOF, None)
+        self.assertEqual(self.scheduler.added, [first, second, third])
+        self.assertEqual(len(third.axioms), 2)
+
+    def test_cycle(self):
+        lemmas = self.make_lemmas('p', 'q', 'r')
+        with self.assertRaises(ValueError):
+            self.chain.add(lemmas, {'a_theorems_lemma1': ['a_theorems_lemma3'], 'a_theorems_lemma3': ['a_theorems_lemma1']})
+        self.assertEqual(self.scheduler.added, [])
+
+    def test_used_lemmas(self):
+        decided = []
+        self.scheduler.callback = lambda o, r, _: decided.append((o, r))
+        self.chain = LemmaChain(self.scheduler)
+
+        (first, second, third) = self.make_lemmas('p', 'q', 'r')
+        self.chain.add([first, second, third])
+        self.chain._decided(first, macleod.Ontology.PROOF, None)
+        self.chain._decided(second, macleod.Ontology.PROOF, self.make_reasoner(self.prover9_proof(*second.axioms)))
+        # the proof of the third lemma does not need the first one
+        (_, from_second) = third.axioms
+        self.chain._decided(third, macleod.Ontology.PROOF, self.make_reasoner(self.prover9_proof(from_second)))
+
+        self.assertEqual(self.chain.used, {'a_theorems_lemma1': [], 'a_theorems_lemma2': ['a_theorems_lemma1'],
+                                           'a_theorems_lemma3': ['a_theorems_lemma2']})
+        self.assertEqual([o for (o, _) in decided], [first, second, third])
+        with open(self.scheduler.summary_file) as f:
+            self.assertIn("# a_theorems_lemma3 used lemmas: a_theorems_lemma2\n", f.read())
+        self.assertIn("Proved 3 lemmas, 2 of them using earlier lemmas", self.chain.report())
+
+    def test_read_dependencies(self):
+        filename = os.path.join(self.folder, 'dag.txt')
+        with open(filename, 'w') as f:
+            f.write("# lemma: lemmas it depends on\na_lemma3: a_lemma1, a_lemma2\n\na_lemma2:a_lemma1\n")
+        self.assertEqual(read_dependencies(filename), {'a_lemma3': ['a_lemma1', 'a_lemma2'], 'a_lemma2': ['a_lemma1']})
+
+
+if __name__ == '__main__':
+    unittest.main()
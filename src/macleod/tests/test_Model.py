@@ -0,0 +1,239 @@
+import gc
+import os
+import unittest
+
+import numpy
+
+import macleod
+from macleod.logical.connective import Conjunction, Disjunction, Implication
+from macleod.logical.negation import Negation
+from macleod.logical.quantifier import Existential, Universal
+from macleod.logical.symbol import Function, Predicate
+from macleod.Model import Model, read_mace4_model, read_paradox_model
+from macleod.ModelStore import ModelStore
+from macleod.Reasoner import Reasoner
+from macleod.tests.helpers import FolderTestCase
+
+MACE4_OUTPUT = """
+============================== MODEL =================================
+
+interpretation( 3, [number=1, seconds=0], [
+
+        function(c, [ 1 ]),
+
+        function(f(_), [ 1, 2, 0 ]),
+
+        relation(P(_,_), [
+			   0, 1, 0,
+			   0, 0, 1,
+			   1, 0, 0 ]),
+
+        relation(Q(_), [ 1, 0, 1 ])
+]).
+
+============================== end of model ==========================
+
+Exiting with 1 model.
+"""
+
+PARADOX_OUTPUT = """+++ RESULT: Satisfiable
+% SZS output start FiniteModel for a
+fof(model1,fi_domain,
+    ( ! [X] : ( X = '1' | X = '2' ) )).
+
+fof(model2,fi_functors,
+    ( c = '2'
+    & f('1') = '2'
+    & f('2') = '1' )).
+
+fof(model3,fi_predicates,
+    ( p('1','2')
+    & ~ p('2','1')
+    & q('1') )).
+% SZS output end FiniteModel for a
+"""
+
+
+class ModelTest(FolderTestCase):
+    """
+    Test reading models from the output of model finders and evaluating sentences in them
+    """
+
+    def write_output(self, text, name='a.out'):
+        filename = os.path.join(self.folder, name)
+        with open(filename, 'w') as f:
+            f.write(text)
+        return filename
+
+    def test_read_mace4(self):
+        model = read_mace4_model(self.write_output(MACE4_OUTPUT))
+        self.assertEqual(model.size, 3)
+        self.assertEqual(model.functions['f'].tolist(), [1, 2, 0])
+        self.assertEqual(int(model.functions['c']), 1)
+        self.assertTrue(model.relations['P'][0, 1])
+        self.assertFalse(model.relations['P'][1, 0])
+
+        self.assertIsNone(read_mace4_model(self.write_output("Exiting with failure.\n")))
+
+    def test_read_paradox(self):
+        model = read_paradox_model(self.write_output(PARADOX_OUTPUT))
+        self.assertEqual(model.size, 2)
+        self.assertEqual(model.functions['f'].tolist(), [1, 0])
+        self.assertEqual(model.relations['p'].tolist(), [[False, True], [False, False]])
+        self.assertEqual(model.relations['q'].tolist(), [True, False])
+
+        model = read_paradox_model(self.write_output("+++ BEGIN MODEL\nc = !2\nf(!1) = !2\nf(!2) = !1\n"
+                                                     "q(!1) : TRUE\nq(!2) : FALSE\n+++ END MODEL\n"))
+        self.assertEqual(model.size, 2)
+        self.assertEqual(model.functions['f'].tolist(), [1, 0])
+        self.assertEqual(model.relations['q'].tolist(), [True, False])
+
+    def test_evaluate(self):
+        model = read_mace4_model(self.write_output(MACE4_OUTPUT))
+
+        self.assertTrue(model.satisfies(Universal(['x'], Predicate('P', ['x', Function('f', ['x'])]))))
+        self.assertTrue(model.satisfies(Universal(['x'], Existential(['y'], Predicate('P', ['x', 'y'])))))
+        self.assertFalse(model.satisfies(Existential(['x'], Universal(['y'], Predicate('P', ['x', 'y'])))))
+        self.assertTrue(model.satisfies(Universal(['x', 'y'], Implication([Predicate('P', ['x', 'y']),
+                                                                            Predicate('=', [Function('f', ['x']), 'y'])]))))
+        self.assertFalse(model.satisfies(Predicate('Q', ['c'])))
+        self.assertTrue(model.satisfies(Existential(['x'], Conjunction([Predicate('Q', ['x']),
+                                                                          Negation(Predicate('=', ['x', 'c']))]))))
+        # the inner x shadows the outer one
+        self.assertTrue(model.satisfies(Universal(['x'], Disjunction([Predicate('Q', ['x']),
+                                                                        Existential(['x'], Predicate('Q', ['x']))]))))
+        # symbols the model does not interpret
+        self.assertIsNone(model.satisfies_all([Predicate('R', ['c'])]))
+
+    def test_serialization(self):
+        model = read_mace4_model(self.write_output(MACE4_OUTPUT))
+        copy = Model.from_dict(model.to_dict())
+        self.assertEqual(copy.size, model.size)
+        self.assertEqual(copy.relations['P'].tolist(), model.relations['P'].tolist())
+        self.assertEqual(copy.functions['c'].tolist(), model.functions['c'].tolist())
+
+    def test_isomorphic(self):
+        model = read_mace4_model(self.write_output(MACE4_OUTPUT))
+        # rename the elements: e becomes permutation[e]
+        permutation = numpy.array([2, 0, 1])
+        inverse = numpy.argsort(permutation)
+        renamed = Model(3, {name: table[numpy.ix_(*[inverse] * table.ndim)] for (name, table) in model.relations.items()},
+                        {name: permutation[table[numpy.ix_(*[inverse] * table.ndim)]] for (name, table) in model.functions.items()})
+        self.assertTrue(model.isomorphic(renamed))
+        self.assertEqual(model.colors()[1], renamed.colors()[1])
+
+        different = Model(3, dict(model.relations), dict(model.functions))
+        different.relations['Q'] = numpy.array([True, True, False])
+        self.assertFalse(model.isomorphic(different))
+
+        # the written interpretation is read back as the same model
+        self.assertTrue(read_mace4_model(self.write_output(model.to_mace4(), 'b.out')).isomorphic(model))
+
+
+class ModelStoreTest(FolderTestCase):
+    """
+    Test the reuse of stored models in consistency checks
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+        self.models = ModelStore(os.path.join(self.folder, 'models.sqlite'))
+        self.addCleanup(self.models.close)
+
+    def make_ontology(self, *axioms):
+        return self.new_ontology('a.clif', *axioms)
+
+    def make_reasoner(self, name, output=''):
+        # the timeout keeps the constructor from reading the configuration file
+        reasoner = Reasoner(name, timeout=10)
+        reasoner.output_file = os.path.join(self.folder, name + '.out')
+        with open(reasoner.output_file, 'w') as f:
+            f.write(output)
+        return reasoner
+
+    def test_reuse(self):
+        ontology = self.make_ontology(Universal(['x'], Existential(['y'], Predicate('P', ['x', 'y']))))
+        self.assertIsNotNone(self.models.record(ontology, self.make_reasoner('mace4', MACE4_OUTPUT)))
+        self.assertEqual(len(self.models), 1)
+
+        # the ontology has been edited, but the model still satisfies all axioms
+        edited = self.make_ontology(Universal(['x'], Existential(['y'], Predicate('P', ['x', 'y']))),
+                                    Existential(['x'], Predicate('Q', ['x'])))
+        reasoners = [self.make_reasoner('vampire'), self.make_reasoner('mace4')]
+        reused = self.models.reuse(edited, reasoners)
+        self.assertIs(reused, reasoners[1])
+        self.assertEqual(reused.status, 'CACHED')
+        self.assertEqual(edited.consolidate_results([reused]), (macleod.Ontology.CONSISTENT, reused))
+        self.assertEqual(self.models.hits, 1)
+
+    def test_no_reuse(self):
+        ontology = self.make_ontology(Predicate('Q', ['c']))
+        # the output of a failed search contains no model
+        self.assertIsNone(self.models.record(ontology, self.make_reasoner('mace4', "Exiting with failure.\n")))
+        self.assertIsNone(self.models.reuse(ontology, [self.make_reasoner('mace4')]))
+
+        self.models.record(ontology, self.make_reasoner('mace4', MACE4_OUTPUT))
+        # the model violates an axiom
+        edited = self.make_ontology(Predicate('Q', ['c']), Universal(['x'], Predicate('Q', ['x'])))
+        self.assertIsNone(self.models.reuse(edited, [self.make_reasoner('mace4')]))
+        self.assertEqual(self.models.misses, 1)
+
+        # a model that satisfies a conjecture is no counterexample
+        lemma = self.make_ontology(Universal(['x'], Existential(['y'], Predicate('P', ['x', 'y']))))
+        lemma.add_conjecture(Existential(['x'], Predicate('Q', ['x'])))
+        self.assertIsNone(self.models.reuse(lemma, [self.make_reasoner('mace4')]))
+
+    def test_pool(self):
+        module = self.make_ontology(Universal(['x'], Existential(['y'], Predicate('P', ['x', 'y']))))
+        self.models.record(module, self.make_reasoner('mace4', MACE4_OUTPUT))
+        # the same model with the elements renamed is not added again
+        renamed = MACE4_OUTPUT.replace('function(c, [ 1 ])', 'function(c, [ 0 ])').replace('[ 1, 0, 1 ]', '[ 0, 1, 1 ]')
+        self.models.record(module, self.make_reasoner('mace4', renamed))
+        self.assertEqual(len(self.models.get_pool(self.models.get_module(module))), 1)
+        self.assertEqual(self.models.duplicates, 1)
+
+        def make_lemma(name, conjecture):
+            lemma = self.new_ontology(name)
+            lemma.imports['a.clif'] = module
+            lemma.resolve = True
+            lemma.add_conjecture(conjecture)
+            return lemma
+
+        # a lemma that the model refutes
+        refuted = make_lemma('lemma1.clif', Universal(['x'], Predicate('Q', ['x'])))
+        reasoners = [self.make_reasoner('prover9'), self.make_reasoner('mace4')]
+        reused = self.models.reuse(refuted, reasoners)
+        self.assertIs(reused, reasoners[1])
+        self.assertEqual(reused.getResult().szs, 'CounterSatisfiable')
+        self.assertEqual(self.models.refuted, 1)
+        # the counterexample is written to the output file of the model finder
+        self.assertTrue(read_mace4_model(reused.output_file).isomorphic(self.models.get_pool(self.models.get_module(module))[0][2]))
+
+        # a lemma that holds in the model goes to the reasoners
+        survived = make_lemma('lemma2.clif', Existential(['x'], Predicate('Q', ['x'])))
+        self.assertIsNone(self.models.reuse(survived, [self.make_reasoner('prover9'), self.make_reasoner('mace4')]))
+
+    def test_pool_after_edit(self):
+        module = self.make_ontology(Universal(['x'], Existential(['y'], Predicate('P', ['x', 'y']))))
+        self.models.record(module, self.make_reasoner('mace4', MACE4_OUTPUT))
+
+        def screen(module):
+            lemma = self.new_ontology('lemma1.clif')
+            lemma.imports['a.clif'] = module
+            lemma.resolve = True
+            lemma.add_conjecture(Predicate('P', ['c', 'c']))
+            return self.models.reuse(lemma, [self.make_reasoner('prover9'), self.make_reasoner('mace4')])
+
+        self.assertIsNotNone(screen(module))
+
+        # the module is rebuilt with an axiom that the model falsifies, possibly reusing the ids of the old axioms
+        del module
+        gc.collect()
+        edited = self.make_ontology(Universal(['x'], Existential(['y'], Predicate('P', ['x', 'y']))),
+                                    Existential(['x'], Predicate('P', ['x', 'x'])))
+        self.assertIsNone(screen(edited))
+        self.assertEqual(self.models.refuted, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import gc
+import os
+import shutil
+import tempfile
+import unittest
+
+from macleod.Ontology import Ontology
+from macleod.ModuleRegistry import ModuleRegistry
+
+
+class ModuleRegistryTest(unittest.TestCase):
+    """
+    Test reuse and invalidation of parsed modules
+    """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def make_module(self, name, text='(cl-text test)'):
+        path = os.path.join(self.folder, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path, Ontology(path, basepath=('http://test', self.folder))
+
+    def test_lookup_and_variants(self):
+        registry = ModuleRegistry()
+        path, onto = self.make_module('a.clif')
+
+        self.assertIsNone(registry.lookup(path))
+        registry.store(path, onto)
+
+        self.assertIs(registry.lookup(path), onto)
+        self.assertIsNone(registry.lookup(path, preserve_conditionals=False))
+        self.assertEqual(registry.hits, 1)
+        self.assertEqual(registry.misses, 2)
+
+    def test_touched_file_is_reused(self):
+        registry = ModuleRegistry()
+        path, onto = self.make_module('a.clif')
+        registry.store(path, onto)
+
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertIs(registry.lookup(path), onto)
+
+    def test_modified_file_is_invalidated(self):
+        registry = ModuleRegistry()
+        path, onto = self.make_module('a.clif')
+        registry.store(path, onto)
+
+        with open(path, 'a') as f:
+            f.write('\n')
+
+        self.assertIsNone(registry.lookup(path))
+        self.assertEqual(registry.invalidations, 1)
+
+    def test_modified_import_invalidates_importer(self):
+        registry = ModuleRegistry()
+        path_a, onto_a = self.make_module('a.clif')
+        path_b, onto_b = self.make_module('b.clif')
+        onto_a.imports['http://test/b.clif'] = onto_b
+        registry.store(path_a, onto_a)
+        registry.store(path_b, onto_b)
+
+        self.assertIs(registry.lookup(path_a), onto_a)
+
+        with open(path_b, 'a') as f:
+            f.write('\n')
+
+        self.assertIsNone(registry.lookup(path_a))
+
+    def test_lru_keeps_only_weak_references(self):
+        registry = ModuleRegistry(max_size=1)
+        path_a, onto_a = self.make_module('a.clif')
+        path_b, onto_b = self.make_module('b.clif')
+        registry.store(path_a, onto_a)
+        registry.store(path_b, onto_b)
+
+        # evicted from the LRU, but still alive and thus still available
+        self.assertIs(registry.lookup(path_a), onto_a)
+
+        # b has been evicted from the LRU in turn and is released once nobody uses it anymore
+        del onto_b
+        gc.collect()
+        self.assertIsNone(registry.lookup(path_b))
+        self.assertEqual(len(registry), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ from macleod.logical.symbol import (Function, Predicate)
 from macleod.logical.axiom import Axiom
 from macleod.logical.quantifier import (Universal, Existential, Quantifier)
 import macleod.Ontology as Ontology
+from macleod.ModuleRegistry import ModuleRegistry
 
 class OnologyTest(unittest.TestCase):
     """
@@ -21,5 +22,35 @@ class OnologyTest(unittest.TestCase):
         onto.axioms.append(subclass_relation)
         print(onto.to_owl())
 
+    def test_share_axioms(self):
+        registry = ModuleRegistry()
+        module = Ontology("module.clif", basepath=('', ''), registry=registry)
+        module.add_axiom(Predicate('A', ['c']))
+        axioms = Ontology("axioms.clif", basepath=('', ''), registry=registry)
+        axioms.imports['module.clif'] = module
+        axioms.resolve = True
+
+        lemma = Ontology("lemma.clif", basepath=('', ''), registry=registry)
+        lemma.imports['module.clif'] = module
+        lemma.resolve = True
+        lemma.add_conjecture(Predicate('B', ['c']))
+        self.assertEqual(len(lemma.to_ladr()), 1)
+
+        # the imported axioms are only written once, to the files of the shared axioms
+        lemma.share_axioms(axioms)
+        self.assertEqual(lemma.to_ladr(), [])
+        self.assertEqual(len(lemma.to_tptp()), 1)
+        self.assertEqual(len(lemma.get_all_axioms()), 1)
+
+    def test_nontrivial_axioms(self):
+        onto = Ontology("onto.clif", basepath=('', ''), registry=ModuleRegistry())
+        onto.add_axiom(Universal(['x', 'y'], Predicate('P', ['x', 'y'])))
+        onto.add_nontrivial_axioms()
+
+        # one axiom asserting an instance and one asserting a non-instance of P
+        self.assertEqual(len(onto.axioms), 3)
+        self.assertEqual(onto.signature.get('P').occurrences, 3)
+        self.assertIsNotNone(onto.signature.get('=', arity=2))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,101 @@
+import os
+import unittest
+
+from macleod.Portfolio import Portfolio, get_family, get_features, MIN_RUNS, MIN_BUDGET
+from macleod.Reasoner import Reasoner
+from macleod.tests.helpers import FolderTestCase
+
+
+class PortfolioTest(FolderTestCase):
+    """
+    Test the selection of the likely winner from past runs
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+        self.portfolio = Portfolio(os.path.join(self.folder, 'stats.sqlite'))
+        self.addCleanup(self.portfolio.close)
+
+        self.prover9 = self.make_reasoner('prover9')
+        self.mace4 = self.make_reasoner('mace4')
+        self.reasoners = [self.prover9, self.mace4]
+
+    def make_reasoner(self, name):
+        # bypass the constructor, which reads the configuration file
+        reasoner = Reasoner.__new__(Reasoner)
+        reasoner.name = name
+        reasoner.identifier = name
+        reasoner.strategy = None
+        reasoner.timeout = '300'
+        reasoner.status = 'TERMINATED'
+        reasoner.time = 2.0
+        return reasoner
+
+    def test_family(self):
+        self.assertEqual(get_family(self.new_ontology('mereotopology/theorems/lemmas.clif')), 'mereotopology')
+        self.assertEqual(get_family(self.new_ontology('mereotopology/parthood.clif')), 'mereotopology')
+
+    def test_features(self):
+        ontology = self.new_ontology('a/b.clif')
+        self.assertEqual(get_features(ontology), ['axioms:10'])
+        ontology.nontrivial = True
+        self.assertIn('nontrivial', get_features(ontology))
+
+    def test_no_history(self):
+        self.assertEqual(self.portfolio.rank(self.new_ontology('a/b.clif'), self.reasoners), [])
+        self.assertIsNone(self.portfolio.select(self.new_ontology('a/b.clif'), self.reasoners))
+
+    def test_select_winner(self):
+        for i in range(2 * MIN_RUNS):
+            self.portfolio.record(self.new_ontology('a/b' + str(i) + '.clif'), self.reasoners, self.mace4)
+
+        (selected, budget) = self.portfolio.select(self.new_ontology('a/new.clif'), self.reasoners)
+        self.assertEqual([r.name for r in selected], ['mace4'])
+        self.assertEqual(budget, MIN_BUDGET)
+
+        # other families with the same features profit as well
+        (selected, _) = self.portfolio.select(self.new_ontology('c/new.clif'), self.reasoners)
+        self.assertEqual([r.name for r in selected], ['mace4'])
+
+    def test_shards_count_once(self):
+        shard = self.make_reasoner('mace4')
+        reasoners = self.reasoners + [shard]
+        for i in range(2 * MIN_RUNS):
+            self.portfolio.record(self.new_ontology('a/b.clif'), reasoners, shard)
+
+        self.assertEqual(self.portfolio.rank(self.new_ontology('a/b.clif'), [self.mace4])[0][0],
+                         (2 * MIN_RUNS + 1) / (2 * MIN_RUNS + 2))
+        (selected, _) = self.portfolio.select(self.new_ontology('a/b.clif'), reasoners)
+        self.assertEqual(len(selected), 2)
+
+    def test_select_strategy(self):
+        fast = self.make_reasoner('prover9')
+        fast.identifier = 'prover9_fast'
+        fast.strategy = 'fast.p9opts'
+        slow = self.make_reasoner('prover9')
+        slow.identifier = 'prover9_slow'
+        slow.strategy = 'slow.p9opts'
+        reasoners = [fast, slow, self.mace4]
+
+        for i in range(2 * MIN_RUNS):
+            self.portfolio.record(self.new_ontology('a/b.clif'), reasoners, fast)
+
+        (selected, _) = self.portfolio.select(self.new_ontology('a/b.clif'), reasoners)
+        self.assertEqual([r.getId() for r in selected], ['prover9_fast'])
+
+    def test_no_clear_winner(self):
+        for i in range(2 * MIN_RUNS):
+            self.portfolio.record(self.new_ontology('a/b.clif'), self.reasoners, self.reasoners[i % 2])
+
+        self.assertIsNone(self.portfolio.select(self.new_ontology('a/b.clif'), self.reasoners))
+
+    def test_cached_results_not_recorded(self):
+        self.mace4.status = 'CACHED'
+        for i in range(2 * MIN_RUNS):
+            self.portfolio.record(self.new_ontology('a/b.clif'), self.reasoners, self.mace4)
+
+        self.assertIsNone(self.portfolio.select(self.new_ontology('a/b.clif'), self.reasoners))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import unittest
+
+import macleod.ProblemDelivery as ProblemDelivery
+from macleod.logical.symbol import Predicate
+from macleod.Ontology import Ontology
+from macleod.Process import startSubprocessWithOutput
+from macleod.ResultCache import canonical_digest
+from macleod.tests.helpers import FolderTestCase
+
+
+class ProblemDeliveryTest(FolderTestCase):
+    """
+    Test the delivery of problems to the reasoners from memory
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+        # read the configuration again in other tests
+        self.addCleanup(ProblemDelivery.set_mode, None)
+
+        module = Ontology("module.clif", basepath=('', ''), registry=self.registry)
+        module.add_axiom(Predicate('A', ['c']))
+        self.axioms = Ontology("axioms.clif", basepath=('', ''), registry=self.registry)
+        self.axioms.imports['module.clif'] = module
+        self.axioms.resolve = True
+
+        self.lemma = Ontology("lemma.clif", basepath=('', ''), registry=self.registry)
+        self.lemma.imports['module.clif'] = module
+        self.lemma.resolve = True
+        self.lemma.add_conjecture(Predicate('B', ['c']))
+        self.lemma.share_axioms(self.axioms)
+
+    def test_problem_text(self):
+        ladr = ProblemDelivery.get_problem_text(self.lemma, 'ladr')
+        self.assertEqual(ladr.count("formulas(sos)."), 1)
+        self.assertLess(ladr.index("A(c)"), ladr.index("formulas(goals)."))
+        self.assertIn("B(c)", ladr)
+        # the file of the lemma contains its goal only
+        self.assertNotIn("A(c)", self.lemma.get_ladr_text())
+
+        # the shared axioms are inlined instead of included
+        tptp = ProblemDelivery.get_problem_text(self.lemma, 'tptp')
+        self.assertNotIn("include(", tptp)
+        self.assertEqual(len(tptp.splitlines()), 2)
+
+    def test_input_files(self):
+        ProblemDelivery.set_mode(ProblemDelivery.STDIN)
+        self.assertEqual(ProblemDelivery.get_input_files('prover9', self.lemma), [ProblemDelivery.STDIN_PATH])
+        # the fake reasoner matches the names of its input files and always gets files
+        self.assertFalse(ProblemDelivery.use_stdin('fake'))
+
+        ProblemDelivery.set_mode('memory')
+        self.assertEqual(ProblemDelivery.get_mode(), ProblemDelivery.FILES)
+        self.assertFalse(ProblemDelivery.use_stdin('prover9'))
+
+    def test_stream_input(self):
+        text = "formulas(sos).\nA(c).\nend_of_list.\n" * 10000
+        filename = os.path.join(self.folder, 'a.out')
+        with open(filename, 'w') as out_file:
+            process = startSubprocessWithOutput(['cat', ProblemDelivery.STDIN_PATH], out_file, input_text=text)
+            process.wait()
+        with open(filename) as f:
+            self.assertEqual(f.read(), text)
+
+    def test_digest_of_streamed_problem(self):
+        text = ProblemDelivery.get_problem_text(self.lemma, 'ladr')
+        filename = os.path.join(self.folder, 'a.p9')
+        with open(filename, 'w') as f:
+            f.write(text)
+        self.assertEqual(canonical_digest(None, text), canonical_digest(filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
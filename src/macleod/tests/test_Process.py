@@ -0,0 +1,33 @@
+import sys
+import unittest
+
+import macleod.Process
+
+
+class ProcessTest(unittest.TestCase):
+    """
+    Test the resource monitoring of reasoner processes
+    """
+
+    def test_parse_ps_time(self):
+        self.assertEqual(macleod.Process.parse_ps_time('00:01:05'), 65)
+        self.assertEqual(macleod.Process.parse_ps_time(' 12:34 '), 754)
+        self.assertEqual(macleod.Process.parse_ps_time('1-02:03:04'), 93784)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'requires /proc')
+    def test_read_process_group(self):
+        with open('/dev/null', 'w') as null:
+            p = macleod.Process.startSubprocessWithOutput(['sleep', '10'], null, memory_limit=512)
+        try:
+            (cputime, memory) = macleod.Process.read_process_group(p.pid)
+            self.assertGreaterEqual(cputime, 0)
+            self.assertLess(memory, 512)
+        finally:
+            p.kill()
+            p.wait()
+
+        self.assertEqual(macleod.Process.read_process_group(p.pid), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
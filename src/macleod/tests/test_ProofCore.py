@@ -0,0 +1,107 @@
+import os
+import unittest
+
+from macleod.logical.symbol import Predicate
+from macleod.Portfolio import MIN_BUDGET
+from macleod.ProofCore import ProofCore
+from macleod.Reasoner import Reasoner
+from macleod.ReasonerRegistry import used_axioms_prover9, used_axioms_vampire
+from macleod.tests.helpers import FolderTestCase
+
+
+class ProofCoreTest(FolderTestCase):
+    """
+    Test the extraction of the axioms used in proofs and their reuse
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+        self.cores = ProofCore(os.path.join(self.folder, 'cores.sqlite'))
+        self.addCleanup(self.cores.close)
+
+    def make_ontology(self, constants, lemma='s'):
+        ontology = self.new_ontology('a.clif', *[Predicate(predicate, [constant]) for (predicate, constant) in constants])
+        ontology.add_conjecture(Predicate(lemma, ['a']))
+        return ontology
+
+    def write_output(self, text):
+        filename = os.path.join(self.folder, 'a.out')
+        with open(filename, 'w') as f:
+            f.write(text)
+        return filename
+
+    def prover9_proof(self, *axioms):
+        return ("formulas(sos).\n" + "".join(a.to_ladr(label=True) + "\n" for a in axioms) + "end_of_list.\n"
+                "============================== PROOF =================================\n" +
+                "".join(str(i) + " " + a.to_ladr(label=True)[:-1] + ".  [assumption].\n" for (i, a) in enumerate(axioms[1:], start=1)) +
+                "============================== end of proof ==========================\n"
+                "THEOREM PROVED\n")
+
+    def make_reasoner(self, output_file):
+        # the timeout keeps the constructor from reading the configuration file
+        reasoner = Reasoner('prover9', timeout=10)
+        reasoner.output_file = output_file
+        reasoner.time = 2.0
+        return reasoner
+
+    def test_used_axioms(self):
+        ontology = self.make_ontology([('p', 'a'), ('q', 'a'), ('r', 'a')])
+        (p, q, r) = ontology.axioms
+        # the first axiom only occurs in the input, not in the proof
+        names = used_axioms_prover9(self.write_output(self.prover9_proof(p, q, r)))
+        self.assertEqual(names, {q.get_name(), r.get_name()})
+
+        names = used_axioms_vampire(self.write_output("% SZS status Theorem for a\n% SZS output start Proof for a\n"
+                                                      "fof(f1,axiom,(\n  q(a)),\n  file('/tmp/a.tptp',axiom20)).\n"
+                                                      "fof(f2,negated_conjecture,~s(a),inference(negated_conjecture,[],[f3])).\n"
+                                                      "% SZS output end Proof for a\n"))
+        self.assertEqual(names, {'axiom20'})
+
+        self.assertIsNone(used_axioms_prover9(self.write_output("SEARCH FAILED\n")))
+
+    def test_record_and_lookup(self):
+        ontology = self.make_ontology([('p', 'a'), ('q', 'a'), ('r', 'a')])
+        (p, q, r) = ontology.axioms
+        reasoner = self.make_reasoner(self.write_output(self.prover9_proof(p, q, r)))
+
+        self.assertEqual([a for (a, _) in self.cores.record(ontology, reasoner)], [q, r])
+        (core_ontology, budget) = self.cores.get_core_ontology(ontology)
+        self.assertEqual(core_ontology.axioms, [q, r])
+        self.assertEqual(core_ontology.conjectures, ontology.conjectures)
+        self.assertTrue(core_ontology.name.endswith('a_core.clif'))
+        self.assertEqual(budget, MIN_BUDGET)
+
+    def test_core_survives_edits(self):
+        ontology = self.make_ontology([('p', 'a'), ('q', 'a'), ('r', 'a')])
+        (p, q, r) = ontology.axioms
+        self.cores.record(ontology, self.make_reasoner(self.write_output(self.prover9_proof(p, q, r))))
+
+        # parsed again (with new axiom names) after an unrelated axiom has been changed
+        edited = self.make_ontology([('p', 'b'), ('q', 'a'), ('r', 'a')])
+        (core, _) = self.cores.lookup(edited)
+        self.assertEqual([a for (a, _) in core], edited.axioms[1:])
+
+        # an axiom of the core has been changed: only what is left of the core is tried
+        edited = self.make_ontology([('p', 'a'), ('q', 'b'), ('r', 'a')])
+        (core, _) = self.cores.lookup(edited)
+        self.assertEqual([a for (a, _) in core], edited.axioms[2:])
+
+        # a different lemma has no core
+        self.assertIsNone(self.cores.lookup(self.make_ontology([('p', 'a'), ('q', 'a'), ('r', 'a')], lemma='t')))
+
+    def test_no_core_without_proof(self):
+        ontology = self.make_ontology([('p', 'a'), ('q', 'a')])
+        self.assertIsNone(self.cores.record(ontology, self.make_reasoner(self.write_output("SEARCH FAILED\n"))))
+        self.assertEqual(len(self.cores), 0)
+        self.assertIsNone(self.cores.get_core_ontology(ontology))
+
+    def test_core_of_all_axioms(self):
+        ontology = self.make_ontology([('p', 'a'), ('q', 'a')])
+        (p, q) = ontology.axioms
+        # a proof that needs all axioms is not worth trying first
+        self.cores.record(ontology, self.make_reasoner(self.write_output(self.prover9_proof(q, p, q))))
+        self.assertIsNone(self.cores.lookup(ontology))
+
+
+if __name__ == '__main__':
+    unittest.main()
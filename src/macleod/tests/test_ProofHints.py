@@ -0,0 +1,91 @@
+import os
+import unittest
+
+from macleod.logical.symbol import Predicate
+from macleod.ProofHints import ProofHints, read_hints
+from macleod.Reasoner import Reasoner
+from macleod.tests.helpers import FolderTestCase
+
+PROVER9_PROOF = """formulas(sos).
+(all x (A(x) -> B(x))) # label(axiom10).
+end_of_list.
+============================== PROOF =================================
+
+% Proof 1 at 0.01 (+ 0.00) seconds.
+% Length of proof is 7.
+
+1 (all x (A(x) -> B(x))) # label(axiom10).  [assumption].
+2 (all x (B(x) -> C(x))) # label(axiom20).  [assumption].
+3 (all x (A(x) -> C(x))) # label(axiom30).  [goal].
+4 -A(x) | B(x) # label(axiom10).  [clausify(1)].
+5 -B(x) | C(x) # label(axiom20).  [clausify(2)].
+6 A(c1).  [deny(3)].
+7 -C(c1).  [deny(3)].
+8 B(c1).  [resolve(4,a,6,a)].
+9 -B(c1).  [resolve(5,b,7,a)].
+10 $F.  [resolve(8,a,9,a)].
+
+============================== end of proof ==========================
+THEOREM PROVED
+"""
+
+
+class ProofHintsTest(FolderTestCase):
+    """
+    Test the extraction of hints from Prover9 proofs and the report of the speedup they bring
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+        self.hints = ProofHints(os.path.join(self.folder, 'hints.sqlite'))
+        self.addCleanup(self.hints.close)
+
+    def make_ontology(self):
+        ontology = self.new_ontology('a.clif', Predicate('A', ['c']))
+        ontology.add_conjecture(Predicate('C', ['c']))
+        return ontology
+
+    def make_reasoner(self, output, time, hints=None):
+        # the timeout keeps the constructor from reading the configuration file
+        reasoner = Reasoner('prover9', timeout=10)
+        reasoner.output_file = os.path.join(self.folder, 'a.out')
+        with open(reasoner.output_file, 'w') as f:
+            f.write(output)
+        reasoner.time = time
+        reasoner.hints = hints
+        return reasoner
+
+    def test_read_hints(self):
+        filename = self.make_reasoner(PROVER9_PROOF, 1).output_file
+        # the derived clauses without labels; neither the input formulas nor the empty clause
+        self.assertEqual(read_hints(filename), ['-A(x) | B(x)', '-B(x) | C(x)', 'A(c1)', '-C(c1)', 'B(c1)', '-B(c1)'])
+
+        self.assertIsNone(read_hints(self.make_reasoner("SEARCH FAILED\n", 1).output_file))
+
+    def test_record_and_speedup(self):
+        ontology = self.make_ontology()
+        self.assertIsNone(self.hints.lookup(ontology))
+
+        self.assertEqual(len(self.hints.record(ontology, self.make_reasoner(PROVER9_PROOF, 8.0))), 6)
+        self.assertEqual(self.hints.lookup(self.make_ontology()), read_hints(os.path.join(self.folder, 'a.out')))
+        self.assertEqual(self.hints.speedups, [])
+
+        # the proof found with hints is compared with the historical time without hints
+        self.hints.record(ontology, self.make_reasoner(PROVER9_PROOF, 2.0, hints='a_hints.p9'))
+        self.hints.record(ontology, self.make_reasoner(PROVER9_PROOF, 1.0, hints='a_hints.p9'))
+        self.assertEqual(self.hints.speedups, [(8.0, 2.0), (8.0, 1.0)])
+        self.assertIn("speedup 5.3x", self.hints.report())
+
+    def test_no_hints_from_other_reasoners(self):
+        reasoner = self.make_reasoner(PROVER9_PROOF, 1.0)
+        reasoner.name = 'vampire'
+        self.assertIsNone(self.hints.record(self.make_ontology(), reasoner))
+
+        reasoner = self.make_reasoner(PROVER9_PROOF, 1.0)
+        reasoner.status = 'CACHED'
+        self.assertIsNone(self.hints.record(self.make_ontology(), reasoner))
+        self.assertEqual(len(self.hints), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import unittest
+import unittest.mock
+
+import macleod
+import macleod.ProblemDelivery
+from macleod.Race import Race
+from macleod.tests.helpers import FakeReasoner, FolderTestCase
+
+
+class RaceTest(FolderTestCase):
+    """
+    Test races of fake reasoners
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+        # keep the race from reading the configuration file
+        macleod.ProblemDelivery.set_mode(macleod.ProblemDelivery.FILES)
+        self.addCleanup(macleod.ProblemDelivery.set_mode, None)
+        patcher = unittest.mock.patch('macleod.Process.get_memory_limit', return_value=256)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_race(self, *reasoners, **options):
+        ontology = self.new_ontology('a.clif')
+        for reasoner in reasoners:
+            reasoner.constructCommand(ontology)
+        return Race(list(reasoners), **options).run()
+
+    def test_cancellation(self):
+        (started, finished, killed) = ([], [], [])
+        winner = FakeReasoner('winner', 60, '--verdict', 'proof')
+        loser = FakeReasoner('loser', 60, '--verdict', 'model', '--delay', '60')
+        start = time.perf_counter()
+        self.run_race(winner, loser, on_started=started.append, on_finished=finished.append, on_killed=killed.append)
+
+        self.assertLess(time.perf_counter() - start, 20)
+        self.assertEqual(sorted(r.getId() for r in started), ['loser', 'winner'])
+        self.assertEqual((finished, killed), ([winner], [loser]))
+        self.assertEqual(winner.output, macleod.Ontology.PROOF)
+        self.assertEqual(loser.status, 'KILLED')
+
+    def test_grace_period(self):
+        # the winner may finish its output within the grace period, but is stopped after it
+        quick = FakeReasoner('quick', 60, '--verdict', 'proof', '--linger', '0.2')
+        race = Race([quick], grace=10)
+        quick.constructCommand(self.new_ontology('a.clif'))
+        race.run()
+        self.assertIs(race.winner, quick)
+        with open(quick.getOutputFile()) as f:
+            self.assertIn("% Time elapsed", f.read())
+
+        slow = FakeReasoner('slow', 60, '--verdict', 'proof', '--linger', '60')
+        start = time.perf_counter()
+        self.run_race(slow, grace=0.5)
+        self.assertLess(time.perf_counter() - start, 20)
+        self.assertEqual(slow.output, macleod.Ontology.PROOF)
+        with open(slow.getOutputFile()) as f:
+            self.assertNotIn("% Time elapsed", f.read())
+
+    def test_timeout(self):
+        # the reasoner gives up at once but keeps running without using any CPU time, so only the wall clock stops it
+        idle = FakeReasoner('idle', 1, '--verdict', 'unknown', '--linger', '60')
+        start = time.perf_counter()
+        self.run_race(idle)
+        self.assertLess(time.perf_counter() - start, 20)
+        self.assertEqual(idle.status, 'ALLOTED TIME EXCEEDED: 1 seconds')
+        self.assertNotEqual(idle.output, macleod.Ontology.PROOF)
+
+    @unittest.skipUnless(os.path.exists('/dev/stdin'), 'requires /dev/stdin')
+    def test_stdin(self):
+        # a problem much larger than the buffer of a pipe, whose axiom names the fake reasoner reads from its standard input
+        reader = FakeReasoner('reader', 60, '--verdict', 'proof', '--delay', '0.5', '--uses', '2')
+        reader.constructCommand(self.new_ontology('a.clif'))
+        reader.args[-1] = '/dev/stdin'
+        reader.input_text = "".join("A(c) # label(axiom" + str(i) + ").\n" for i in range(1, 50001))
+        Race([reader]).run()
+
+        self.assertEqual(reader.output, macleod.Ontology.PROOF)
+        with open(reader.getOutputFile()) as f:
+            output = f.read()
+        self.assertIn(",axiom1)).", output)
+        self.assertIn(",axiom2)).", output)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'requires /proc and fork')
+    def test_memory_of_process_group(self):
+        # every process stays below the limit of its address space, together they exceed the memory limit
+        greedy = FakeReasoner('greedy', 60, '--verdict', 'model', '--delay', '30', '--memory', '60', '--children', '3')
+        start = time.perf_counter()
+        self.run_race(greedy)
+        self.assertLess(time.perf_counter() - start, 20)
+        self.assertEqual(greedy.status, 'ALLOTED MEMORY EXCEEDED: 256MB')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+import macleod
+from macleod.Reasoner import Reasoner, read_marked_lines
+from macleod.ReasonerRegistry import get_paradox_status, get_vampire_status
+
+
+class ReasonerTest(unittest.TestCase):
+    """
+    Test the detection of results in the output of reasoners
+    """
+
+    def make_reasoner(self, name):
+        # bypass the constructor, which reads the configuration file
+        reasoner = Reasoner.__new__(Reasoner)
+        reasoner.name = name
+        reasoner.ontology = ''
+        reasoner.output_file = ''
+        reasoner.resetResult()
+        return reasoner
+
+    def write_output(self, text):
+        (handle, filename) = tempfile.mkstemp()
+        with os.fdopen(handle, 'w') as f:
+            f.write(text)
+        self.addCleanup(os.remove, filename)
+        return filename
+
+    def test_status_lines(self):
+        self.assertEqual(get_vampire_status('% Termination reason: Refutation'), macleod.Ontology.PROOF)
+        self.assertEqual(get_vampire_status('% Termination reason: Refutation not found, incomplete strategy'), macleod.Ontology.UNKNOWN)
+        self.assertEqual(get_paradox_status('+++ RESULT: CounterSatisfiable'), macleod.Ontology.COUNTEREXAMPLE)
+        self.assertEqual(get_paradox_status('+++ RESULT: Satisfiable'), macleod.Ontology.CONSISTENT)
+
+    def test_scan_line(self):
+        prover9 = self.make_reasoner('prover9')
+        self.assertFalse(prover9.scanLine('given #1 (I,wt=3): P(x,x).'))
+        self.assertTrue(prover9.scanLine('THEOREM PROVED'))
+        self.assertEqual(prover9.output, macleod.Ontology.PROOF)
+
+        vampire = self.make_reasoner('vampire')
+        # intermediate results of a strategy schedule do not decide anything
+        self.assertFalse(vampire.scanLine('% Termination reason: Time limit'))
+        self.assertIsNone(vampire.output)
+        self.assertTrue(vampire.scanLine('% Termination reason: Satisfiable'))
+        self.assertEqual(vampire.output, macleod.Ontology.CONSISTENT)
+
+        mace4 = self.make_reasoner('mace4')
+        self.assertTrue(mace4.scanLine('Exiting with 1 model.'))
+        self.assertEqual(mace4.getResult().szs, 'Satisfiable')
+
+    def test_parse_output_once(self):
+        vampire = self.make_reasoner('vampire')
+        vampire.output_file = self.write_output('% Termination reason: Time limit\n% SZS status Theorem for test\n'
+                                                '% Termination reason: Refutation\n% Time elapsed: 0.25 s\n')
+
+        result = vampire.getResult()
+        self.assertTrue(vampire.terminatedSuccessfully())
+        self.assertFalse(vampire.terminatedWithError())
+        self.assertEqual(result.output, macleod.Ontology.PROOF)
+        self.assertEqual(result.szs, 'Theorem')
+        self.assertEqual(result.cputime, 0.25)
+
+        # the output is not read again
+        os.remove(vampire.output_file)
+        open(vampire.output_file, 'w').close()
+        self.assertIs(vampire.getResult(), result)
+
+    def test_read_marked_lines(self):
+        filename = self.write_output('THEOREM PROVED\n' + ('x' * 99 + '\n') * 100 + 'User_CPU=1.50, System_CPU=0.25, Wall_clock=2.\n')
+
+        # the marker is not in the tail, so the whole file is scanned
+        lines = read_marked_lines(filename, ('THEOREM PROVED', 'User_CPU='), 'THEOREM PROVED', tail_size=500)
+        self.assertEqual(lines['THEOREM PROVED'], ['THEOREM PROVED'])
+        self.assertEqual(len(lines['User_CPU=']), 1)
+
+        lines = read_marked_lines(filename, ('User_CPU=',), tail_size=500)
+        self.assertEqual(lines['User_CPU='], ['User_CPU=1.50, System_CPU=0.25, Wall_clock=2.'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import macleod
+import macleod.ReasonerRegistry
+from macleod.Reasoner import Reasoner
+from macleod.ReasonerRegistry import ReasonerPlugin, get_plugin, get_szs_result, register
+
+
+class ReasonerRegistryTest(unittest.TestCase):
+    """
+    Test the plugins of reasoners, using the fake reasoner
+    """
+
+    def make_reasoner(self, name):
+        # the timeout keeps the constructor from reading the configuration file
+        reasoner = Reasoner(name, timeout=10)
+        reasoner.output_file = ''
+        return reasoner
+
+    def run_fake_reasoner(self, *options):
+        (handle, filename) = tempfile.mkstemp()
+        os.close(handle)
+        self.addCleanup(os.remove, filename)
+        with open(filename, 'w') as out:
+            subprocess.run([sys.executable, '-m', 'macleod.scripts.fake_reasoner'] + list(options), stdout=out, check=False)
+        return filename
+
+    def test_builtin_plugins(self):
+        for name in ('prover9', 'mace4', 'paradox', 'vampire', 'fake'):
+            self.assertEqual(get_plugin(name).name, name)
+        self.assertEqual(get_plugin('mace4').input_format, 'ladr')
+        self.assertEqual(get_plugin('vampire').input_format, 'tptp')
+
+    def test_szs_results(self):
+        self.assertEqual(get_szs_result('% SZS status Theorem for lemma'), macleod.Ontology.PROOF)
+        self.assertEqual(get_szs_result('% SZS status Unsatisfiable'), macleod.Ontology.PROOF)
+        self.assertEqual(get_szs_result('% SZS status CounterSatisfiable'), macleod.Ontology.CONSISTENT)
+        self.assertEqual(get_szs_result('% SZS status Error'), macleod.Ontology.ERROR)
+        self.assertEqual(get_szs_result('% SZS status GaveUp'), macleod.Ontology.UNKNOWN)
+
+    def test_fake_reasoner(self):
+        fake = self.make_reasoner('fake')
+        fake.output_file = self.run_fake_reasoner('--verdict', 'model', '--lines', '5', 'base.tptp')
+
+        self.assertTrue(fake.terminatedSuccessfully())
+        self.assertEqual(fake.getResult().output, macleod.Ontology.CONSISTENT)
+        self.assertEqual(fake.getResult().szs, 'Satisfiable')
+        self.assertIsNotNone(fake.getResult().cputime)
+
+    def test_fake_reasoner_when(self):
+        fake = self.make_reasoner('fake')
+        fake.output_file = self.run_fake_reasoner('--verdict', 'model', '--when', 'lemma', 'proof', '0', 'lemma1.tptp')
+        self.assertEqual(fake.getResult().output, macleod.Ontology.PROOF)
+
+        fake = self.make_reasoner('fake')
+        fake.output_file = self.run_fake_reasoner('--verdict', 'proof', '--delay', '5', '-t', '0.1', 'base.tptp')
+        self.assertTrue(fake.terminatedUnknowingly())
+
+        fake = self.make_reasoner('fake')
+        fake.output_file = self.run_fake_reasoner('--verdict', 'error', 'base.tptp')
+        self.assertTrue(fake.terminatedWithError())
+
+    def test_scan_line(self):
+        fake = self.make_reasoner('fake')
+        self.assertFalse(fake.scanLine('given #1 (I,wt=1): fake clause.'))
+        self.assertFalse(fake.scanLine('% SZS status Timeout for base.tptp'))
+        self.assertTrue(fake.scanLine('% SZS status Unsatisfiable for base.tptp'))
+        self.assertEqual(fake.output, macleod.Ontology.PROOF)
+
+    def test_register(self):
+        plugin = ReasonerPlugin('eprover', lambda section, ontology, timeout=None, **options: ['eprover'], 'tptp',
+                                lambda lines: macleod.Ontology.PROOF if lines['# Proof found!'] else macleod.Ontology.UNKNOWN,
+                                ('# Proof found!',), ('# Proof found!', lambda line: macleod.Ontology.PROOF))
+        register(plugin)
+        self.addCleanup(macleod.ReasonerRegistry.PLUGINS.pop, 'eprover')
+
+        eprover = self.make_reasoner('eprover')
+        self.assertTrue(eprover.scanLine('# Proof found!'))
+        self.assertTrue(eprover.terminatedSuccessfully())
+
+
+if __name__ == '__main__':
+    unittest.main()
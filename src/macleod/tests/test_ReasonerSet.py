@@ -0,0 +1,83 @@
+import os
+import unittest
+import unittest.mock
+
+import macleod
+import macleod.ProblemDelivery
+from macleod.Commands import DEFAULT_STRATEGY
+from macleod.Race import Race
+from macleod.ReasonerSet import ReasonerSet
+from macleod.tests.helpers import FakeReasoner, FolderTestCase
+
+
+class StrategiesTest(FolderTestCase):
+    """
+    Test the instances of Prover9 that race with different strategies
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+        self.order = os.path.join(self.folder, 'order.p9opts')
+        self.config = {
+            ('system', 'path'): self.folder,
+            ('output', 'folder'): 'output',
+            ('output', 'ending'): '.out',
+            ('output', 'all_ending'): '_all',
+            ('prover9', 'command'): 'prover9',
+            ('prover9', 'ending'): '.p9',
+            ('prover9', 'timeout'): '60',
+            ('prover9', 'strategies'): 'default, ' + self.order,
+            ('vampire', 'timeout'): '60',
+        }
+        patcher = unittest.mock.patch('macleod.Filemgt.read_config', side_effect=lambda section, key: self.config.get((section, key)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # the problem is streamed, so that no LADR file is written
+        macleod.ProblemDelivery.set_mode(macleod.ProblemDelivery.STDIN)
+        self.addCleanup(macleod.ProblemDelivery.set_mode, None)
+        patcher = unittest.mock.patch('macleod.Process.get_memory_limit', return_value=512)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_instances(self):
+        instances = ReasonerSet.__new__(ReasonerSet).get_strategies('prover9')
+        self.assertEqual([r.getId() for r in instances], ['prover9_default', 'prover9_order'])
+        self.assertEqual([r.strategy for r in instances], [DEFAULT_STRATEGY, self.order])
+
+        # all instances read the same problem, but only the second one an options file, and they write separate output files
+        ontology = self.new_ontology('a.clif')
+        commands = [r.constructCommand(ontology) for r in instances]
+        self.assertEqual(commands[0], ['prover9', '-t60', '-f', macleod.ProblemDelivery.STDIN_PATH])
+        self.assertEqual(commands[1], commands[0] + [self.order])
+        self.assertEqual(len({r.getOutputFile() for r in instances}), 2)
+
+    def test_single_instance(self):
+        self.config[('prover9', 'strategies')] = None
+        self.assertEqual([r.getId() for r in ReasonerSet.__new__(ReasonerSet).get_strategies('prover9')], ['prover9'])
+
+        # only Prover9 supports strategies
+        self.config[('vampire', 'strategies')] = self.order
+        instances = ReasonerSet.__new__(ReasonerSet).get_strategies('vampire')
+        self.assertEqual([(r.getId(), r.strategy) for r in instances], [('vampire', None)])
+
+    def test_race(self):
+        # the fake reasoner plays Prover9 with each strategy: its options file comes last and only the reordering one finds a proof
+        ontology = self.new_ontology('a.clif')
+        reasoners = []
+        for instance in ReasonerSet.__new__(ReasonerSet).get_strategies('prover9'):
+            reasoner = FakeReasoner(instance.getId(), 60, '--verdict', 'unknown', '--delay', '60', '--when', 'order', 'proof', '0')
+            reasoner.constructCommand(ontology)
+            if instance.strategy != DEFAULT_STRATEGY:
+                reasoner.args.append(instance.strategy)
+            reasoners.append(reasoner)
+
+        race = Race(reasoners)
+        race.run()
+        self.assertEqual(race.winner.getId(), 'prover9_order')
+        self.assertEqual(race.winner.output, macleod.Ontology.PROOF)
+        self.assertEqual(reasoners[0].status, 'KILLED')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import time
+import unittest
+
+import macleod
+from macleod.Reasoner import Reasoner, ReasonerResult
+from macleod.ResultCache import ResultCache, canonical_digest
+from macleod.tests.helpers import FolderTestCase
+
+
+class ResultCacheTest(FolderTestCase):
+    """
+    Test the persistent cache of reasoner results
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+        self.cache = ResultCache(os.path.join(self.folder, 'results.sqlite'), ttl=1)
+        self.addCleanup(self.cache.close)
+
+    def write_problem(self, name, text):
+        filename = os.path.join(self.folder, name)
+        with open(filename, 'w') as f:
+            f.write(text)
+        return filename
+
+    def make_reasoner(self, name, problem, output=None):
+        # bypass the constructor, which reads the configuration file
+        reasoner = Reasoner.__new__(Reasoner)
+        reasoner.name = name
+        reasoner.args = ['/usr/local/bin/' + name, '-f', problem]
+        reasoner.output_file = problem + '.out'
+        reasoner.hints = None
+        reasoner.status = ''
+        reasoner.time = -1
+        reasoner.resetResult()
+        if output is not None:
+            reasoner.result = ReasonerResult(output, cputime=1.5, output_file=reasoner.output_file)
+            reasoner.output = output
+        return reasoner
+
+    def test_canonical_digest(self):
+        first = self.write_problem('a.tptp', "% generated from a.clif\nfof(axiom3, axiom, p).\n\nfof(axiom7, axiom, q).\n")
+        second = self.write_problem('b.tptp', "fof(axiom1, axiom, p).\n  fof(axiom2, axiom, q).\n")
+        third = self.write_problem('c.tptp', "fof(axiom1, axiom, q).\nfof(axiom2, axiom, p).\n")
+
+        self.assertEqual(canonical_digest(first), canonical_digest(second))
+        self.assertNotEqual(canonical_digest(first), canonical_digest(third))
+
+    def test_canonical_digest_of_includes(self):
+        axioms = self.write_problem('axioms.tptp', "fof(axiom1, axiom, p).\n")
+        lemma = self.write_problem('lemma.tptp', "include('" + axioms + "').\nfof(axiom2, conjecture, q).\n")
+        single = self.write_problem('single.tptp', "fof(axiom1, axiom, p).\nfof(axiom2, conjecture, q).\n")
+        self.assertEqual(canonical_digest(lemma), canonical_digest(single))
+
+        # a change of the shared axioms changes the problem
+        self.write_problem('axioms.tptp', "fof(axiom1, axiom, r).\n")
+        self.assertNotEqual(canonical_digest(lemma), canonical_digest(single))
+
+    def test_store_and_lookup(self):
+        problem = self.write_problem('a.tptp', "fof(axiom1, axiom, p).\n")
+        self.assertTrue(self.cache.store(self.make_reasoner('prover9', problem, macleod.Ontology.PROOF)))
+
+        mace4 = self.make_reasoner('mace4', problem)
+        self.assertIsNone(self.cache.lookup(mace4))
+
+        prover9 = self.make_reasoner('prover9', problem)
+        result = self.cache.lookup(prover9)
+        self.assertEqual(result.output, macleod.Ontology.PROOF)
+        self.assertEqual(prover9.status, 'CACHED')
+        self.assertEqual(prover9.time, 1.5)
+        self.assertTrue(prover9.terminatedSuccessfully())
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        # a cached result is not stored again
+        self.assertFalse(self.cache.store(prover9))
+
+    def test_options_are_part_of_key(self):
+        problem = self.write_problem('a.tptp', "fof(axiom1, axiom, p).\n")
+        self.cache.store(self.make_reasoner('prover9', problem, macleod.Ontology.PROOF))
+
+        prover9 = self.make_reasoner('prover9', problem)
+        prover9.args.append('-t 10')
+        self.assertIsNone(self.cache.lookup(prover9))
+
+    def test_budget_is_not_part_of_key(self):
+        problem = self.write_problem('a.tptp', "fof(axiom1, axiom, p).\n")
+        # found by Prover9 with a short budget, e.g. as the likely winner of the portfolio
+        prover9 = self.make_reasoner('prover9', problem, macleod.Ontology.PROOF)
+        prover9.args[1:1] = ['-t2']
+        self.assertTrue(self.cache.store(prover9))
+        vampire = self.make_reasoner('vampire', problem, macleod.Ontology.PROOF)
+        vampire.args[1:1] = ['-t', '2']
+        self.assertTrue(self.cache.store(vampire))
+
+        # looked up with the configured timeout
+        prover9 = self.make_reasoner('prover9', problem)
+        prover9.args[1:1] = ['-t300']
+        self.assertEqual(self.cache.lookup(prover9).output, macleod.Ontology.PROOF)
+        vampire = self.make_reasoner('vampire', problem)
+        vampire.args[1:1] = ['-t', '300']
+        self.assertEqual(self.cache.lookup(vampire).output, macleod.Ontology.PROOF)
+
+    def test_only_decisive_results(self):
+        problem = self.write_problem('a.tptp', "fof(axiom1, axiom, p).\n")
+        self.assertFalse(self.cache.store(self.make_reasoner('prover9', problem, macleod.Ontology.UNKNOWN)))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_expiry(self):
+        problem = self.write_problem('a.tptp', "fof(axiom1, axiom, p).\n")
+        self.cache.store(self.make_reasoner('prover9', problem, macleod.Ontology.PROOF))
+
+        self.cache._connection.execute("UPDATE results SET created = ?", (time.time() - 2 * 86400,))
+        self.assertIsNone(self.cache.lookup(self.make_reasoner('prover9', problem)))
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
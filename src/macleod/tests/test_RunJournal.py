@@ -0,0 +1,89 @@
+import os
+import unittest
+
+import macleod
+from macleod.logical.symbol import Predicate
+from macleod.Reasoner import Reasoner
+from macleod.RunJournal import RunJournal
+from macleod.tests.helpers import FolderTestCase
+
+
+class RunJournalTest(FolderTestCase):
+    """
+    Test the journal of batch runs and the resumption of runs that did not finish
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+        self.filename = os.path.join(self.folder, 'journal.sqlite')
+
+    def make_journal(self, resume):
+        journal = RunJournal('prove_lemma_all ' + self.folder, resume, self.filename)
+        self.addCleanup(journal.close)
+        return journal
+
+    def make_ontology(self, name, conjecture='B'):
+        ontology = self.new_ontology(name + '.clif', Predicate('A', ['c']))
+        ontology.add_conjecture(Predicate(conjecture, ['c']))
+        return ontology
+
+    def make_reasoners(self):
+        # the timeout keeps the constructor from reading the configuration file
+        reasoners = [Reasoner('prover9', timeout=10), Reasoner('mace4', timeout=10)]
+        reasoners[0].output_file = os.path.join(self.folder, 'a.out')
+        with open(reasoners[0].output_file, 'w') as f:
+            f.write("THEOREM PROVED\n")
+        return reasoners
+
+    def test_resume(self):
+        journal = self.make_journal(False)
+        (proved, unknown, failed, pending) = [self.make_ontology(n) for n in ('a', 'b', 'c', 'd')]
+        for ontology in (proved, unknown, failed, pending):
+            self.assertIsNone(journal.resume(ontology, self.make_reasoners()))
+        self.assertEqual(journal.status(), {'pending': 4})
+
+        journal.finish(proved, macleod.Ontology.PROOF, self.make_reasoners()[0])
+        journal.finish(unknown, macleod.Ontology.UNKNOWN, None)
+        self.assertEqual(journal.finish(failed, macleod.Ontology.ERROR, None), 'failed')
+        journal.close()
+
+        # the run died before the last job was decided
+        journal = self.make_journal(True)
+        reasoners = self.make_reasoners()
+        reasoners[0].output_file = ''
+        (verdict, reasoner) = journal.resume(self.make_ontology('a'), list(reversed(reasoners)))
+        self.assertEqual(verdict, macleod.Ontology.PROOF)
+        self.assertIs(reasoner, reasoners[0])
+        self.assertEqual(reasoner.getOutputFile(), os.path.join(self.folder, 'a.out'))
+        self.assertEqual(reasoner.status, 'CACHED')
+        self.assertTrue(reasoner.terminatedSuccessfully())
+
+        self.assertEqual(journal.resume(self.make_ontology('b'), self.make_reasoners()), (macleod.Ontology.UNKNOWN, None))
+        self.assertIsNone(journal.resume(self.make_ontology('c'), self.make_reasoners()))
+        self.assertIsNone(journal.resume(self.make_ontology('d'), self.make_reasoners()))
+        self.assertEqual((journal.resumed, journal.requeued, journal.changed), (2, 2, 0))
+
+    def test_changed_inputs(self):
+        journal = self.make_journal(False)
+        journal.resume(self.make_ontology('a'), self.make_reasoners())
+        journal.finish(self.make_ontology('a'), macleod.Ontology.PROOF, None)
+
+        journal = self.make_journal(True)
+        self.assertIsNone(journal.resume(self.make_ontology('a', conjecture='C'), self.make_reasoners()))
+        self.assertEqual(journal.changed, 1)
+        self.assertEqual(journal.status(), {'pending': 1})
+
+    def test_fresh_run(self):
+        journal = self.make_journal(False)
+        journal.resume(self.make_ontology('a'), self.make_reasoners())
+        self.assertEqual(len(journal), 1)
+        # without resuming, the earlier jobs of the run are forgotten, those of other runs are kept
+        other = RunJournal('check_consistency_all ' + self.folder, False, self.filename)
+        self.addCleanup(other.close)
+        other.resume(self.make_ontology('a'), self.make_reasoners())
+        self.assertEqual(len(self.make_journal(False)), 0)
+        self.assertEqual(len(other), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import unittest
+
+import macleod
+from macleod.logical.axiom import Axiom
+from macleod.logical.symbol import Predicate
+from macleod.SubsetSearch import SubsetSearch, get_depths, get_depth_closures, get_module_closures
+from macleod.tests.helpers import FolderTestCase, Scheduler
+
+
+class SubsetSearchTest(FolderTestCase):
+    """
+    Test the closures built from the import hierarchy and the inference and abortion of their checks
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+
+        # root imports a and b, which both import c
+        self.modules = {}
+        for name in ('c', 'a', 'b', 'root'):
+            module = self.new_ontology(name + '.clif', Predicate(name.upper(), ['x']))
+            module.resolve = True
+            self.modules[name] = module
+        for (name, imports) in (('a', 'c'), ('b', 'c'), ('root', 'a'), ('root', 'b')):
+            self.modules[name].imports['http://example.org/' + imports + '.clif'] = self.modules[imports]
+        self.root = self.modules['root']
+
+        self.scheduler = Scheduler()
+        self.search = SubsetSearch(self.scheduler)
+
+    def closure(self, name):
+        return [c for c in self.search.closures if os.path.basename(c.ontology.name) == name][0]
+
+    def added(self):
+        return [os.path.basename(o.name) for o in self.scheduler.added]
+
+    def dropped(self):
+        return [os.path.basename(name) for name in self.scheduler.dropped]
+
+    def test_module_closures(self):
+        closures = {os.path.basename(c.ontology.name): c for c in get_module_closures(self.root)}
+        self.assertIs(closures['root.clif'].ontology, self.root)
+        self.assertEqual(len(closures['a.clif'].modules), 2)
+        # the closure imports the module under the same path as its importer, so that no axiom occurs twice
+        self.assertEqual(sorted(a.sentence.name for (a, _) in closures['a.clif'].ontology.get_all_axioms()), ['A', 'C'])
+
+    def test_depth_closures(self):
+        self.assertEqual(get_depths(self.root)[self.modules['c'].name], 2)
+        closures = get_depth_closures(self.root)
+        self.assertEqual([len(c.modules) for c in closures], [4, 3, 1])
+        self.assertEqual(len(closures[1].ontology.get_all_axioms()), 3)
+
+    def test_lemma_closures(self):
+        lemma = self.new_ontology('lemma.clif')
+        lemma.conjectures.append(Axiom(Predicate('L', ['x'])))
+        lemma.imports['http://example.org/a.clif'] = self.modules['a']
+        lemma.resolve = True
+
+        closures = {os.path.basename(c.ontology.name): c for c in get_module_closures(lemma)}
+        # every closure tries to prove the lemma, under a name of its own
+        self.assertEqual(sorted(closures), ['lemma.clif', 'lemma_a.clif', 'lemma_c.clif'])
+        self.assertEqual(closures['lemma_c.clif'].ontology.conjectures, lemma.conjectures)
+        self.assertEqual(len(closures['lemma_a.clif'].modules), 2)
+
+    def test_inferred_results(self):
+        self.search.add(self.root, increasing=True)
+        self.assertEqual(self.added(), ['c.clif', 'a.clif', 'b.clif', 'root.clif'])
+
+        # an inconsistency carries over to all closures that contain the inconsistent one
+        self.search._decided(self.closure('a.clif').ontology, macleod.Ontology.INCONSISTENT, None)
+        self.assertEqual(self.dropped(), ['root.clif'])
+        self.assertEqual(self.closure('root.clif').verdict, macleod.Ontology.INCONSISTENT)
+
+        # consistency carries over to all closures that are contained in the consistent one
+        self.search._decided(self.closure('b.clif').ontology, macleod.Ontology.CONSISTENT, None)
+        self.assertEqual(self.dropped(), ['root.clif', 'c.clif'])
+        self.assertEqual([r[4] for r in self.search.get_results()], ['inferred', 'checked', 'checked', 'inferred'])
+        self.assertIn("2 checked by the reasoners, 2 inferred", self.search.report())
+
+    def test_abort(self):
+        self.search.add(self.root)
+        self.assertEqual(self.added()[0], 'root.clif')
+
+        # later closures are abandoned, earlier ones are still checked
+        self.search._decided(self.closure('a.clif').ontology, macleod.Ontology.CONSISTENT, None)
+        statuses = {os.path.basename(c.ontology.name): c.status for c in self.search.closures}
+        self.assertEqual(statuses, {'root.clif': 'queued', 'a.clif': 'checked', 'b.clif': 'aborted', 'c.clif': 'inferred'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from macleod.logical.symbol import (Function, Predicate)
+from macleod.logical.axiom import Axiom
+from macleod.logical.quantifier import Universal
+from macleod.SymbolTable import (Symbol, SymbolTable)
+
+
+class SymbolTableTest(unittest.TestCase):
+    """
+    Test the incrementally maintained signature of ontologies
+    """
+
+    def test_lookup(self):
+        table = SymbolTable()
+        table.add_axiom(Axiom(Universal(['x', 'y'], ~Predicate('P', ['x', 'y']) | Predicate('A', [Function('f', ['x'])]))), 'm1')
+        table.add_axiom(Axiom(Predicate('A', ['c'])), 'm2')
+
+        self.assertEqual(table.arity('P'), 2)
+        self.assertEqual(table.kind('f'), Symbol.FUNCTION)
+        self.assertEqual(table.kind('c'), Symbol.CONSTANT)
+        self.assertEqual(table.module('A'), 'm1')
+        self.assertEqual(table.get('A').modules, ['m1', 'm2'])
+        self.assertEqual(table.get('A').occurrences, 2)
+        self.assertIsNone(table.get('Q'))
+        self.assertEqual(table.conflicts(), [])
+
+    def test_conflicts(self):
+        table = SymbolTable()
+        table.add_axiom(Axiom(Predicate('P', ['c'])), 'm1')
+        table.add_axiom(Axiom(Predicate('P', ['c', 'd'])), 'm2')
+        table.add_axiom(Axiom(Predicate('c', ['d'])), 'm2')
+
+        self.assertEqual(len(table.lookup('P')), 2)
+        self.assertEqual(table.conflicts('P'), ["Predicate 'P' used as unary predicate (class) and binary predicate (relation)"])
+        self.assertEqual(table.conflicts('c'), ["c used as predicate and constant"])
+
+    def test_merge(self):
+        imported = SymbolTable()
+        imported.add_axiom(Axiom(Predicate('P', ['c'])), 'imported')
+
+        table = SymbolTable()
+        table.add_axiom(Axiom(Predicate('P', ['d', 'e'])), 'top')
+        table.merge(imported)
+
+        self.assertEqual(table.get('P', Symbol.PREDICATE, 1).module, 'imported')
+        self.assertEqual(table.get('c').module, 'imported')
+        self.assertEqual(len(table.conflicts('P')), 1)
+        self.assertEqual(len(table), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import gc
+import unittest
+
+from macleod.logical.symbol import Predicate
+from macleod.logical.axiom import Axiom
+from macleod.logical.quantifier import Universal
+from macleod.TranslationCache import TranslationCache
+
+
+class TranslationCacheTest(unittest.TestCase):
+    """
+    Test reuse of the translations of shared axioms
+    """
+
+    def test_translate(self):
+        cache = TranslationCache()
+        axiom = Axiom(Universal(['x'], Predicate('P', ['x'])))
+
+        tptp = cache.translate(axiom, 'tptp')
+        self.assertEqual(tptp, axiom.to_tptp())
+        self.assertIs(cache.translate(axiom, 'tptp'), tptp)
+        self.assertEqual(cache.translate(axiom, 'ladr'), axiom.to_ladr())
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 2)
+
+    def test_conjecture(self):
+        cache = TranslationCache()
+        axiom = Axiom(Predicate('P', ['c']))
+
+        self.assertIn(", axiom,", cache.translate(axiom, 'tptp'))
+        self.assertIn(", conjecture,", cache.translate(axiom, 'tptp_conjecture'))
+
+    def test_label(self):
+        cache = TranslationCache()
+        axiom = Axiom(Predicate('P', ['c']))
+
+        # only the problems given to the reasoners label the axioms
+        self.assertEqual(cache.translate(axiom, 'ladr'), "P(c).")
+        self.assertEqual(cache.translate(axiom, 'ladr_labelled'), "P(c) # label(" + axiom.get_name() + ").")
+
+    def test_released_with_axiom(self):
+        cache = TranslationCache()
+        axiom = Axiom(Predicate('P', ['c']))
+        cache.translate(axiom, 'tptp')
+        self.assertEqual(len(cache), 1)
+
+        del axiom
+        gc.collect()
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import unittest
+import unittest.mock
+
+from macleod.tests.helpers import FolderTestCase
+
+
+class ConvertFolderTest(FolderTestCase):
+    """
+    Test the conversion of a folder by the entry points of scripts/parser.py
+    """
+
+    def setUp(self):
+        FolderTestCase.setUp(self)
+        # the script reads the configuration when it is imported
+        config = {('converters', 'tempfolder'): 'converted', ('cl', 'ending'): '.clif'}
+        patcher = unittest.mock.patch('macleod.Filemgt.read_config', side_effect=lambda section, key: config.get((section, key)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        for (path, text) in (('good.clif', '(cl-text http://example.org/good.clif (forall (x) (A x)))'),
+                             ('sub/broken.clif', '(cl-text http://example.org/broken.clif (forall (x) (A x)'),
+                             ('sub/other.clif', '(cl-text http://example.org/other.clif (B c))')):
+            os.makedirs(os.path.dirname(os.path.join(self.folder, path)), exist_ok=True)
+            with open(os.path.join(self.folder, path), 'w') as f:
+                f.write(text + '\n')
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == 'fork', 'the workers inherit the configuration of the test')
+    def test_broken_file(self):
+        import macleod.scripts.parser
+
+        argv = ['parse_clif', '-f', self.folder, '--jobs', '2', '-b', self.folder, '-s', 'http://example.org']
+        output = io.StringIO()
+        with unittest.mock.patch.object(sys, 'argv', argv), contextlib.redirect_stdout(output):
+            with self.assertRaises(SystemExit) as raised:
+                macleod.scripts.parser.parse_clif()
+
+        # the other files are converted all the same, and the entry point fails
+        self.assertEqual(raised.exception.code, -1)
+        report = output.getvalue()
+        self.assertIn("Converted 2 of 3 files", report)
+        self.assertIn("using 2 worker(s)", report)
+        self.assertIn("Could not convert 1 files:\n  " + os.path.join(self.folder, 'sub', 'broken.clif') + ": ", report)
+
+
+if __name__ == '__main__':
+    unittest.main()